@@ -7,6 +7,12 @@ VALID_CREDENTIALS = {
     "mentor2": ("pass2", "mentor")
 }
 
+# Mentor logins mapped to the students.mentor_id they are responsible for
+MENTOR_IDS = {
+    "mentor1": "MENT1",
+    "mentor2": "MENT2"
+}
+
 def check_login(username, password):
     """Checks if the username and password are valid."""
     if username in VALID_CREDENTIALS:
@@ -21,6 +27,7 @@ def login_page():
         st.session_state.authenticated = False
         st.session_state.role = None
         st.session_state.username = ""
+        st.session_state.mentor_id = None
 
     # If the user is already authenticated, immediately return True
     # and do not draw the login page.
@@ -38,10 +45,14 @@ def login_page():
 
         if submitted:
             role = check_login(username, password)
-            if role:
+            if role == "mentor" and username not in MENTOR_IDS:
+                # Mentor pages treat a missing mentor_id as "all students", so never let one through
+                st.error("This mentor account is not linked to any students. Please contact an administrator.")
+            elif role:
                 st.session_state.authenticated = True
                 st.session_state.username = username
                 st.session_state.role = role
+                st.session_state.mentor_id = MENTOR_IDS.get(username)
                 st.rerun()
             else:
                 st.error("Invalid username or password.")
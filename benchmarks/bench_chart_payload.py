@@ -0,0 +1,79 @@
+"""Measure the JSON payload Plotly ships to the browser for the overview charts.
+
+"before" renders raw per-student figures (histogram of raw scores, box plots
+with points="all"); "after" renders from server-side bins, quartiles and a
+reservoir-sampled point overlay, as the dashboard now does:
+
+    python benchmarks/bench_chart_payload.py --sizes 1000 20000 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from chart_data import figure_payload_bytes, reservoir_sample, scatter_trace, downsample_series
+from config import DASHBOARD_CONFIG
+from risk_summary import box_stats, HISTOGRAM_BINS, RISK_FACTORS
+
+def make_risk_frame(num_students, seed=42):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'overall_risk_score': rng.uniform(0, 100, num_students),
+        'attendance_risk': rng.uniform(0, 60, num_students),
+        'academic_risk': rng.uniform(10, 80, num_students),
+        'financial_risk': rng.choice([0.0, 100.0], num_students, p=[0.8, 0.2])
+    })
+
+def raw_figures(risk_data):
+    figures = [px.histogram(risk_data, x='overall_risk_score', nbins=20)]
+    figures += [px.box(risk_data, y=factor, points="all") for factor in RISK_FACTORS]
+    return figures
+
+def aggregated_figures(risk_data):
+    counts, _ = np.histogram(risk_data['overall_risk_score'], bins=HISTOGRAM_BINS)
+    figures = [go.Figure(go.Bar(x=HISTOGRAM_BINS[:-1] + 2.5, y=counts, width=5))]
+    sample = np.array(reservoir_sample(risk_data[RISK_FACTORS].itertuples(index=False),
+                                       DASHBOARD_CONFIG['max_chart_points']))
+    for i, factor in enumerate(RISK_FACTORS):
+        stats = box_stats(risk_data[factor])
+        fig = go.Figure(go.Box(name=factor, q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+                               lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']]))
+        fig.add_trace(scatter_trace(x=np.zeros(len(sample)), y=sample[:, i], mode='markers'))
+        figures.append(fig)
+    return figures
+
+def measure(build, risk_data):
+    start = time.perf_counter()
+    payload = sum(figure_payload_bytes(fig) for fig in build(risk_data))
+    return payload, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure overview chart payload sizes')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 20000, 200000])
+    parser.add_argument('--attendance-days', type=int, default=3650,
+                        help='Length of the per-student attendance series to downsample')
+    args = parser.parse_args()
+
+    print(f"{'students':>10} {'before (KB)':>12} {'after (KB)':>11} {'before (s)':>11} {'after (s)':>10}")
+    for size in args.sizes:
+        risk_data = make_risk_frame(size)
+        before, before_time = measure(raw_figures, risk_data)
+        after, after_time = measure(aggregated_figures, risk_data)
+        print(f"{size:>10} {before / 1024:>12.1f} {after / 1024:>11.1f} {before_time:>11.2f} {after_time:>10.2f}")
+
+    dates = pd.date_range('2015-01-01', periods=args.attendance_days).strftime('%Y-%m-%d').to_numpy()
+    present = np.random.default_rng(0).random(args.attendance_days)
+    raw_line = go.Figure(go.Scatter(x=dates, y=present, mode='lines+markers'))
+    x, y = downsample_series(dates, present)
+    small_line = go.Figure(scatter_trace(x=x, y=y, mode='lines+markers'))
+    print(f"attendance line, {args.attendance_days} days: "
+          f"{figure_payload_bytes(raw_line) / 1024:.1f} KB -> {figure_payload_bytes(small_line) / 1024:.1f} KB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Compare pd.read_sql_query with the columnar reader on a large result set.
+
+Builds a test_scores-shaped table of `--rows` rows with a recursive CTE, then
+reads it back in a fresh process per reader: read_sql_query followed by
+apply_schema (what the pipeline did before), and columnar_reader.read_frame.
+Reports wall time, peak RSS and the deep size of the frame:
+
+    python benchmarks/bench_columnar_reader.py --rows 10000000
+    python benchmarks/bench_columnar_reader.py --rows 10000000 --readers read_frame
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+from bench_pipeline import reset_peak_rss, peak_rss_mb
+
+READERS = ['read_sql_query', 'read_frame']
+
+QUERY = '''
+    SELECT student_id, subject, status, score AS avg_score, attempt_number AS max_attempts,
+           amount AS pending_amount
+    FROM results
+'''
+
+def build(db_name, rows, students):
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute('''
+        CREATE TABLE results (
+            student_id TEXT, subject TEXT, status TEXT,
+            score REAL, attempt_number INTEGER, amount REAL
+        )
+    ''')
+    with conn:
+        conn.execute('''
+            WITH RECURSIVE n(i) AS (SELECT 0 UNION ALL SELECT i + 1 FROM n WHERE i + 1 < ?)
+            INSERT INTO results
+            SELECT 'STU' || (1000 + i % ?),
+                   CASE i % 5 WHEN 0 THEN 'Mathematics' WHEN 1 THEN 'Physics' WHEN 2 THEN 'Chemistry'
+                              WHEN 3 THEN 'English' ELSE 'Computer Science' END,
+                   CASE WHEN i % 7 = 0 THEN 'Pending' ELSE 'Paid' END,
+                   40 + (i * 7919 % 600) / 10.0,
+                   1 + i % 3,
+                   CASE WHEN i % 11 = 0 THEN NULL ELSE (i % 50) * 100.0 END
+            FROM n
+        ''', (rows, students))
+    conn.close()
+
+def measure(db_name, reader):
+    import pandas as pd
+    from columnar_reader import read_frame
+    from schema_types import FEATURE_SCHEMA, apply_schema, frame_memory_mb
+
+    conn = sqlite3.connect(db_name)
+    reset_peak_rss()
+    start = time.perf_counter()
+    if reader == 'read_sql_query':
+        frame = apply_schema(pd.read_sql_query(QUERY, conn), FEATURE_SCHEMA, 'category')
+    else:
+        frame = read_frame(conn, QUERY, schema=FEATURE_SCHEMA)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return {'seconds': elapsed, 'peak_rss_mb': peak_rss_mb(), 'frame_mb': frame_memory_mb(frame), 'rows': len(frame)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000000)
+    parser.add_argument('--students', type=int, default=100000)
+    parser.add_argument('--readers', nargs='+', choices=READERS, default=READERS,
+                        help='read_sql_query needs roughly 0.65 GB of RAM per million rows')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_columnar_")
+    context = multiprocessing.get_context('spawn')
+    try:
+        db_name = os.path.join(workdir, 'bench.db')
+        start = time.perf_counter()
+        build(db_name, args.rows, args.students)
+        print(f"built {args.rows:,} rows in {time.perf_counter() - start:.1f}s")
+        results = {}
+        print(f"  {'reader':<16} {'time':>9} {'peak RSS':>10} {'frame':>10}")
+        for reader in args.readers:
+            # A fresh process per reader so one peak never masks the other
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                result = results[reader] = pool.submit(measure, db_name, reader).result()
+            print(f"  {reader:<16} {result['seconds']:>8.2f}s {result['peak_rss_mb']:>8.0f}MB {result['frame_mb']:>8.0f}MB")
+        if len(results) == len(READERS):
+            print(f"  speedup: {results['read_sql_query']['seconds'] / results['read_frame']['seconds']:.2f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Time attendance window queries on TEXT dates versus integer day numbers.
+
+Builds a multi-year attendance table with StudentDatabase's schema, then runs
+the feature query's window filter both ways: the old `date >= date('now', ...)`
+string comparison and the indexed `day >= ?` range scan:
+
+    python benchmarks/bench_date_scans.py --students 2000 --years 3
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'English', 'Computer Science']
+
+QUERIES = {
+    'text': '''
+        SELECT student_id, subject, COUNT(*), SUM(CAST(present AS INTEGER)) FROM attendance
+        WHERE date >= date('now', ?) GROUP BY student_id, subject
+    ''',
+    'day': '''
+        SELECT student_id, subject, COUNT(*), SUM(CAST(present AS INTEGER)) FROM attendance
+        WHERE day >= ? GROUP BY student_id, subject
+    ''',
+}
+
+def build(db_name, students, years):
+    from database import StudentDatabase
+    StudentDatabase(db_name)
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA synchronous=OFF")
+    today = date.today()
+    days = [(today - timedelta(days=d)).isoformat() for d in range(365 * years)]
+    with conn:
+        for s in range(students):
+            conn.executemany(
+                "INSERT INTO attendance (student_id, subject, date, present) VALUES (?, ?, ?, ?)",
+                ((f"STU{1000 + s}", subject, day, (s + i) % 7 != 0)
+                 for i, day in enumerate(days) for subject in SUBJECTS))
+    conn.execute("ANALYZE")
+    rows = conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+    conn.close()
+    return rows
+
+def best_of(conn, query, params, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        conn.execute(query, params).fetchall()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--years', type=int, default=3)
+    parser.add_argument('--windows', nargs='+', type=int, default=[30, 90, 365])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    from date_utils import days_ago
+    workdir = tempfile.mkdtemp(prefix="bench_date_scans_")
+    try:
+        db_name = os.path.join(workdir, 'student_database.db')
+        rows = build(db_name, args.students, args.years)
+        print(f"attendance rows: {rows:,} over {args.years} years")
+        conn = sqlite3.connect(db_name)
+        print(f"  {'window':>8} {'text date':>12} {'day number':>12} {'speedup':>9}")
+        for window in args.windows:
+            text = best_of(conn, QUERIES['text'], (f"-{window} days",), args.repeats)
+            day = best_of(conn, QUERIES['day'], (days_ago(window),), args.repeats)
+            print(f"  {window:>7}d {text * 1000:>10.1f}ms {day * 1000:>10.1f}ms {text / day:>8.1f}x")
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Benchmark mentor digest and guardian message rendering.
+
+Compares the original per-mentor rescan with DigestBuilder at several roster sizes:
+
+    python benchmarks/bench_digest.py
+    python benchmarks/bench_digest.py --sizes 1000 10000 100000 --mentors 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from notification_digest import DigestBuilder
+
+def make_at_risk_frame(num_students, num_mentors, seed=42):
+    """Build a synthetic at-risk frame shaped like the notification query"""
+    rng = np.random.default_rng(seed)
+    ids = np.arange(num_students)
+    return pd.DataFrame({
+        'student_id': [f"STU{1000 + i}" for i in ids],
+        'student_name': [f"Student {i + 1}" for i in ids],
+        'mentor_id': [f"MENT{m + 1}" for m in rng.integers(0, num_mentors, num_students)],
+        'guardian_name': [f"Guardian {i + 1}" for i in ids],
+        'overall_risk_score': rng.uniform(40, 100, num_students),
+        'risk_level': np.where(rng.random(num_students) > 0.5, 'High', 'Medium'),
+        'reasons': rng.choice(['Low attendance (61.0%)', 'Fee payment issues',
+                               'Poor academic performance (52.3%), Fee payment issues'], num_students)
+    })
+
+def legacy_mentor_digests(at_risk_students):
+    """The original implementation: one full-frame filter per mentor"""
+    notifications = []
+    for mentor_id in at_risk_students['mentor_id'].unique():
+        mentor_students = at_risk_students[at_risk_students['mentor_id'] == mentor_id]
+        message = f"Alert: {len(mentor_students)} students under your mentorship require attention:\n\n"
+        for _, student in mentor_students.iterrows():
+            message += f"• {student['student_name']} ({student['student_id']}) - "
+            message += f"{student['risk_level']} Risk ({student['overall_risk_score']:.1f}/100)\n"
+            message += f"  Reasons: {student['reasons']}\n\n"
+        message += "Please schedule counseling sessions and contact guardians if necessary."
+        notifications.append({'mentor_id': mentor_id, 'message': message,
+                              'student_count': len(mentor_students)})
+    return notifications
+
+def legacy_guardian_messages(high_risk_students):
+    """The original implementation: one f-string chain per row"""
+    messages = []
+    for _, student in high_risk_students.iterrows():
+        message = f"Dear {student['guardian_name']},\n\n"
+        message += f"We would like to inform you that {student['student_name']} has been "
+        message += f"identified as high risk for academic challenges. "
+        message += f"Current risk score: {student['overall_risk_score']:.1f}/100.\n\n"
+        message += f"Primary concerns: {student['reasons']}\n\n"
+        message += "Please contact the student's mentor to discuss support strategies."
+        messages.append(message)
+    return messages
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark notification digest rendering')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--mentors', type=int, default=2000)
+    parser.add_argument('--skip-legacy-above', type=int, default=100000,
+                        help='Skip the legacy path for larger rosters')
+    args = parser.parse_args()
+
+    builder = DigestBuilder()
+    print(f"{'students':>10} {'path':>8} {'mentor (s)':>12} {'guardian (s)':>13}")
+    for size in args.sizes:
+        frame = make_at_risk_frame(size, min(args.mentors, size))
+
+        digests, mentor_time = timed(builder.build_mentor_digests, frame)
+        messages, guardian_time = timed(builder.build_guardian_messages, frame)
+        print(f"{size:>10} {'grouped':>8} {mentor_time:>12.3f} {guardian_time:>13.3f}")
+
+        if size <= args.skip_legacy_above:
+            legacy, legacy_mentor_time = timed(legacy_mentor_digests, frame)
+            legacy_messages, legacy_guardian_time = timed(legacy_guardian_messages, frame)
+            print(f"{size:>10} {'legacy':>8} {legacy_mentor_time:>12.3f} {legacy_guardian_time:>13.3f}")
+
+            by_mentor = {d['mentor_id']: d['message'] for d in legacy}
+            assert all(by_mentor[d['mentor_id']] == d['message'] for d in digests), "Mentor digests differ"
+            assert list(messages) == legacy_messages, "Guardian messages differ"
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compare pipeline memory with plain and compact DataFrame dtypes.
+
+Builds the benchmark database once per scale (see bench_pipeline.py), then runs
+prepare_features, predict_risk and the dashboard's load_risk_data in a fresh
+process with PIPELINE_CONFIG['compact_dtypes'] off and on. Reports peak RSS per
+stage and the deep size of each resulting frame:
+
+    python benchmarks/bench_memory.py --scales 100000
+    python benchmarks/bench_memory.py --scales 1000000 --output memory.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, 'benchmarks'))
+
+from bench_pipeline import generate_database, reset_peak_rss, peak_rss_mb
+
+MODES = {'plain': False, 'compact': True}
+
+def prepare_database(db_name, num_students, seed, days):
+    """Generate, train and publish one run so every mode reads the same data"""
+    generate_database(db_name, num_students, days, seed)
+    from ml_model import DropoutPredictor
+    predictor = DropoutPredictor(db_name)
+    predictor.train_model()
+    predictor.save_predictions_to_db(predictor.predict_risk())
+
+def measure(db_name, compact):
+    """Run the frame-heavy stages with compact dtypes on or off; returns {stage: metrics}"""
+    from config import PIPELINE_CONFIG
+    PIPELINE_CONFIG['compact_dtypes'] = compact
+    from data_ingestion import DataProcessor
+    from ml_model import DropoutPredictor
+    from dashboard import StudentDashboard
+    from schema_types import frame_memory_mb
+
+    results = {}
+    kept = []
+
+    def stage(name, func):
+        reset_peak_rss()
+        frame = func()
+        # Keep each frame alive so later stages are measured on top of it, as in a real run
+        kept.append(frame)
+        results[name] = {'peak_rss_mb': round(peak_rss_mb(), 1), 'frame_mb': round(frame_memory_mb(frame), 1)}
+
+    stage('prepare_features', lambda: DataProcessor(db_name).prepare_features())
+    stage('predict_risk', lambda: DropoutPredictor(db_name).predict_risk())
+    stage('load_risk_data', lambda: StudentDashboard(db_name)._query_risk_data())
+    return results
+
+def run_scale(num_students, seed, days):
+    workdir = tempfile.mkdtemp(prefix=f"bench_memory_{num_students}_")
+    db_name = os.path.join(workdir, 'student_database.db')
+    context = multiprocessing.get_context('spawn')
+    os.chdir(workdir)  # the model file is written to the working directory
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            pool.submit(prepare_database, db_name, num_students, seed, days).result()
+        results = {}
+        for mode, compact in MODES.items():
+            # A fresh process per mode so the peak of one never masks the other
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results[mode] = pool.submit(measure, db_name, compact).result()
+        return results
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', type=int, default=[100000])
+    parser.add_argument('--days', type=int, default=6, help='Attendance days per subject per student')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Optional JSON file for the results')
+    args = parser.parse_args()
+
+    report = {}
+    print(f"  {'scale':>8} {'stage':<18} {'plain RSS':>10} {'compact RSS':>12} {'plain frame':>12} {'compact frame':>14}")
+    for scale in args.scales:
+        results = run_scale(scale, args.seed, args.days)
+        report[str(scale)] = results
+        for stage in results['plain']:
+            plain, compact = results['plain'][stage], results['compact'][stage]
+            print(f"  {scale:>8} {stage:<18} {plain['peak_rss_mb']:>8.1f}MB {compact['peak_rss_mb']:>10.1f}MB "
+                  f"{plain['frame_mb']:>10.1f}MB {compact['frame_mb']:>12.1f}MB")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""End-to-end pipeline benchmark on seeded synthetic databases.
+
+Builds a database per scale and times every stage the nightly job runs:
+generation, prepare_features, train_model, predict_risk, save_predictions_to_db,
+notification generation and the dashboard loaders. Wall time, peak RSS and
+rows/sec per stage are written to JSON and compared against a stored baseline:
+
+    python benchmarks/bench_pipeline.py --scales 1000 100000
+    python benchmarks/bench_pipeline.py --scales 1000 --update-baseline
+    python benchmarks/bench_pipeline.py --scales 1000 --threshold 0.3
+
+Each scale runs in a fresh process so peak RSS figures do not carry over.
+Exits non-zero if any stage regressed past the threshold.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+DEFAULT_SCALES = [1000, 100000, 1000000]
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'baseline_pipeline.json')
+SUBJECTS = ['Mathematics', 'Physics', 'Chemistry', 'English', 'Computer Science']
+STUDENTS_PER_MENTOR = 50
+GENERATION_CHUNK = 20000
+
+def reset_peak_rss():
+    """Reset the kernel's high-water mark for this process (Linux only)"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    """Peak resident set size since the last reset, in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def generate_database(db_name, num_students, days=6, seed=42):
+    """Write a seeded synthetic roster shaped like StudentDatabase.generate_sample_data.
+
+    `days` of attendance per subject keeps the 1M-student database to a size
+    that fits on a laptop. Returns the number of rows written.
+    """
+    import sqlite3
+    import numpy as np
+    from database import StudentDatabase
+
+    StudentDatabase(db_name)
+    rng = np.random.default_rng(seed)
+    today = datetime.now()
+    attendance_dates = [(today - timedelta(days=days - d)).strftime('%Y-%m-%d') for d in range(days)]
+    test_dates = [(today - timedelta(days=30 - a * 7)).strftime('%Y-%m-%d') for a in range(3)]
+    due_date = (today - timedelta(days=15)).strftime('%Y-%m-%d')
+    paid_date = (today - timedelta(days=10)).strftime('%Y-%m-%d')
+    num_mentors = max(10, num_students // STUDENTS_PER_MENTOR)
+
+    conn = sqlite3.connect(db_name)
+    conn.execute("PRAGMA synchronous=OFF")
+    written = 0
+    with conn:
+        for start in range(0, num_students, GENERATION_CHUNK):
+            index = np.arange(start, min(start + GENERATION_CHUNK, num_students))
+            ids = [f"STU{1000 + i}" for i in index]
+            n = len(index)
+
+            conn.executemany('''
+                INSERT INTO students
+                (student_id, name, email, phone, guardian_name, guardian_phone, guardian_email, mentor_id, enrollment_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, '2024-01-15')
+            ''', ((sid, f"Student {i + 1}", f"student{i + 1}@institute.edu", f"9{i:09d}",
+                   f"Guardian {i + 1}", f"8{i:09d}", f"guardian{i + 1}@institute.edu",
+                   f"MENT{i % num_mentors + 1}") for sid, i in zip(ids, index)))
+
+            # A fifth of students attend ~60% of classes, the rest ~90%
+            rate = np.where(rng.random(n) < 0.2, 0.6, 0.9)
+            present = rng.random((n, len(SUBJECTS), days)) < rate[:, None, None]
+            conn.executemany(
+                "INSERT INTO attendance (student_id, subject, date, present) VALUES (?, ?, ?, ?)",
+                ((ids[s], SUBJECTS[j], attendance_dates[d], bool(present[s, j, d]))
+                 for s in range(n) for j in range(len(SUBJECTS)) for d in range(days)))
+
+            base = np.where(rng.random(n) < 0.3, 55.0, 75.0)
+            attempts = rng.integers(1, 4, (n, len(SUBJECTS)))
+            scores = np.clip(rng.normal(base[:, None, None], 12, (n, len(SUBJECTS), 3)), 0, 100)
+            test_rows = [(ids[s], SUBJECTS[j], f"Unit Test {a + 1}", float(scores[s, j, a]), 100, test_dates[a], a + 1)
+                         for s in range(n) for j in range(len(SUBJECTS)) for a in range(attempts[s, j])]
+            conn.executemany('''
+                INSERT INTO test_scores (student_id, subject, test_type, score, max_score, test_date, attempt_number)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', test_rows)
+
+            pending = rng.random(n) < 0.2
+            conn.executemany('''
+                INSERT INTO fee_payments (student_id, amount_due, amount_paid, due_date, payment_date, status)
+                VALUES (?, 5000, ?, ?, ?, ?)
+            ''', ((ids[s], 0 if pending[s] else 5000, due_date, None if pending[s] else paid_date,
+                   'Pending' if pending[s] else 'Paid') for s in range(n)))
+
+            written += n * (2 + len(SUBJECTS) * days) + len(test_rows)
+    conn.execute("ANALYZE")
+    conn.close()
+    return written
+
+def run_scale(num_students, seed, days):
+    """Run every stage against a fresh database and return {stage: metrics}"""
+    workdir = tempfile.mkdtemp(prefix=f"bench_pipeline_{num_students}_")
+    os.chdir(workdir)  # train_model writes dropout_model.pkl to the working directory
+    try:
+        return run_stages(os.path.join(workdir, 'student_database.db'), num_students, seed, days)
+    finally:
+        os.chdir(ROOT)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def run_stages(db_name, num_students, seed, days):
+    results = {}
+    state = {}
+
+    def stage(name, func, rows=None):
+        reset_peak_rss()
+        start = time.perf_counter()
+        produced = func()
+        wall = time.perf_counter() - start
+        count = rows if rows is not None else produced
+        results[name] = {
+            'wall_seconds': round(wall, 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'rows': count,
+            'rows_per_sec': round(count / wall, 1) if wall > 0 else None
+        }
+        print(f"  {num_students:>8} {name:<26} {wall:>9.3f}s {results[name]['peak_rss_mb']:>9.1f} MB", flush=True)
+
+    stage('generation', lambda: generate_database(db_name, num_students, days, seed))
+
+    from data_ingestion import DataProcessor
+    from ml_model import DropoutPredictor
+    from notification_system import NotificationSystem
+    from dashboard import StudentDashboard
+
+    stage('prepare_features', lambda: len(DataProcessor(db_name).prepare_features()))
+
+    predictor = DropoutPredictor(db_name)
+    stage('train_model', lambda: predictor.train_model(), rows=num_students)
+
+    def predict():
+        state['predictions'] = predictor.predict_risk()
+        return len(state['predictions'])
+    stage('predict_risk', predict)
+
+    def save():
+        predictor.save_predictions_to_db(state['predictions'])
+        return len(state['predictions'])
+    stage('save_predictions_to_db', save)
+
+    notifier = NotificationSystem(db_name)
+    stage('mentor_notifications', lambda: sum(n['student_count'] for n in notifier.generate_mentor_notifications()))
+    stage('guardian_notifications', lambda: len(notifier.generate_guardian_notifications()))
+
+    dashboard = StudentDashboard(db_name)
+    stage('dashboard_risk_data', lambda: len(dashboard.load_risk_data()))
+    stage('dashboard_summary', lambda: len(dashboard.load_summary()))
+    stage('dashboard_point_sample', lambda: len(dashboard.load_point_sample()['attendance_risk']))
+    stage('dashboard_high_risk', lambda: len(dashboard.load_high_risk_students(limit=100)))
+    stage('dashboard_student_details', lambda: len(dashboard.load_student_details('STU1000')))
+    return results
+
+def compare(results, baseline, threshold, min_seconds=0.05):
+    """Return [(scale, stage, metric, baseline, current)] that got worse than threshold allows.
+
+    Wall-time changes smaller than min_seconds are treated as noise.
+    """
+    regressions = []
+    for scale, stages in results.items():
+        for stage, metrics in stages.items():
+            before = baseline.get(scale, {}).get(stage)
+            if not before:
+                continue
+            for metric in ('wall_seconds', 'peak_rss_mb'):
+                if not before.get(metric) or metrics[metric] <= before[metric] * (1 + threshold):
+                    continue
+                if metric == 'wall_seconds' and metrics[metric] - before[metric] < min_seconds:
+                    continue
+                regressions.append((scale, stage, metric, before[metric], metrics[metric]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='+', type=int, default=DEFAULT_SCALES)
+    parser.add_argument('--days', type=int, default=6, help='Attendance days per subject per student')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench_pipeline_results.json', help='Where to write this run')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed slowdown, e.g. 0.2 for 20%%')
+    parser.add_argument('--min-seconds', type=float, default=0.05, help='Ignore wall-time changes smaller than this')
+    parser.add_argument('--update-baseline', action='store_true', help='Store this run as the new baseline')
+    args = parser.parse_args()
+
+    print(f"  {'scale':>8} {'stage':<26} {'wall':>10} {'peak RSS':>12}")
+    results = {}
+    context = multiprocessing.get_context('spawn')
+    for scale in args.scales:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[str(scale)] = pool.submit(run_scale, scale, args.seed, args.days).result()
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'days': args.days
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.setdefault('results', {}).update(results)
+        baseline['meta'] = report['meta']
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to store one.")
+        return
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline.get('results', {}), args.threshold, args.min_seconds)
+    if not regressions:
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+        return
+    print(f"\nRegressions beyond {args.threshold:.0%}:")
+    for scale, stage, metric, before, now in regressions:
+        print(f"  {scale:>8} {stage:<26} {metric:<13} {before:>10} -> {now}")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
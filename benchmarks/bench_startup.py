@@ -0,0 +1,94 @@
+"""Measure CLI startup cost with `python -X importtime` and check it against a budget.
+
+Each command is timed by importing exactly what main.py imports for it, in a
+fresh interpreter, and summing the cumulative time of the top-level imports:
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 5 --top 10
+    python benchmarks/bench_startup.py --budget-scale 2   # slower machines
+
+Exits non-zero if any command's median import time is over its budget.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# command -> (statement run under -X importtime, budget in milliseconds)
+COMMANDS = {
+    'help': ("import main; main.build_parser()", 50),
+    'init-db': ("import main; main.load('database', 'StudentDatabase')", 50),
+    'export': ("import main; main.load('data_export', 'DataExporter')", 50),
+    'dispatch': ("import main; main.load('notification_outbox', 'NotificationDispatcher')", 50),
+    'notify': ("import main; main.load('notification_system', 'NotificationSystem')", 1500),
+    'predict': ("import main; main.load('ml_model', 'DropoutPredictor')", 3000),
+}
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def parse_importtime(stderr):
+    """Return [(module, self_us, cumulative_us, depth)] from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return modules
+
+def measure(statement):
+    """Run statement in a fresh interpreter and return its parsed import timings"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+def total_ms(modules, baseline=()):
+    """Top-level cumulative times already include everything imported beneath them.
+
+    Modules the bare interpreter imports anyway (site, encodings, ...) are
+    passed as `baseline` and left out.
+    """
+    return sum(cumulative for name, _, cumulative, depth in modules
+               if depth == 0 and name not in baseline) / 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commands', nargs='+', choices=list(COMMANDS), default=list(COMMANDS))
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per command; the median is reported')
+    parser.add_argument('--top', type=int, default=5, help='Slowest top-level imports to list per command')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Multiply every budget by this factor')
+    args = parser.parse_args()
+
+    baseline = {name for name, _, _, depth in measure('pass') if depth == 0}
+
+    print(f"{'command':>10} {'median ms':>10} {'budget ms':>10}  status")
+    over_budget = []
+    for command in args.commands:
+        statement, budget = COMMANDS[command]
+        budget *= args.budget_scale
+        runs = [measure(statement) for _ in range(args.repeat)]
+        timings = [total_ms(modules, baseline) for modules in runs]
+        median = statistics.median(timings)
+        status = 'ok' if median <= budget else 'OVER BUDGET'
+        if median > budget:
+            over_budget.append(command)
+        print(f"{command:>10} {median:>10.1f} {budget:>10.0f}  {status}")
+
+        slowest = sorted((m for m in runs[-1] if m[3] == 0 and m[0] not in baseline), key=lambda m: -m[2])[:args.top]
+        for name, _, cumulative, _ in slowest:
+            print(f"{'':>12}{cumulative / 1000:>8.1f} ms  {name}")
+
+    if over_budget:
+        print(f"\nOver budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
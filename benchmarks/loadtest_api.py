@@ -0,0 +1,146 @@
+"""Load-test the risk API and report requests/sec and latency percentiles.
+
+Opens `--concurrency` keep-alive connections that each replay a mix of GET
+endpoints for `--duration` seconds. Student and mentor ids are sampled from
+the database so requests spread across the roster:
+
+    python main.py api &
+    python benchmarks/loadtest_api.py --concurrency 50 --duration 15
+    python benchmarks/loadtest_api.py --spawn --etag      # start the API itself, revalidate with ETags
+"""
+import argparse
+import asyncio
+import os
+import random
+import sqlite3
+import subprocess
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENDPOINTS = {
+    'risk': lambda s, m: f"/students/{s}/risk",
+    'history': lambda s, m: f"/students/{s}/history?granularity=W",
+    'mentor': lambda s, m: f"/mentors/{m}/students?level=High&limit=50",
+    'health': lambda s, m: "/health",
+}
+
+def sample_ids(db_name, count=1000, seed=42):
+    conn = sqlite3.connect(db_name)
+    students = [r[0] for r in conn.execute("SELECT student_id FROM students LIMIT ?", (count,))]
+    mentors = [r[0] for r in conn.execute("SELECT DISTINCT mentor_id FROM students WHERE mentor_id IS NOT NULL")]
+    conn.close()
+    if not students:
+        raise SystemExit(f"No students in {db_name}; run `python main.py setup` first")
+    rng = random.Random(seed)
+    rng.shuffle(students)
+    return students, mentors or ['MENT1']
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("connection closed")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        key, _, value = line.decode('latin-1').partition(':')
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length:
+        await reader.readexactly(length)
+    return status, headers
+
+async def client(host, port, paths, deadline, use_etag, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    etags = {}
+    index = random.randrange(len(paths))
+    try:
+        while time.perf_counter() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+            if use_etag and path in etags:
+                request += f"If-None-Match: {etags[path]}\r\n"
+            start = time.perf_counter()
+            writer.write((request + "\r\n").encode('latin-1'))
+            await writer.drain()
+            status, headers = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if 'etag' in headers:
+                etags[path] = headers['etag']
+    finally:
+        writer.close()
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+async def run_load(args, paths):
+    latencies = []
+    statuses = Counter()
+    deadline = time.perf_counter() + args.duration
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(args.host, args.port, paths, deadline, args.etag, latencies, statuses)
+        for _ in range(args.concurrency)
+    ])
+    return latencies, statuses, time.perf_counter() - start
+
+async def wait_for_server(host, port, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise SystemExit(f"API did not start on {host}:{port}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--db', default=os.path.join(ROOT, 'student_database.db'), help='Database to sample ids from')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=['risk', 'mentor', 'history'])
+    parser.add_argument('--etag', action='store_true', help='Send If-None-Match with the last ETag seen per URL')
+    parser.add_argument('--spawn', action='store_true', help='Start `main.py api` for the duration of the test')
+    args = parser.parse_args()
+
+    students, mentors = sample_ids(args.db)
+    paths = [ENDPOINTS[e](students[i % len(students)], mentors[i % len(mentors)])
+             for i in range(len(students)) for e in args.endpoints]
+
+    server = None
+    if args.spawn:
+        command = [sys.executable, os.path.join(ROOT, 'main.py'), 'api', '--host', args.host, '--port', str(args.port)]
+        # The API opens student_database.db relative to its working directory
+        server = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(args.db)),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        asyncio.run(wait_for_server(args.host, args.port))
+    try:
+        latencies, statuses, elapsed = asyncio.run(run_load(args, paths))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    print(f"requests:    {len(latencies)} in {elapsed:.1f}s with {args.concurrency} connections")
+    print(f"throughput:  {len(latencies) / elapsed:.1f} req/s")
+    print(f"latency ms:  p50 {percentile(latencies, 0.50) * 1000:.2f}  "
+          f"p95 {percentile(latencies, 0.95) * 1000:.2f}  p99 {percentile(latencies, 0.99) * 1000:.2f}  "
+          f"max {latencies[-1] * 1000 if latencies else 0:.2f}")
+    print(f"statuses:    {dict(sorted(statuses.items()))}")
+
+if __name__ == "__main__":
+    main()
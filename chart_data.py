@@ -0,0 +1,84 @@
+import random
+import sqlite3
+import numpy as np
+import plotly.graph_objects as go
+from config import DASHBOARD_CONFIG
+from prediction_runs import CURRENT_RUN_SQL
+
+def reservoir_sample(rows, k, seed=42):
+    """Uniform sample of k items from a stream of unknown length (Algorithm R)"""
+    rng = random.Random(seed)
+    reservoir = []
+    for index, row in enumerate(rows):
+        if index < k:
+            reservoir.append(row)
+        else:
+            slot = rng.randint(0, index)
+            if slot < k:
+                reservoir[slot] = row
+    return reservoir
+
+def iter_cursor(cursor, chunk_size=10000):
+    """Yield rows from a cursor in fetchmany chunks"""
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            return
+        yield from chunk
+
+def load_point_sample(db_name, columns, k=None):
+    """Stream the latest assessment batch through a reservoir of k rows"""
+    k = k or DASHBOARD_CONFIG['max_chart_points']
+    conn = sqlite3.connect(db_name)
+    try:
+        cursor = conn.execute(f'''
+            SELECT {", ".join(columns)} FROM risk_assessment
+            WHERE run_id = {CURRENT_RUN_SQL}
+        ''')
+        sample = reservoir_sample(iter_cursor(cursor), k)
+    finally:
+        conn.close()
+    if not sample:
+        return {column: np.array([]) for column in columns}
+    values = np.array(sample, dtype=float)
+    return {column: values[:, i] for i, column in enumerate(columns)}
+
+def scatter_trace(x, y, **kwargs):
+    """Scatter trace that switches to WebGL rendering for large point clouds"""
+    trace_type = go.Scattergl if len(x) > DASHBOARD_CONFIG['webgl_threshold'] else go.Scatter
+    return trace_type(x=x, y=y, **kwargs)
+
+def downsample_series(x, y, max_points=None):
+    """Largest-Triangle-Three-Buckets downsampling of a line series.
+
+    Keeps the first and last points and, per bucket, the point forming the
+    largest triangle with its neighbours, preserving the line's visible shape.
+    """
+    max_points = max_points or DASHBOARD_CONFIG['max_chart_points']
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points or max_points < 3:
+        return x, y
+
+    # Dates and other non-numeric x values are ranked by position
+    x_numeric = x.astype(float) if np.issubdtype(x.dtype, np.number) else np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = [0]
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x_numeric[end:next_end].mean() if next_end > end else x_numeric[-1]
+        next_y = y[end:next_end].mean() if next_end > end else y[-1]
+        prev = selected[-1]
+        areas = np.abs(
+            (x_numeric[prev] - next_x) * (y[start:end] - y[prev])
+            - (x_numeric[prev] - x_numeric[start:end]) * (next_y - y[prev])
+        )
+        selected.append(start + int(np.argmax(areas)))
+    selected.append(n - 1)
+    return x[selected], y[selected]
+
+def figure_payload_bytes(fig):
+    """Size of the JSON Plotly sends to the browser for this figure"""
+    return len(fig.to_json().encode('utf-8'))
@@ -0,0 +1,157 @@
+import os
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+import joblib
+import numpy as np
+from config import ML_MODEL_CONFIG
+from instrumentation import span
+
+FEATURE_COLUMNS = ['attendance_risk', 'academic_risk', 'financial_risk',
+                   'attendance_percentage', 'avg_score', 'max_attempts']
+
+# Students are grouped into cohorts by mentor; a cohort without a mentor
+# always falls back to the global model
+COHORT_COLUMN = 'mentor_id'
+GLOBAL_ROUTE = '__global__'
+
+def _train_cohort(cohort_id, features, model_path, global_model_path):
+    """Fit one cohort's model in a worker process.
+
+    Returns (cohort_id, students, cohort accuracy, global accuracy) on the same
+    held-out split, or None when the cohort's labels have a single class. The
+    global model saw part of that split during its own training, so its figure
+    is an optimistic reference.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.model_selection import train_test_split
+    from ml_model import DropoutPredictor
+    from schema_types import model_matrix
+
+    X = model_matrix(features, FEATURE_COLUMNS)
+    y = DropoutPredictor.generate_training_labels(features)
+    if len(np.unique(y)) < 2:
+        return None
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    model = RandomForestClassifier(n_estimators=100, random_state=42)
+    model.fit(X_train, y_train)
+    joblib.dump(model, model_path)
+
+    global_model = joblib.load(global_model_path)
+    cohort_accuracy = float((model.predict(X_test) == y_test).mean())
+    global_accuracy = float((global_model.predict(X_test) == y_test).mean())
+    return cohort_id, len(features), cohort_accuracy, global_accuracy
+
+class CohortModels:
+    """Per-cohort dropout models with the global model as fallback.
+
+    Cohorts with at least `min_students` students and both label classes get
+    their own model, trained in parallel worker processes; everyone else is
+    scored by the global model. The cohort -> model file mapping is kept in
+    the cohort_models table.
+    """
+
+    def __init__(self, db_name="student_database.db", model_dir=None, min_students=None, max_workers=None):
+        self.db_name = db_name
+        # Models live next to their database, so shards with the same mentor ids never share files
+        default_dir = f"{os.path.splitext(db_name)[0]}_cohort_models"
+        self.model_dir = model_dir or ML_MODEL_CONFIG['cohort_model_dir'] or default_dir
+        self.min_students = min_students or ML_MODEL_CONFIG['cohort_min_students']
+        self.max_workers = max_workers or ML_MODEL_CONFIG['cohort_max_workers']
+        self._models = None
+        self.init_table()
+
+    def init_table(self):
+        conn = sqlite3.connect(self.db_name)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS cohort_models (
+                cohort_id TEXT PRIMARY KEY,
+                model_path TEXT NOT NULL,
+                students INTEGER,
+                accuracy REAL,
+                global_accuracy REAL,
+                trained_at TEXT
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def train(self, features=None, global_model_path=None):
+        """Train the global model, then every eligible cohort's model in parallel.
+
+        Returns [(cohort_id, students, cohort accuracy, global accuracy)].
+        """
+        from data_ingestion import DataProcessor
+        from ml_model import DropoutPredictor
+        if features is None:
+            features = DataProcessor(self.db_name).prepare_features()
+        global_model_path = global_model_path or ML_MODEL_CONFIG['model_path']
+
+        # Cohort models are compared against (and fall back to) a global model trained on the same data
+        DropoutPredictor(self.db_name, global_model_path).train_model(features=features)
+
+        os.makedirs(self.model_dir, exist_ok=True)
+        groups = features.groupby(COHORT_COLUMN, observed=True, sort=False)
+        eligible = [(str(cohort_id), frame) for cohort_id, frame in groups if len(frame) >= self.min_students]
+        print(f"Training {len(eligible)} cohort models ({groups.ngroups - len(eligible)} small cohorts use the global model)")
+
+        results = []
+        with span('model.fit_cohorts') as fields:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {
+                    pool.submit(_train_cohort, cohort_id, frame, self._model_path(cohort_id), global_model_path): cohort_id
+                    for cohort_id, frame in eligible
+                }
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"❌ Cohort {futures[future]} failed to train: {e}")
+                        continue
+                    if result is None:
+                        print(f"⏭️  Cohort {futures[future]}: single-class labels, using the global model")
+                        continue
+                    results.append(result)
+            fields['rows'] = sum(r[1] for r in results)
+
+        trained_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn = sqlite3.connect(self.db_name)
+        with conn:
+            conn.execute("DELETE FROM cohort_models")
+            conn.executemany('''
+                INSERT INTO cohort_models (cohort_id, model_path, students, accuracy, global_accuracy, trained_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', [(c, self._model_path(c), n, acc, global_acc, trained_at) for c, n, acc, global_acc in results])
+        conn.close()
+        self._models = None
+        return sorted(results)
+
+    def _model_path(self, cohort_id):
+        return os.path.join(self.model_dir, f"cohort_{cohort_id}.pkl")
+
+    def load(self):
+        """{cohort_id: model} for every trained cohort, loaded once and reused"""
+        if self._models is None:
+            conn = sqlite3.connect(self.db_name)
+            rows = conn.execute("SELECT cohort_id, model_path FROM cohort_models").fetchall()
+            conn.close()
+            self._models = {cohort_id: joblib.load(path) for cohort_id, path in rows if os.path.exists(path)}
+        return self._models
+
+    def score(self, features, X, global_model):
+        """(predictions, probabilities) with one predict call per cohort group.
+
+        Rows are grouped by cohort, each group is scored in one batch by its
+        model, and the results are written back in the original row order.
+        """
+        models = self.load()
+        probabilities = np.zeros(len(X), dtype=np.float64)
+        cohorts = features[COHORT_COLUMN].astype(object)
+        route = cohorts.where(cohorts.isin(list(models)), GLOBAL_ROUTE)
+        for cohort_id, index in route.groupby(route, sort=False).indices.items():
+            model = models.get(cohort_id, global_model)
+            classes = list(model.classes_)
+            if 1 in classes:
+                probabilities[index] = model.predict_proba(X.iloc[index])[:, classes.index(1)]
+        # Same decision rule as RandomForestClassifier.predict for two classes
+        return (probabilities > 0.5).astype(np.int8), probabilities
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from config import PIPELINE_CONFIG
+from schema_types import FEATURE_SCHEMA
+
+def _holds_integers(values):
+    """False if an object chunk has a float with a fractional part (or NaN).
+
+    NumPy would truncate such values when they are assigned into an integer
+    buffer, instead of raising like it does for None or strings.
+    """
+    types = set(map(type, values))
+    if float not in types:
+        return True
+    floats = np.array([value for value in values if type(value) is float], dtype=np.float64)
+    return bool(np.all(np.mod(floats, 1) == 0))
+
+class _ArrayColumn:
+    """Preallocated buffer for one result column, grown by doubling.
+
+    Values that do not fit the declared dtype widen the buffer: integers that
+    hit NULL, fractional floats or overflow become floats, and anything
+    non-numeric falls back to Python objects.
+    """
+
+    def __init__(self, dtype, capacity):
+        self.buffer = np.empty(capacity, dtype=dtype)
+        self.infer = self.buffer.dtype == object
+
+    def extend(self, values, start):
+        end = start + len(values)
+        if end > len(self.buffer):
+            grown = np.empty(max(end, 2 * len(self.buffer)), dtype=self.buffer.dtype)
+            grown[:start] = self.buffer[:start]
+            self.buffer = grown
+        if self.buffer.dtype.kind in 'iub' and not _holds_integers(values):
+            self.buffer = self.buffer.astype(self._wider())
+        while True:
+            try:
+                self.buffer[start:end] = values
+                return
+            except (TypeError, OverflowError, ValueError):
+                self.buffer = self.buffer.astype(self._wider())
+                self.infer = self.buffer.dtype == object
+
+    def _wider(self):
+        if self.buffer.dtype.kind in 'iub':
+            return np.float32 if PIPELINE_CONFIG['compact_dtypes'] else np.float64
+        return object
+
+    def finish(self, rows):
+        values = self.buffer[:rows]
+        if self.infer:
+            # Undeclared columns get the same inference read_sql_query applies
+            return pd.Series(values, copy=False).infer_objects()
+        return values
+
+class _DictionaryColumn:
+    """Dictionary-encoded string column: int32 codes plus one copy of each distinct value.
+
+    Each fetched chunk is factorized on its own and its distinct values are
+    matched against the column-wide dictionary, which only grows when a chunk
+    brings values it has not seen.
+    """
+
+    def __init__(self, dtype, capacity):
+        self.dtype = dtype
+        self.codes = np.empty(capacity, dtype=np.int32)
+        self.dictionary = pd.Index([], dtype=object)
+
+    def extend(self, values, start):
+        end = start + len(values)
+        if end > len(self.codes):
+            grown = np.empty(max(end, 2 * len(self.codes)), dtype=np.int32)
+            grown[:start] = self.codes[:start]
+            self.codes = grown
+        chunk_codes, uniques = pd.factorize(values)
+        positions = self.dictionary.get_indexer(uniques)
+        new = positions == -1
+        if new.any():
+            positions[new] = np.arange(len(self.dictionary), len(self.dictionary) + new.sum())
+            self.dictionary = self.dictionary.append(pd.Index(uniques[new], dtype=object))
+        # One trailing -1 so NULLs (code -1) stay missing after the remap
+        remap = np.append(positions, -1).astype(np.int32)
+        self.codes[start:end] = remap[chunk_codes]
+
+    def finish(self, rows):
+        codes = self.codes[:rows]
+        categories = self.dictionary.to_numpy()
+        if isinstance(self.dtype, pd.CategoricalDtype):
+            return pd.Categorical.from_codes(codes, categories).astype(self.dtype)
+        if len(categories) > rows // 2:
+            # Same rule as apply_schema: mostly unique values stay plain strings
+            return np.append(categories, None)[codes]
+        try:
+            # Lexical category order, so sorting matches the plain-string frame
+            order = np.argsort(categories)
+        except TypeError:
+            return pd.Categorical.from_codes(codes, categories)
+        rank = np.empty(len(order) + 1, dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        rank[-1] = -1
+        return pd.Categorical.from_codes(rank[codes], categories[order], validate=False)
+
+def _column_for(name, schema, capacity):
+    dtype = schema.get(name, object)
+    if dtype == 'roster':
+        dtype = 'category'
+    if not PIPELINE_CONFIG['compact_dtypes']:
+        # Full-width numerics and plain strings, as read_sql_query would build them
+        if isinstance(dtype, str) and dtype.startswith('float'):
+            dtype = np.float64
+        elif isinstance(dtype, str) and dtype.startswith('int'):
+            dtype = np.int64
+        else:
+            dtype = object
+    if isinstance(dtype, pd.CategoricalDtype) or dtype == 'category':
+        return _DictionaryColumn(dtype, capacity)
+    return _ArrayColumn(dtype, capacity)
+
+def read_frame(conn, query, params=(), schema=FEATURE_SCHEMA, chunk_rows=None):
+    """Run query and build a DataFrame column by column, replacing pd.read_sql_query.
+
+    Rows are fetched `chunk_rows` at a time, transposed, and copied straight
+    into per-column NumPy buffers typed from `schema` (the same declarations
+    apply_schema uses); 'category' columns are dictionary encoded while they
+    are read. Columns the schema does not name are inferred as
+    read_sql_query would.
+    """
+    chunk_rows = chunk_rows or PIPELINE_CONFIG['fetch_chunk_rows']
+    cursor = conn.execute(query, params)
+    names = [description[0] for description in cursor.description]
+    columns = [_column_for(name, schema, chunk_rows) for name in names]
+    rows = 0
+    while True:
+        batch = cursor.fetchmany(chunk_rows)
+        if not batch:
+            break
+        # Transpose in C: one object array per chunk, then one column slice per buffer
+        values = np.array(batch, dtype=object)
+        for position, column in enumerate(columns):
+            column.extend(values[:, position], rows)
+        rows += len(batch)
+    cursor.close()
+    frame = pd.DataFrame({position: column.finish(rows) for position, column in enumerate(columns)})
+    # Positional keys first, so duplicate names from joins survive like in read_sql_query
+    frame.columns = names
+    return frame
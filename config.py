@@ -9,20 +9,107 @@ ML_MODEL_CONFIG = {
     'model_path': 'dropout_model.pkl',
     'retrain_interval_days': 30,
     'risk_threshold_high': 70,
-    'risk_threshold_medium': 40
+    'risk_threshold_medium': 40,
+    'prediction_write_chunk_size': 10000,  # rows per transaction while staging a run
+    'cohort_models': False,  # score each mentor's cohort with its own model (train with `main.py train --cohorts`)
+    'cohort_model_dir': None,  # None: <database name>_cohort_models next to each database
+    'cohort_min_students': 200,  # smaller cohorts are scored by the global model
+    'cohort_max_workers': 4  # training processes
 }
 
 NOTIFICATION_CONFIG = {
     'send_mentor_alerts': True,
     'send_guardian_alerts': True,
     'alert_schedule': 'weekly',  # daily, weekly, monthly
-    'min_risk_score_for_guardian': 70
+    # Days before an unchanged alert for the same student is repeated
+    'cooldown_days': {'daily': 1, 'weekly': 7, 'monthly': 30},
+    'min_risk_score_for_guardian': 70,
+    'mentor_email_format': '{mentor_id}@institute.edu',
+    # Outbox dispatcher settings
+    'dispatch_batch_size': 100,
+    'max_send_attempts': 5,
+    'retry_base_seconds': 60,  # doubles after every failed attempt
+    'send_rate_per_minute': 60,
+    'claim_timeout_seconds': 600
+}
+
+PIPELINE_CONFIG = {
+    'poll_interval_seconds': 60,
+    'predict_interval_hours': 24,
+    'dispatch_interval_minutes': 5,
+    'max_workers': 2,
+    'compact_dtypes': True,  # categorical strings and downcast numerics in pipeline DataFrames
+    'fetch_chunk_rows': 65536  # cursor rows per fetchmany() in the columnar reader
+}
+
+SHARD_CONFIG = {
+    'catalog_db': 'shard_catalog.db',  # institution -> database file mapping
+    'shard_dir': 'shards',  # default location for new shard databases and models
+    'max_workers': 4,  # worker processes (and dashboard query threads) across shards
+    'global_sample_per_shard': 5000,  # students sampled from each shard for the global model
+    'global_model_path': 'dropout_model_global.pkl'
+}
+
+API_CONFIG = {
+    'host': '127.0.0.1',
+    'port': 8000,
+    'worker_threads': 8,  # bounded pool for blocking SQLite and model calls
+    'pool_size': 8,  # pooled read-only connections
+    'response_cache_entries': 10000,
+    'run_probe_seconds': 1.0,  # how long a current-run lookup is reused for ETag checks
+    'max_list_limit': 500
+}
+
+INGESTION_CONFIG = {
+    'flush_interval_seconds': 5,  # micro-batch rescoring cadence for recorded events
+    'flush_max_events': 200,  # flush early once this many events are pending
+    'summary_rebuild_seconds': 300  # full overview summary rebuild; flushes in between apply deltas
+}
+
+RETENTION_CONFIG = {
+    # Days of raw rows kept per table; older rows are folded into monthly summaries
+    'keep_days': {
+        'attendance': 365,
+        'test_scores': 730,
+        'risk_assessment': 180,
+        'notifications': 180
+    },
+    'batch_size': 5000,  # rows folded and deleted per transaction
+    'vacuum_pages_per_step': 1000,
+    'interval_days': 7  # scheduler cadence for the retention stage
+}
+
+SIMULATION_CONFIG = {
+    # Counterfactual targets tried for every student; targets below the current value are skipped
+    'attendance_targets': [75, 80, 85, 90, 95, 100],  # attendance %
+    'score_targets': [60, 70, 80, 90],  # average test score
+    # Effort of clearing the fee, in the same units as one attendance or score point
+    'fee_clear_cost': 10
+}
+
+OBSERVABILITY_CONFIG = {
+    'log_path': 'logs/pipeline.jsonl',  # one JSON line per finished span; None disables
+    'log_max_bytes': 20 * 1024 * 1024,  # roll the span log over at this size; None keeps one growing file
+    'log_backups': 3,  # rolled-over span logs kept as pipeline.jsonl.1 .. .3
+    'metrics_path': 'metrics/pipeline.prom',  # Prometheus text written after each CLI command
+    'metrics_port': None,  # serve /metrics from the scheduler on this port
+    'profile_dir': 'profiles'  # cProfile dumps from main.py --profile
 }
 
 DASHBOARD_CONFIG = {
     'refresh_interval': 300,  # seconds
+    'query_cache_entries': 512,  # results kept by the shared dashboard query cache (LRU)
     'max_students_display': 50,
-    'enable_export': True
+    'max_chart_points': 2000,  # cap on points shipped to the browser per chart
+    'webgl_threshold': 1000,  # switch scatter traces to WebGL above this many points
+    'enable_export': True,
+    'export_chunk_size': 5000,  # rows fetched and encoded per export chunk
+    'export_spool_bytes': 32 * 1024 * 1024,  # dashboard downloads spill to disk past this size
+    'search_page_size': 25,
+    'detail_cache_size': 256,  # students kept in the detail-page LRU
+    'detail_attendance_days': 30,
+    'detail_test_days': 365,
+    'search_use_fts': False  # FTS5 trigram index for substring search
 }
 # Add this dictionary to your config.py file
 EMAIL_CONFIG = {
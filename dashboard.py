@@ -1,30 +1,79 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sqlite3
 import plotly.graph_objects as go
 import plotly.express as px
 import sys
 import os
+import time
 
 # Ensure the auth.py file can be imported
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from auth import login_page
+from dashboard_cache import QueryCache
+from chart_data import load_point_sample, scatter_trace, downsample_series
+from config import DASHBOARD_CONFIG, ML_MODEL_CONFIG
+from date_utils import today_day
+from student_search import StudentSearch
+from risk_history import RiskHistory
+from prediction_runs import CURRENT_RUN_SQL
+from schema_types import RISK_SCHEMA
+from columnar_reader import read_frame
+from data_export import DataExporter, EXPORT_DATASETS, EXPORT_FORMATS
+from student_detail_loader import StudentDetailLoader
+from shards import ShardQuery
+from intervention_simulator import InterventionSimulator
+from data_ingestion import DataProcessor
+from risk_summary import RiskSummaryWriter, summary_from_rows, GLOBAL_SCOPE, HISTOGRAM_BINS, RISK_FACTORS
+
+@st.cache_resource
+def get_query_cache(db_name):
+    """One QueryCache per database, shared across all sessions"""
+    return QueryCache(db_name)
+
+@st.cache_resource
+def get_student_search(db_name):
+    """Search helper (and its index setup) created once per process"""
+    return StudentSearch(db_name)
+
+@st.cache_resource
+def get_detail_loader(db_name):
+    """Detail loader whose connection pool and LRU are shared across sessions"""
+    return StudentDetailLoader(db_name)
+
+@st.cache_resource
+def get_shard_query():
+    """Cross-campus query helper built from the shard catalog"""
+    return ShardQuery()
+
+@st.cache_resource
+def get_simulator(db_name):
+    """Simulator whose loaded model is reused across sessions"""
+    return InterventionSimulator(db_name)
 
 class StudentDashboard:
-    def __init__(self, db_name="student_database.db"):
+    def __init__(self, db_name="student_database.db", cache=None):
         self.db_name = db_name
+        self.cache = cache
+        self.detail_metrics = {}
     
     def load_risk_data(self):
+        if self.cache is None:
+            return self._query_risk_data()
+        return self.cache.get('risk_data', None, self._query_risk_data)
+    
+    def _query_risk_data(self):
         try:
             conn = sqlite3.connect(self.db_name)
-            query = '''
+            query = f'''
                 SELECT r.*, s.name, s.mentor_id
                 FROM risk_assessment r
                 JOIN students s ON r.student_id = s.student_id
-                WHERE r.assessment_date = (SELECT MAX(assessment_date) FROM risk_assessment)
+                WHERE r.run_id = {CURRENT_RUN_SQL}
                 ORDER BY r.overall_risk_score DESC
             '''
-            df = pd.read_sql_query(query, conn)
+            df = read_frame(conn, query, schema=RISK_SCHEMA)
             conn.close()
             return df
         except Exception as e:
@@ -33,88 +82,237 @@ class StudentDashboard:
 
     def load_student_details(self, student_id):
         try:
-            conn = sqlite3.connect(self.db_name)
-            student_info = pd.read_sql_query("SELECT * FROM students WHERE student_id = ?", conn, params=[student_id])
-            risk_info = pd.read_sql_query("SELECT * FROM risk_assessment WHERE student_id = ? ORDER BY assessment_date DESC LIMIT 1", conn, params=[student_id])
-            attendance_data = pd.read_sql_query("SELECT date, subject, present FROM attendance WHERE student_id = ? AND date >= date('now', '-30 days')", conn, params=[student_id])
-            test_data = pd.read_sql_query("SELECT test_date, subject, score FROM test_scores WHERE student_id = ? ORDER BY test_date DESC", conn, params=[student_id])
-            
-            # --- ADDED: Query for fee payment data ---
-            fee_data = pd.read_sql_query("SELECT status, amount_due, amount_paid, due_date FROM fee_payments WHERE student_id = ?", conn, params=[student_id])
-
-            conn.close()
-            return {
-                'student_info': student_info, 
-                'risk_info': risk_info, 
-                'attendance_data': attendance_data, 
-                'test_data': test_data,
-                'fee_data': fee_data # Add fee data to the output
-            }
+            student_data, self.detail_metrics = get_detail_loader(self.db_name).load(student_id)
+            return student_data
         except Exception as e:
             st.error(f"Error loading student details: {e}")
             return {}
 
+    def load_summary(self):
+        """Latest precomputed overview aggregates, computed from raw rows only if none exist"""
+        def query():
+            summary = RiskSummaryWriter(self.db_name).load()
+            if summary.empty:
+                risk_data = self._query_risk_data()
+                if not risk_data.empty:
+                    summary = summary_from_rows(RiskSummaryWriter(self.db_name).compute(risk_data))
+            return summary
+        
+        if self.cache is None:
+            return query()
+        return self.cache.get('risk_summary', None, query)
+    
+    def load_point_sample(self):
+        """Reservoir sample of the latest batch's risk factors for point overlays"""
+        query = lambda: load_point_sample(self.db_name, RISK_FACTORS)
+        if self.cache is None:
+            return query()
+        return self.cache.get('point_sample', None, query)
+    
+    def load_high_risk_students(self, limit=10):
+        def query():
+            try:
+                conn = sqlite3.connect(self.db_name)
+                df = read_frame(conn, f'''
+                    SELECT r.student_id, s.name, r.overall_risk_score, r.reasons, s.mentor_id
+                    FROM risk_assessment r
+                    JOIN students s ON r.student_id = s.student_id
+                    WHERE r.run_id = {CURRENT_RUN_SQL}
+                    AND r.risk_level = 'High'
+                    ORDER BY r.overall_risk_score DESC
+                    LIMIT ?
+                ''', [limit], schema=RISK_SCHEMA)
+                conn.close()
+                return df
+            except Exception as e:
+                st.error(f"Error loading high-risk students: {e}")
+                return pd.DataFrame()
+        
+        if self.cache is None:
+            return query()
+        return self.cache.get('high_risk_students', limit, query)
+
     def create_overview_dashboard(self):
         st.title("🎓 Mentor Dashboard: Full Overview")
         st.markdown("---")
         
-        risk_data = self.load_risk_data()
-        if risk_data.empty:
+        summary = self.load_summary()
+        if summary.empty:
             st.warning("No risk assessment data found.")
             return
         
+        overall = summary[summary['mentor_id'] == GLOBAL_SCOPE]
+        metric = lambda name: overall[overall['metric'] == name].set_index('bucket')['value']
+        level_counts = metric('level_count')
+        
         col1, col2, col3, col4 = st.columns(4)
-        total_students = len(risk_data)
-        at_risk = len(risk_data[risk_data['risk_level'] == 'High'])
-        medium_risk = len(risk_data[risk_data['risk_level'] == 'Medium'])
-        low_risk = len(risk_data[risk_data['risk_level'] == 'Low'])
-        
-        with col1: st.metric("Total Students", total_students)
-        with col2: st.metric("High Risk", at_risk)
-        with col3: st.metric("Medium Risk", medium_risk)
-        with col4: st.metric("Low Risk", low_risk)
+        with col1: st.metric("Total Students", int(metric('total').get('students', 0)))
+        with col2: st.metric("High Risk", int(level_counts.get('High', 0)))
+        with col3: st.metric("Medium Risk", int(level_counts.get('Medium', 0)))
+        with col4: st.metric("Low Risk", int(level_counts.get('Low', 0)))
         st.markdown("---")
         
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("📊 Risk Distribution")
-            risk_counts = risk_data['risk_level'].value_counts()
-            fig_pie = px.pie(values=risk_counts.values, names=risk_counts.index, title='Student Risk Distribution', color_discrete_map={'High':'red', 'Medium':'orange', 'Low':'green'})
+            level_counts = level_counts[level_counts > 0]
+            fig_pie = px.pie(values=level_counts.values, names=level_counts.index, title='Student Risk Distribution', color=level_counts.index, color_discrete_map={'High':'red', 'Medium':'orange', 'Low':'green'})
             st.plotly_chart(fig_pie, use_container_width=True)
         with col2:
             st.subheader("📈 Risk Scores Distribution")
-            fig_hist = px.histogram(risk_data, x='overall_risk_score', nbins=20, title='Distribution of Risk Scores')
+            hist = metric('score_hist').sort_index()
+            bin_width = HISTOGRAM_BINS[1] - HISTOGRAM_BINS[0]
+            fig_hist = go.Figure(go.Bar(x=HISTOGRAM_BINS[:-1] + bin_width / 2, y=hist.values, width=bin_width))
+            fig_hist.update_layout(title='Distribution of Risk Scores', xaxis_title='overall_risk_score', yaxis_title='count', bargap=0)
             st.plotly_chart(fig_hist, use_container_width=True)
         st.markdown("---")
         
         # --- ADDED: Risk Factor Analysis Graphs (including Financial) ---
         st.subheader("🔍 Risk Factors Analysis")
-        c1, c2, c3 = st.columns(3)
-        with c1:
-            fig_att = px.box(risk_data, y='attendance_risk', title='Attendance Risk', points="all")
-            st.plotly_chart(fig_att, use_container_width=True)
-        with c2:
-            fig_acad = px.box(risk_data, y='academic_risk', title='Academic Risk', points="all")
-            st.plotly_chart(fig_acad, use_container_width=True)
-        with c3:
-            fig_fin = px.box(risk_data, y='financial_risk', title='Financial Risk', points="all")
-            st.plotly_chart(fig_fin, use_container_width=True)
+        show_points = st.checkbox(f"Show sampled students (up to {DASHBOARD_CONFIG['max_chart_points']:,})")
+        points = self.load_point_sample() if show_points else None
+        for column, factor, title in zip(st.columns(3), RISK_FACTORS, ['Attendance Risk', 'Academic Risk', 'Financial Risk']):
+            stats = metric(f"box_{factor}")
+            if stats.empty:
+                continue
+            with column:
+                fig_box = go.Figure(go.Box(
+                    name=factor, q1=[stats['q1']], median=[stats['median']], q3=[stats['q3']],
+                    lowerfence=[stats['lowerfence']], upperfence=[stats['upperfence']], mean=[stats['mean']]
+                ))
+                if points is not None and len(points[factor]):
+                    jitter = np.random.default_rng(0).uniform(-0.3, 0.3, len(points[factor]))
+                    fig_box.add_trace(scatter_trace(
+                        x=jitter, y=points[factor], mode='markers', marker={'size': 3, 'opacity': 0.4}, xaxis='x2'
+                    ))
+                    fig_box.update_layout(xaxis2={'overlaying': 'x', 'visible': False, 'range': [-1, 1]})
+                fig_box.update_layout(title=title, showlegend=False)
+                st.plotly_chart(fig_box, use_container_width=True)
+        st.markdown("---")
+
+        st.subheader("👥 Mentor Breakdown")
+        by_mentor = summary[(summary['mentor_id'] != GLOBAL_SCOPE) & summary['metric'].isin(['level_count', 'mean_score', 'total'])]
+        if not by_mentor.empty:
+            breakdown = by_mentor.pivot_table(index='mentor_id', columns='bucket', values='value', aggfunc='sum').fillna(0)
+            breakdown = breakdown.rename(columns={'students': 'Total', 'overall': 'Avg Risk Score'})
+            st.dataframe(breakdown.reindex(columns=['Total', 'High', 'Medium', 'Low', 'Avg Risk Score']).round(1), use_container_width=True)
         st.markdown("---")
 
         st.subheader("🚨 High-Risk Students")
-        high_risk_df = risk_data[risk_data['risk_level'] == 'High'][['student_id', 'name', 'overall_risk_score', 'reasons', 'mentor_id']].head(10)
-        st.dataframe(high_risk_df, use_container_width=True)
+        st.dataframe(self.load_high_risk_students(10), use_container_width=True)
+
+    def create_student_picker(self, mentor_id=None, key="picker", container=st.sidebar):
+        """Searchable, paginated student picker backed by StudentSearch"""
+        search = get_student_search(self.db_name)
+        query = container.text_input("Search by ID or name", key=f"{key}_query")
+        
+        # Keyset cursors for every page visited so far, reset when the query changes
+        state_key = f"{key}_pages"
+        if st.session_state.get(f"{key}_last_query") != query:
+            st.session_state[state_key] = [None]
+            st.session_state[f"{key}_last_query"] = query
+        pages = st.session_state[state_key]
+        
+        start = time.perf_counter()
+        rows, next_cursor = search.search(query, mentor_id=mentor_id, cursor=pages[-1])
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        if not rows:
+            container.info("No matching students.")
+            return None
+        
+        labels = {student_id: f"{student_id} - {name}" for student_id, name, _ in rows}
+        selected = container.selectbox("Choose a student:", list(labels), format_func=labels.get, key=f"{key}_select")
+        
+        prev_col, next_col = container.columns(2)
+        if prev_col.button("◀ Prev", key=f"{key}_prev", disabled=len(pages) == 1):
+            pages.pop()
+            st.rerun()
+        if next_col.button("Next ▶", key=f"{key}_next", disabled=next_cursor is None):
+            pages.append(next_cursor)
+            st.rerun()
+        container.caption(f"Page {len(pages)} · {len(rows)} results · {elapsed_ms:.1f} ms")
+        return selected
 
     def create_admin_search_view(self):
         st.title("🎓 Admin Portal: Student Search")
-        st.info("Enter a student's unique ID to view their detailed report.")
-        with st.form("search_form"):
-            student_id_input = st.text_input("Enter Student ID (e.g., STU1001)").strip().upper()
-            submitted = st.form_submit_button("🔍 Search")
-
-        if submitted and student_id_input:
+        st.info("Search by student ID or name prefix to view a detailed report.")
+        selected_student = self.create_student_picker(key="admin_picker", container=st)
+        if selected_student:
             st.markdown("---")
-            self.create_student_detail_view(student_id_input)
+            self.create_student_detail_view(selected_student)
+
+    def create_export_view(self):
+        st.title("📤 Admin Portal: Data Export")
+        if not DASHBOARD_CONFIG['enable_export']:
+            st.info("Data export is disabled in the configuration.")
+            return
+        
+        dataset = st.selectbox("Dataset", EXPORT_DATASETS)
+        fmt = st.selectbox("Format", list(EXPORT_FORMATS))
+        mime, extension = EXPORT_FORMATS[fmt]
+        exporter = DataExporter(self.db_name)
+        
+        # The export only runs when the button is clicked, streaming into a spooled temp file
+        st.download_button(
+            "⬇️ Download", data=lambda: exporter.export_to_spooled_file(dataset, fmt),
+            file_name=f"{dataset}{extension}", mime=mime
+        )
+
+    def create_cache_admin_panel(self):
+        st.title("⚙️ Admin Portal: Cache Statistics")
+        if self.cache is None:
+            st.info("Query caching is disabled.")
+            return
+        
+        stats, entries = self.cache.get_stats()
+        c1, c2 = st.columns(2)
+        c1.metric("Cached Entries", entries)
+        c2.metric("TTL (seconds)", self.cache.ttl_seconds)
+        if stats:
+            stats_df = pd.DataFrame(stats)
+            stats_df['hit_rate'] = (stats_df['hit_rate'] * 100).round(1)
+            st.dataframe(stats_df.rename(columns={'hit_rate': 'hit_rate_%'}), use_container_width=True)
+        else:
+            st.info("No queries have been served yet.")
+        
+        if st.button("🧹 Clear Cache"):
+            self.cache.clear()
+            st.success("Cache cleared.")
+
+    def create_campus_view(self):
+        st.title("🏫 Admin Portal: All Campuses")
+        shard_query = get_shard_query()
+        if not shard_query.catalog.list_shards():
+            st.info("No campus shards registered. Add one with: python main.py shards add INSTITUTION_ID")
+            return
+        
+        # Shards change independently of this database, so results expire on the TTL alone
+        load = lambda name, query: query() if self.cache is None else self.cache.get(name, None, query)
+        levels = load('campus_levels', shard_query.risk_level_counts)
+        if levels.empty:
+            st.warning("No risk assessments found in any campus.")
+            return
+        
+        by_campus = levels.pivot_table(index='institution_id', columns='risk_level',
+                                       values='students', aggfunc='sum', fill_value=0)
+        totals = by_campus.sum()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1: st.metric("Campuses", len(by_campus))
+        with col2: st.metric("High Risk", int(totals.get('High', 0)))
+        with col3: st.metric("Medium Risk", int(totals.get('Medium', 0)))
+        with col4: st.metric("Low Risk", int(totals.get('Low', 0)))
+        
+        fig = go.Figure([
+            go.Bar(name=level, x=by_campus.index, y=by_campus[level])
+            for level in ['High', 'Medium', 'Low'] if level in by_campus.columns
+        ])
+        fig.update_layout(barmode='stack', title="Risk Levels by Campus")
+        st.plotly_chart(fig, use_container_width=True)
+        
+        st.subheader("Highest-Risk Students Across Campuses")
+        top = load('campus_top_high_risk', lambda: shard_query.top_high_risk(DASHBOARD_CONFIG['max_students_display']))
+        st.dataframe(top, use_container_width=True)
 
     def create_student_detail_view(self, student_id):
         student_data = self.load_student_details(student_id)
@@ -124,6 +322,10 @@ class StudentDashboard:
         
         student_info = student_data['student_info'].iloc[0]
         st.subheader(f"📋 Student Details: {student_info['name']}")
+        if self.detail_metrics:
+            source = "cache" if self.detail_metrics['cache_hit'] else "database"
+            st.caption(f"Loaded from {source} in {self.detail_metrics['latency_ms']:.1f} ms · "
+                       f"{self.detail_metrics['bytes_fetched'] / 1024:.1f} KB fetched")
         
         if not student_data['risk_info'].empty:
             risk_info = student_data['risk_info'].iloc[0]
@@ -150,34 +352,130 @@ class StudentDashboard:
                 st.metric("Financial Risk", f"{risk_info['financial_risk']:.1f}%")
         
         # --- ADDED: Financial Status Section ---
-        if not student_data['fee_data'].empty:
+        fee_balance = student_data.get('fee_balance', pd.DataFrame())
+        if not fee_balance.empty:
             st.markdown("---")
             st.subheader("💰 Financial Status")
-            fee_info = student_data['fee_data'].iloc[0]
-            pending_amount = fee_info['amount_due'] - fee_info['amount_paid']
+            ledger = fee_balance.iloc[0]
+            overdue = pd.notna(ledger['oldest_open_due_day']) and ledger['oldest_open_due_day'] < today_day()
+            status = "Overdue" if overdue else ("Pending" if ledger['balance'] > 0 else "Paid")
             
-            c1, c2, c3 = st.columns(3)
-            c1.metric("Fee Status", fee_info['status'])
-            c2.metric("Amount Due", f"₹{fee_info['amount_due']:,.2f}")
-            if pending_amount > 0:
-                c3.metric("Pending Amount", f"₹{pending_amount:,.2f}", delta_color="inverse")
+            c1, c2, c3, c4 = st.columns(4)
+            c1.metric("Fee Status", status)
+            c2.metric("Total Charged", f"₹{ledger['total_charged']:,.2f}")
+            c3.metric("Total Paid", f"₹{ledger['total_paid']:,.2f}")
+            if ledger['balance'] > 0:
+                c4.metric("Outstanding Balance", f"₹{ledger['balance']:,.2f}", delta_color="inverse")
             else:
-                c3.metric("Pending Amount", f"₹{pending_amount:,.2f}")
+                c4.metric("Outstanding Balance", f"₹{ledger['balance']:,.2f}")
+            if overdue:
+                days_overdue = today_day() - int(ledger['oldest_open_due_day'])
+                st.warning(f"Oldest unpaid instalment was due on {ledger['oldest_open_due_date']} "
+                           f"({days_overdue} days overdue) · {int(ledger['open_instalments'])} open instalments")
+            if len(student_data['fee_data']) > 1:
+                with st.expander(f"Instalments ({len(student_data['fee_data'])})"):
+                    st.dataframe(student_data['fee_data'], use_container_width=True)
 
         if not student_data['attendance_data'].empty:
             st.markdown("---")
             st.subheader("📅 Recent Attendance")
-            fig_att = px.line(student_data['attendance_data'].groupby('date')['present'].mean().reset_index(), x='date', y='present', markers=True)
+            daily = student_data['attendance_data'].groupby('date')['present'].mean().reset_index()
+            dates, present = downsample_series(daily['date'].to_numpy(), daily['present'].to_numpy())
+            fig_att = go.Figure(scatter_trace(x=dates, y=present, mode='lines+markers'))
             fig_att.update_layout(yaxis_title="Attendance %", yaxis_range=[0, 1], yaxis_tickformat=".0%")
             st.plotly_chart(fig_att, use_container_width=True)
 
         if not student_data['test_data'].empty:
             st.markdown("---")
             st.subheader("📝 Test Performance")
-            fig_scores = px.line(student_data['test_data'], x='test_date', y='score', color='subject', markers=True)
+            fig_scores = go.Figure()
+            for subject, tests in student_data['test_data'].sort_values('test_date').groupby('subject'):
+                dates, scores = downsample_series(tests['test_date'].to_numpy(), tests['score'].to_numpy())
+                fig_scores.add_trace(scatter_trace(x=dates, y=scores, mode='lines+markers', name=subject))
             fig_scores.update_layout(yaxis_title="Score", yaxis_range=[0, 100])
             st.plotly_chart(fig_scores, use_container_width=True)
 
+    def create_trends_view(self, mentor_id=None):
+        st.title("📈 Risk Trends")
+        history = RiskHistory(self.db_name)
+        granularity = st.radio("Granularity", ["Daily", "Weekly", "Monthly"], index=1, horizontal=True)
+        code = granularity[0]
+        
+        if mentor_id is None:
+            mentor_id = st.text_input("Mentor ID (e.g., MENT1)").strip().upper()
+        if mentor_id:
+            st.subheader(f"👥 Cohort Trend: {mentor_id}")
+            cohort = history.mentor_trend(mentor_id, code)
+            if cohort.empty:
+                st.info("No risk history recorded for this cohort yet.")
+            else:
+                fig_cohort = go.Figure()
+                fig_cohort.add_trace(scatter_trace(x=cohort['date'], y=cohort['avg_score'], mode='lines+markers', name='Average risk'))
+                fig_cohort.add_trace(scatter_trace(x=cohort['date'], y=cohort['max_score'], mode='lines', name='Highest risk', line={'dash': 'dot'}))
+                fig_cohort.update_layout(yaxis_title="Risk Score", yaxis_range=[0, 100])
+                st.plotly_chart(fig_cohort, use_container_width=True)
+        
+        st.markdown("---")
+        st.subheader("👤 Student Trend")
+        student_id = self.create_student_picker(mentor_id=mentor_id or None, key="trend_picker", container=st)
+        if student_id:
+            trend = history.student_trend(student_id, code)
+            if trend.empty:
+                st.info("No risk history recorded for this student yet.")
+            else:
+                y_column = 'score' if code == 'D' else 'avg_score'
+                dates, scores = downsample_series(trend['date'].to_numpy(), trend[y_column].to_numpy())
+                fig_student = go.Figure(scatter_trace(x=dates, y=scores, mode='lines+markers'))
+                fig_student.update_layout(yaxis_title="Risk Score", yaxis_range=[0, 100])
+                st.plotly_chart(fig_student, use_container_width=True)
+
+    def create_what_if_view(self, mentor_id=None):
+        st.title("🧪 What-If Simulator")
+        simulator = get_simulator(self.db_name)
+        threshold = ML_MODEL_CONFIG['risk_threshold_medium']
+        
+        if mentor_id is None:
+            mentor_id = st.text_input("Mentor ID (e.g., MENT1)", key="what_if_mentor").strip().upper()
+        if mentor_id:
+            st.subheader(f"👥 Smallest Interventions: {mentor_id}")
+            start = time.perf_counter()
+            plans = simulator.simulate_mentor(mentor_id)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if plans.empty:
+                st.info("No students found for this mentor.")
+            else:
+                at_risk = plans[plans['current_score'] >= threshold]
+                col1, col2, col3 = st.columns(3)
+                col1.metric("Students At Risk", len(at_risk))
+                col2.metric("Can Drop Below Medium", int(at_risk['reachable'].sum()))
+                col3.metric("Students Simulated", len(plans))
+                st.dataframe(at_risk.round(1), use_container_width=True)
+                st.caption(f"{len(plans)} students simulated in {elapsed_ms:.0f} ms")
+        
+        st.markdown("---")
+        st.subheader("👤 Custom Scenario")
+        student_id = self.create_student_picker(mentor_id=mentor_id or None, key="what_if_picker", container=st)
+        if not student_id:
+            return
+        features = DataProcessor(self.db_name).prepare_features([student_id])
+        if features.empty:
+            st.error(f"No data found for Student ID: {student_id}")
+            return
+        row = features.iloc[0]
+        col1, col2 = st.columns(2)
+        attendance = col1.slider("Attendance %", 0.0, 100.0, float(row['attendance_percentage']), 1.0)
+        avg_score = col2.slider("Average score", 0.0, 100.0, float(row['avg_score']), 1.0)
+        clear_fee = st.checkbox("Fee cleared", value=False, disabled=not row['financial_risk'] > 0)
+        current, projected = simulator.what_if(features, attendance, avg_score, clear_fee)
+        
+        c1, c2 = st.columns(2)
+        c1.metric("Current Risk", f"{current:.1f}")
+        c2.metric("Projected Risk", f"{projected:.1f}", delta=f"{projected - current:.1f}", delta_color="inverse")
+        if projected < threshold:
+            st.success(f"This scenario brings the student below the medium-risk threshold ({threshold}).")
+        else:
+            st.warning(f"The projected risk is still at or above the medium-risk threshold ({threshold}).")
+
 def run_dashboard():
     st.set_page_config(page_title="Student Dropout Prediction", page_icon="🎓", layout="wide")
 
@@ -185,7 +483,7 @@ def run_dashboard():
         st.stop()
 
     # This code only runs AFTER a successful login
-    dashboard = StudentDashboard()
+    dashboard = StudentDashboard(cache=get_query_cache("student_database.db"))
     
     st.sidebar.title(f"Welcome, {st.session_state.username}!")
     st.sidebar.markdown(f"**Role:** {st.session_state.role.capitalize()}")
@@ -196,24 +494,41 @@ def run_dashboard():
         st.rerun()
 
     if st.session_state.role == 'mentor':
+        if not st.session_state.get('mentor_id'):
+            # Fail closed: without a mentor_id the views below would list every student
+            st.error("This mentor account is not linked to any students. Please contact an administrator.")
+            st.stop()
         st.sidebar.title("Mentor Navigation")
-        page = st.sidebar.radio("Go to", ["📊 Overview Dashboard", "👤 Student Details"])
+        page = st.sidebar.radio("Go to", ["📊 Overview Dashboard", "👤 Student Details", "📈 Risk Trends", "🧪 What-If Simulator"])
         
         if page == "📊 Overview Dashboard":
             dashboard.create_overview_dashboard()
+        elif page == "📈 Risk Trends":
+            dashboard.create_trends_view(st.session_state.get('mentor_id'))
+        elif page == "🧪 What-If Simulator":
+            dashboard.create_what_if_view(st.session_state.get('mentor_id'))
         else:
-            risk_data = dashboard.load_risk_data()
-            if not risk_data.empty:
-                st.sidebar.subheader("Select Student")
-                student_list = risk_data['student_id'].tolist()
-                student_names = risk_data.set_index('student_id')['name'].to_dict()
-                selected_student = st.sidebar.selectbox("Choose a student:", student_list, format_func=lambda x: f"{x} - {student_names.get(x, 'N/A')}")
-                if selected_student:
-                    dashboard.create_student_detail_view(selected_student)
+            st.sidebar.subheader("Select Student")
+            selected_student = dashboard.create_student_picker(mentor_id=st.session_state.get('mentor_id'), key="mentor_picker")
+            if selected_student:
+                dashboard.create_student_detail_view(selected_student)
 
     elif st.session_state.role == 'admin':
         st.sidebar.title("Admin Tools")
-        dashboard.create_admin_search_view()
+        page = st.sidebar.radio("Go to", ["🔍 Student Search", "📈 Risk Trends", "🧪 What-If Simulator", "🏫 All Campuses", "📤 Data Export", "⚙️ Cache Statistics"])
+        
+        if page == "🔍 Student Search":
+            dashboard.create_admin_search_view()
+        elif page == "🏫 All Campuses":
+            dashboard.create_campus_view()
+        elif page == "📈 Risk Trends":
+            dashboard.create_trends_view()
+        elif page == "🧪 What-If Simulator":
+            dashboard.create_what_if_view()
+        elif page == "📤 Data Export":
+            dashboard.create_export_view()
+        else:
+            dashboard.create_cache_admin_panel()
 
 if __name__ == "__main__":
     run_dashboard()
\ No newline at end of file
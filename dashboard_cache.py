@@ -0,0 +1,107 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import DASHBOARD_CONFIG
+from instrumentation import span, increment
+from prediction_runs import CURRENT_VERSION_SQL
+
+class QueryCache:
+    """TTL cache for dashboard loaders, shared by every Streamlit session.
+
+    Entries expire after `ttl_seconds` or as soon as the data version moves
+    (a new assessment batch was written), whichever comes first. Hit, miss and
+    load-time statistics are kept per query name for the admin panel. At
+    most `max_entries` results are kept; the least recently used go first.
+    """
+
+    def __init__(self, db_name="student_database.db", ttl_seconds=None, max_entries=None):
+        self.db_name = db_name
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else DASHBOARD_CONFIG['refresh_interval']
+        self.max_entries = max_entries or DASHBOARD_CONFIG['query_cache_entries']
+        self._entries = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def data_version(self):
+        """Cheap probe that changes whenever assessments are published or rescored"""
+        try:
+            conn = sqlite3.connect(self.db_name)
+            row = conn.execute(CURRENT_VERSION_SQL).fetchone()
+            conn.close()
+            return row[0] if row else None
+        except sqlite3.Error:
+            return None
+
+    def _stat(self, name):
+        return self._stats.setdefault(name, {'hits': 0, 'misses': 0, 'load_seconds': 0.0, 'last_load_seconds': 0.0})
+
+    def get(self, name, key, loader):
+        """Return the cached result for (name, key), calling loader() on a miss"""
+        cache_key = (name, key)
+        version = self.data_version()
+
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry and entry['version'] == version and time.monotonic() - entry['loaded_at'] < self.ttl_seconds:
+                self._entries.move_to_end(cache_key)
+                self._stat(name)['hits'] += 1
+                increment('cache_lookups', cache='query', query=name, result='hit')
+                return entry['value']
+            load_lock = self._load_locks.setdefault(cache_key, threading.Lock())
+
+        # One session reloads while concurrent sessions for the same key wait
+        try:
+            return self._load(name, cache_key, version, loader, load_lock)
+        finally:
+            with self._lock:
+                # Waiters already hold the lock object; only the map entry goes
+                if self._load_locks.get(cache_key) is load_lock:
+                    del self._load_locks[cache_key]
+
+    def _load(self, name, cache_key, version, loader, load_lock):
+        with load_lock:
+            with self._lock:
+                entry = self._entries.get(cache_key)
+                if entry and entry['version'] == version and time.monotonic() - entry['loaded_at'] < self.ttl_seconds:
+                    self._stat(name)['hits'] += 1
+                    increment('cache_lookups', cache='query', query=name, result='hit')
+                    return entry['value']
+
+            start = time.perf_counter()
+            with span('cache.load', query=name):
+                value = loader()
+            elapsed = time.perf_counter() - start
+            increment('cache_lookups', cache='query', query=name, result='miss')
+
+            with self._lock:
+                self._entries[cache_key] = {'value': value, 'version': version, 'loaded_at': time.monotonic()}
+                self._entries.move_to_end(cache_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                stat = self._stat(name)
+                stat['misses'] += 1
+                stat['load_seconds'] += elapsed
+                stat['last_load_seconds'] = elapsed
+            return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        """Return per-query hit rate and load time figures"""
+        with self._lock:
+            rows = []
+            for name, stat in sorted(self._stats.items()):
+                lookups = stat['hits'] + stat['misses']
+                rows.append({
+                    'query': name,
+                    'hits': stat['hits'],
+                    'misses': stat['misses'],
+                    'hit_rate': stat['hits'] / lookups if lookups else 0.0,
+                    'avg_load_ms': 1000 * stat['load_seconds'] / stat['misses'] if stat['misses'] else 0.0,
+                    'last_load_ms': 1000 * stat['last_load_seconds']
+                })
+            return rows, len(self._entries)
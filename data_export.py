@@ -0,0 +1,179 @@
+import csv
+import io
+import sqlite3
+import tempfile
+import zlib
+from config import DASHBOARD_CONFIG
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', '.csv'),
+    'csv.gz': ('application/gzip', '.csv.gz'),
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+}
+
+EXPORT_QUERIES = {
+    'risk_assessments': '''
+        SELECT r.student_id, s.name, s.mentor_id, r.assessment_date, r.overall_risk_score,
+               r.risk_level, r.attendance_risk, r.academic_risk, r.financial_risk, r.reasons
+        FROM risk_assessment r
+        JOIN students s ON r.student_id = s.student_id
+        WHERE r.run_id IN (SELECT run_id FROM prediction_runs WHERE status IN ('CURRENT', 'SUPERSEDED'))
+        ORDER BY r.id
+    ''',
+    'notifications': '''
+        SELECT id, student_id, mentor_id, notification_type, recipient, status,
+               attempts, sent_date, sent_at, last_error, message
+        FROM notifications
+        ORDER BY id
+    ''',
+}
+
+# Computed by DataProcessor rather than selected directly
+FEATURE_DATASET = 'features'
+FEATURE_COLUMNS = ['student_id', 'mentor_id', 'attendance_percentage', 'attendance_risk',
+                   'avg_score', 'max_attempts', 'academic_risk', 'pending_amount', 'financial_risk']
+
+EXPORT_DATASETS = list(EXPORT_QUERIES) + [FEATURE_DATASET]
+
+class DataExporter:
+    """Stream datasets out of SQLite in fixed-size chunks.
+
+    Rows are pulled with cursor.fetchmany and encoded chunk by chunk, so
+    memory use depends on chunk_size, not on the size of the result.
+    """
+
+    def __init__(self, db_name="student_database.db", chunk_size=None):
+        self.db_name = db_name
+        self.chunk_size = chunk_size or DASHBOARD_CONFIG['export_chunk_size']
+
+    def iter_chunks(self, dataset):
+        """Yield (columns, rows) chunks for a dataset"""
+        if dataset == FEATURE_DATASET:
+            yield from self._iter_feature_chunks()
+            return
+        if dataset not in EXPORT_QUERIES:
+            raise ValueError(f"Unknown dataset '{dataset}'. Choose from: {', '.join(EXPORT_DATASETS)}")
+
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.execute(EXPORT_QUERIES[dataset])
+            columns = [d[0] for d in cursor.description]
+            while True:
+                rows = cursor.fetchmany(self.chunk_size)
+                if not rows:
+                    break
+                yield columns, rows
+        finally:
+            conn.close()
+
+    def _iter_feature_chunks(self):
+        """Compute features one block of students at a time"""
+        from data_ingestion import DataProcessor
+        processor = DataProcessor(self.db_name)
+        conn = sqlite3.connect(self.db_name)
+        try:
+            cursor = conn.execute("SELECT student_id FROM students ORDER BY student_id")
+            while True:
+                ids = [row[0] for row in cursor.fetchmany(self.chunk_size)]
+                if not ids:
+                    break
+                features = processor.prepare_features(student_ids=ids)
+                features = features.reindex(columns=FEATURE_COLUMNS)
+                yield FEATURE_COLUMNS, list(features.itertuples(index=False, name=None))
+        finally:
+            conn.close()
+
+    def stream(self, dataset, fmt='csv'):
+        """Yield the encoded export as a sequence of byte chunks"""
+        if fmt == 'csv':
+            yield from self._stream_csv(dataset)
+        elif fmt == 'csv.gz':
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+            for block in self._stream_csv(dataset):
+                data = compressor.compress(block)
+                if data:
+                    yield data
+            yield compressor.flush()
+        elif fmt == 'parquet':
+            yield from self._stream_parquet(dataset)
+        else:
+            raise ValueError(f"Unknown format '{fmt}'. Choose from: {', '.join(EXPORT_FORMATS)}")
+
+    def _stream_csv(self, dataset):
+        header_written = False
+        for columns, rows in self.iter_chunks(dataset):
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows(rows)
+            yield buffer.getvalue().encode('utf-8')
+
+    def _stream_parquet(self, dataset):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+
+        sink = _DrainableBuffer()
+        writer = None
+        for columns, rows in self.iter_chunks(dataset):
+            table = pa.Table.from_pylist([dict(zip(columns, row)) for row in rows])
+            if writer is None:
+                # Columns that are entirely NULL in the first chunk default to strings
+                schema = pa.schema([
+                    field.with_type(pa.string()) if pa.types.is_null(field.type) else field
+                    for field in table.schema
+                ])
+                writer = pq.ParquetWriter(sink, schema)
+            # Each chunk becomes one row group; earlier groups are handed out as they are written
+            writer.write_table(table.cast(schema))
+            data = sink.drain()
+            if data:
+                yield data
+        if writer is not None:
+            writer.close()
+            yield sink.drain()
+
+    def export_to_file(self, dataset, path, fmt='csv'):
+        """Write an export to disk and return the number of bytes written"""
+        written = 0
+        with open(path, 'wb') as f:
+            for block in self.stream(dataset, fmt):
+                f.write(block)
+                written += len(block)
+        return written
+
+    def export_to_spooled_file(self, dataset, fmt='csv'):
+        """Export into a temporary file that spills to disk past export_spool_bytes"""
+        spool = tempfile.SpooledTemporaryFile(max_size=DASHBOARD_CONFIG['export_spool_bytes'])
+        for block in self.stream(dataset, fmt):
+            spool.write(block)
+        spool.seek(0)
+        return spool
+
+class _DrainableBuffer(io.RawIOBase):
+    """Write-only sink whose buffered bytes can be taken out between writes"""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
@@ -1,13 +1,29 @@
 import pandas as pd
 import numpy as np
 import sqlite3
+import json
 from datetime import datetime, timedelta
+from instrumentation import span
+from date_utils import today_day, days_ago
+from database import ensure_day_columns
+from fee_ledger import ensure_fee_ledger
+from schema_types import FEATURE_SCHEMA, apply_schema, roster_dtype
+from columnar_reader import read_frame
 
 class DataProcessor:
     def __init__(self, db_name="student_database.db"):
         self.db_name = db_name
+        ensure_day_columns(db_name)
+        ensure_fee_ledger(db_name)
     
-    def calculate_attendance_metrics(self):
+    def _student_filter(self, student_ids, column='student_id'):
+        """SQL condition and params restricting a query to the given students"""
+        if student_ids is None:
+            return '', []
+        # json_each keeps this to a single bound parameter however many ids are passed
+        return f" AND {column} IN (SELECT value FROM json_each(?))", [json.dumps(list(student_ids))]
+    
+    def calculate_attendance_metrics(self, student_ids=None):
         """Calculate attendance percentages and risks"""
         conn = sqlite3.connect(self.db_name)
         query = '''
@@ -18,14 +34,17 @@ class DataProcessor:
                 SUM(CAST(present AS INTEGER)) as attended_classes,
                 (SUM(CAST(present AS INTEGER)) * 100.0 / COUNT(*)) as attendance_percentage
             FROM attendance
-            WHERE date >= date('now', '-30 days')
+            WHERE day >= ?{student_filter}
             GROUP BY student_id, subject
         '''
-        df = pd.read_sql_query(query, conn)
+        student_filter, params = self._student_filter(student_ids)
+        with span('db.query', query='attendance_metrics') as fields:
+            df = read_frame(conn, query.format(student_filter=student_filter), [days_ago(30)] + params)
+            fields['rows'] = len(df)
         conn.close()
         return df
     
-    def calculate_academic_metrics(self):
+    def calculate_academic_metrics(self, student_ids=None):
         """Calculate academic performance metrics"""
         conn = sqlite3.connect(self.db_name)
         query = '''
@@ -38,56 +57,76 @@ class DataProcessor:
                 MIN(score) as min_score,
                 MAX(score) as max_score
             FROM test_scores
-            WHERE test_date >= date('now', '-60 days')
+            WHERE test_day >= ?{student_filter}
             GROUP BY student_id, subject
         '''
-        df = pd.read_sql_query(query, conn)
+        student_filter, params = self._student_filter(student_ids)
+        with span('db.query', query='academic_metrics') as fields:
+            df = read_frame(conn, query.format(student_filter=student_filter), [days_ago(60)] + params)
+            fields['rows'] = len(df)
         conn.close()
         return df
     
-    def calculate_financial_metrics(self):
-        """Calculate financial risk metrics"""
+    def calculate_financial_metrics(self, student_ids=None):
+        """Calculate financial risk metrics from the fee ledger's per-student balances"""
         conn = sqlite3.connect(self.db_name)
         query = '''
             SELECT 
                 student_id,
-                status,
-                amount_due,
-                amount_paid,
-                (amount_due - amount_paid) as pending_amount,
                 CASE 
-                    WHEN status = 'Pending' AND due_date < date('now') THEN 1 
-                    ELSE 0 
-                END as is_overdue
-            FROM fee_payments
-            WHERE due_date >= date('now', '-90 days')
+                    WHEN oldest_open_due_day < ? THEN 'Overdue'
+                    WHEN balance > 0 THEN 'Pending'
+                    ELSE 'Paid'
+                END as status,
+                total_charged as amount_due,
+                total_paid as amount_paid,
+                balance as pending_amount,
+                CASE WHEN oldest_open_due_day < ? THEN 1 ELSE 0 END as is_overdue,
+                open_instalments
+            FROM fee_balances
+            WHERE 1 = 1{student_filter}
         '''
-        df = pd.read_sql_query(query, conn)
+        student_filter, params = self._student_filter(student_ids)
+        with span('db.query', query='financial_metrics') as fields:
+            df = read_frame(conn, query.format(student_filter=student_filter), [today_day(), today_day()] + params)
+            fields['rows'] = len(df)
         conn.close()
         return df
     
-    def get_student_details(self):
+    def get_student_details(self, student_ids=None):
         """Get basic student information"""
         conn = sqlite3.connect(self.db_name)
         query = '''
             SELECT student_id, name, email, phone, guardian_name, guardian_phone, mentor_id
             FROM students
+            WHERE 1 = 1{student_filter}
         '''
-        df = pd.read_sql_query(query, conn)
+        student_filter, params = self._student_filter(student_ids)
+        with span('db.query', query='student_details') as fields:
+            df = read_frame(conn, query.format(student_filter=student_filter), params)
+            fields['rows'] = len(df)
         conn.close()
         return df
     
-    def prepare_features(self):
-        """Prepare features for ML model"""
+    def prepare_features(self, student_ids=None):
+        """Prepare features for ML model, optionally for a subset of students"""
+        with span('features.prepare') as fields:
+            features = self._prepare_features(student_ids)
+            fields['rows'] = len(features)
+        return features
+    
+    def _prepare_features(self, student_ids):
         try:
-            # Get all metrics
-            attendance_df = self.calculate_attendance_metrics()
-            academic_df = self.calculate_academic_metrics()
-            financial_df = self.calculate_financial_metrics()
-            student_df = self.get_student_details()
+            # Get all metrics; every frame shares the roster's student_id dictionary
+            student_df = self.get_student_details(student_ids)
+            student_dtype = roster_dtype(student_df['student_id'])
+            apply_schema(student_df, FEATURE_SCHEMA, student_dtype)
+            attendance_df = apply_schema(self.calculate_attendance_metrics(student_ids), FEATURE_SCHEMA, student_dtype)
+            academic_df = apply_schema(self.calculate_academic_metrics(student_ids), FEATURE_SCHEMA, student_dtype)
+            financial_df = apply_schema(self.calculate_financial_metrics(student_ids), FEATURE_SCHEMA, student_dtype)
             
             # Aggregate attendance by student
-            attendance_agg = attendance_df.groupby('student_id').agg({
+            attendance_agg = attendance_df.groupby('student_id', observed=True).agg({
                 'attendance_percentage': 'mean',
                 'total_classes': 'sum',
                 'attended_classes': 'sum'
@@ -95,7 +134,7 @@ class DataProcessor:
             attendance_agg['attendance_risk'] = (100 - attendance_agg['attendance_percentage']) / 100
             
             # Aggregate academic performance
-            academic_agg = academic_df.groupby('student_id').agg({
+            academic_agg = academic_df.groupby('student_id', observed=True).agg({
                 'avg_score': 'mean',
                 'max_attempts': 'max',
                 'total_tests': 'sum',
@@ -105,7 +144,7 @@ class DataProcessor:
                                            (academic_agg['max_attempts'] / 3) * 0.3
             
             # Aggregate financial data
-            financial_agg = financial_df.groupby('student_id').agg({
+            financial_agg = financial_df.groupby('student_id', observed=True).agg({
                 'is_overdue': 'max',
                 'pending_amount': 'sum'
             }).reset_index()
@@ -125,7 +164,8 @@ class DataProcessor:
                 'avg_score': 100
             }, inplace=True)
             
-            return features
+            # Left merges turn missing ints into floats; restore the compact dtypes
+            return apply_schema(features, FEATURE_SCHEMA, student_dtype)
             
         except Exception as e:
             print(f"Error preparing features: {e}")
@@ -1,7 +1,57 @@
 import sqlite3
-import pandas as pd
 from datetime import datetime, timedelta
 import random
+from date_utils import day_number_sql
+from fee_ledger import add_fee_ledger
+
+# TEXT date column -> generated integer day-number column (days since 1970-01-01)
+DAY_COLUMNS = {
+    'attendance': ('date', 'day'),
+    'test_scores': ('test_date', 'test_day'),
+    'fee_payments': ('due_date', 'due_day'),
+    'risk_assessment': ('assessment_date', 'assessment_day'),
+}
+
+_day_columns_checked = set()
+
+def add_day_columns(cursor):
+    """Add integer day-number columns generated from the TEXT dates, and index them.
+    
+    The TEXT columns stay as they are for existing readers and writers;
+    window filters compare the integer columns instead of calling date().
+    """
+    for table, (text_column, day_column) in DAY_COLUMNS.items():
+        # table_xinfo, unlike table_info, lists generated columns
+        cursor.execute(f"PRAGMA table_xinfo({table})")
+        if day_column not in {row[1] for row in cursor.fetchall()}:
+            cursor.execute(f'''
+                ALTER TABLE {table} ADD COLUMN {day_column} INTEGER
+                GENERATED ALWAYS AS ({day_number_sql(text_column)}) VIRTUAL
+            ''')
+    # Covering index for the feature query's attendance window
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_attendance_day
+        ON attendance (day, student_id, subject, present)
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_student_day ON attendance (student_id, day)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_test_scores_day ON test_scores (test_day, student_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_test_scores_student_day ON test_scores (student_id, test_day)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fee_payments_due_day ON fee_payments (due_day, student_id)")
+
+def ensure_day_columns(db_name):
+    """Migrate an existing database to the day-number columns, once per process"""
+    if db_name in _day_columns_checked:
+        return
+    conn = sqlite3.connect(db_name)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if not set(DAY_COLUMNS) <= tables:
+            return  # not a student database (yet); StudentDatabase adds the columns on creation
+        add_day_columns(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+    _day_columns_checked.add(db_name)
 
 class StudentDatabase:
     def __init__(self, db_name="student_database.db"):
@@ -13,6 +63,12 @@ class StudentDatabase:
         conn = sqlite3.connect(self.db_name)
         cursor = conn.cursor()
         
+        # Only takes effect on a new file; retention releases freed pages incrementally
+        cursor.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        
+        # WAL lets dashboard readers keep their snapshot while predictions are written
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         # Students table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS students (
@@ -81,9 +137,32 @@ class StudentDatabase:
                 academic_risk REAL,
                 financial_risk REAL,
                 reasons TEXT,
+                run_id TEXT,
                 FOREIGN KEY (student_id) REFERENCES students (student_id)
             )
         ''')
+        self._ensure_columns(cursor, 'risk_assessment', {'run_id': 'TEXT'})
+        
+        # Prediction batches; readers only see the run current_run points at
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS prediction_runs (
+                run_id TEXT PRIMARY KEY,
+                assessment_date DATE,
+                created_at TEXT,
+                published_at TEXT,
+                status TEXT,
+                row_count INTEGER,
+                revision INTEGER DEFAULT 0
+            )
+        ''')
+        # Bumped whenever event ingestion rescores students inside a published run
+        self._ensure_columns(cursor, 'prediction_runs', {'revision': 'INTEGER DEFAULT 0'})
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS current_run (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                run_id TEXT NOT NULL
+            )
+        ''')
         
         # Notifications table
         cursor.execute('''
@@ -95,14 +174,91 @@ class StudentDatabase:
                 message TEXT,
                 sent_date DATE,
                 status TEXT,
+                recipient TEXT,
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at TEXT,
+                claim_token TEXT,
+                claimed_at TEXT,
+                sent_at TEXT,
+                last_error TEXT,
                 FOREIGN KEY (student_id) REFERENCES students (student_id)
             )
         ''')
         
+        # Older databases predate the outbox columns
+        self._ensure_columns(cursor, 'notifications', {
+            'recipient': 'TEXT',
+            'attempts': 'INTEGER DEFAULT 0',
+            'next_attempt_at': 'TEXT',
+            'claim_token': 'TEXT',
+            'claimed_at': 'TEXT',
+            'sent_at': 'TEXT',
+            'last_error': 'TEXT'
+        })
+        
+        # Latest-batch lookups and the overview's high-risk list
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_risk_assessment_date_level
+            ON risk_assessment (assessment_date, risk_level, overall_risk_score)
+        ''')
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_risk_assessment_run_student
+            ON risk_assessment (run_id, student_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_risk_assessment_run_level
+            ON risk_assessment (run_id, risk_level, overall_risk_score)
+        ''')
+        self._migrate_legacy_runs(cursor)
+        
+        add_day_columns(cursor)
+        add_fee_ledger(cursor)
+        
+        # Outbox dispatcher claims PENDING rows in id order
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notifications_status
+            ON notifications (status, next_attempt_at, id)
+        ''')
+        
         conn.commit()
         conn.close()
         print("Database tables initialized successfully!")
     
+    def _migrate_legacy_runs(self, cursor):
+        """Give assessments written before run tracking one published run per date"""
+        cursor.execute('''
+            UPDATE risk_assessment SET run_id = 'legacy-' || assessment_date
+            WHERE run_id IS NULL
+        ''')
+        if cursor.rowcount == 0:
+            return
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        cursor.execute('''
+            INSERT OR IGNORE INTO prediction_runs
+            (run_id, assessment_date, created_at, published_at, status, row_count)
+            SELECT run_id, assessment_date, ?, ?, 'SUPERSEDED', COUNT(*)
+            FROM risk_assessment WHERE run_id LIKE 'legacy-%'
+            GROUP BY run_id
+        ''', (now, now))
+        cursor.execute("SELECT 1 FROM current_run")
+        if cursor.fetchone() is None:
+            cursor.execute('''
+                INSERT INTO current_run (id, run_id)
+                SELECT 1, run_id FROM prediction_runs ORDER BY assessment_date DESC LIMIT 1
+            ''')
+            cursor.execute('''
+                UPDATE prediction_runs SET status = 'CURRENT'
+                WHERE run_id = (SELECT run_id FROM current_run WHERE id = 1)
+            ''')
+    
+    def _ensure_columns(self, cursor, table, columns):
+        """Add any missing columns to an existing table"""
+        cursor.execute(f"PRAGMA table_info({table})")
+        existing = {row[1] for row in cursor.fetchall()}
+        for column, column_type in columns.items():
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+    
     def generate_sample_data(self, num_students=50):
         """Generate sample data for testing"""
         conn = sqlite3.connect(self.db_name)
@@ -111,6 +267,8 @@ class StudentDatabase:
         # Clear existing data (optional)
         cursor.execute("DELETE FROM notifications")
         cursor.execute("DELETE FROM risk_assessment")
+        cursor.execute("DELETE FROM prediction_runs")
+        cursor.execute("DELETE FROM current_run")
         cursor.execute("DELETE FROM fee_payments")
         cursor.execute("DELETE FROM test_scores")
         cursor.execute("DELETE FROM attendance")
@@ -127,14 +285,15 @@ class StudentDatabase:
                 f"98765432{str(i).zfill(2)}",
                 f"Guardian {i+1}",
                 f"98765432{str(i+100).zfill(2)}",
+                f"guardian{i+1}@institute.edu",
                 f"MENT{(i % 10) + 1}",
                 "2024-01-15"
             ))
         
         cursor.executemany('''
             INSERT INTO students 
-            (student_id, name, email, phone, guardian_name, guardian_phone, mentor_id, enrollment_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            (student_id, name, email, phone, guardian_name, guardian_phone, guardian_email, mentor_id, enrollment_date)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', students)
         
         # Generate sample attendance data
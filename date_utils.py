@@ -0,0 +1,38 @@
+from datetime import date, datetime, timedelta
+
+EPOCH = date(1970, 1, 1)
+
+def to_day_number(value):
+    """Days since 1970-01-01 for a date, datetime or 'YYYY-MM-DD' string"""
+    if isinstance(value, str):
+        value = datetime.strptime(value[:10], '%Y-%m-%d').date()
+    elif isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+def from_day_number(day):
+    """Inverse of to_day_number, returned as a 'YYYY-MM-DD' string"""
+    return (EPOCH + timedelta(days=int(day))).strftime('%Y-%m-%d')
+
+def today_day():
+    return to_day_number(date.today())
+
+def days_ago(days):
+    """Day number of the date `days` before today"""
+    return today_day() - days
+
+def day_number_sql(column):
+    """SQL expression computing to_day_number of a TEXT date column (NULL stays NULL)"""
+    return f"CAST(julianday({column}) - 2440587.5 AS INTEGER)"
+
+def week_bounds(day):
+    """First and last day number of the Monday-based week containing day"""
+    start = day - (day + 3) % 7  # 1970-01-01 was a Thursday
+    return start, start + 6
+
+def month_bounds(day):
+    """First and last day number of the calendar month containing day"""
+    current = EPOCH + timedelta(days=int(day))
+    first = current.replace(day=1)
+    next_first = (first + timedelta(days=32)).replace(day=1)
+    return to_day_number(first), to_day_number(next_first) - 1
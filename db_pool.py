@@ -0,0 +1,68 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+class ConnectionPool:
+    """Small bounded pool of reusable SQLite connections.
+
+    Connections are opened lazily up to `size` and handed out one per caller;
+    read-only pools set PRAGMA query_only so a stray write fails loudly.
+    """
+
+    def __init__(self, db_name="student_database.db", size=4, read_only=True, timeout=30):
+        self.db_name = db_name
+        self.size = size
+        self.read_only = read_only
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        try:
+            if self.read_only:
+                conn.execute("PRAGMA query_only = 1")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        return conn
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return self._open()
+                except Exception:
+                    # Give the slot back, or failed connects would eventually leave every caller waiting
+                    self._opened -= 1
+                    raise
+        return self._idle.get(timeout=self.timeout)
+
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
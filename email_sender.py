@@ -3,6 +3,7 @@ import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from config import EMAIL_CONFIG
+from instrumentation import span, increment
 
 def send_email(recipient_email, subject, body):
     """Sends an email using the configuration from config.py."""
@@ -26,11 +27,14 @@ def send_email(recipient_email, subject, body):
     context = ssl.create_default_context()
 
     try:
-        with smtplib.SMTP_SSL(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'], context=context) as server:
-            server.login(sender_email, password)
-            server.sendmail(sender_email, recipient_email, message.as_string())
-            print(f"✅ Email alert sent successfully to {recipient_email}")
-            return True
+        with span('email.send'):
+            with smtplib.SMTP_SSL(EMAIL_CONFIG['smtp_server'], EMAIL_CONFIG['smtp_port'], context=context) as server:
+                server.login(sender_email, password)
+                server.sendmail(sender_email, recipient_email, message.as_string())
+        increment('emails', result='sent')
+        print(f"✅ Email alert sent successfully to {recipient_email}")
+        return True
     except Exception as e:
+        increment('emails', result='failed')
         print(f"❌ Failed to send email to {recipient_email}. Error: {e}")
         return False
\ No newline at end of file
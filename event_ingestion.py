@@ -0,0 +1,232 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import pandas as pd
+from config import INGESTION_CONFIG
+from instrumentation import span, increment
+from prediction_runs import CURRENT_RUN_SQL
+from risk_history import RiskHistory
+from risk_summary import RiskSummaryWriter
+from schema_types import assessment_frame, sql_values
+
+class EventIngestor:
+    """Record attendance, test and fee events and rescore affected students in micro-batches.
+
+    Each event is written in its own short transaction and its student_id is
+    added to a dirty set. A flush runs every `flush_interval_seconds` (when
+    started) or as soon as `flush_max_events` events are pending; it scores
+    only the dirty students and upserts their rows into the current run.
+    The overview summary gets deltas for the rescored students on every
+    flush and a full rebuild every `summary_rebuild_seconds`.
+    """
+
+    def __init__(self, db_name="student_database.db", flush_interval_seconds=None,
+                 flush_max_events=None, predictor=None, summary_rebuild_seconds=None):
+        self.db_name = db_name
+        self.flush_interval_seconds = flush_interval_seconds or INGESTION_CONFIG['flush_interval_seconds']
+        self.flush_max_events = flush_max_events or INGESTION_CONFIG['flush_max_events']
+        self.summary_rebuild_seconds = summary_rebuild_seconds or INGESTION_CONFIG['summary_rebuild_seconds']
+        self.predictor = predictor
+        self._summary_built_at = time.monotonic()
+        self._dirty = set()
+        self._pending_events = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return conn
+
+    def _record(self, kind, student_id, query, params):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(query, params)
+        finally:
+            conn.close()
+        increment('ingested_events', kind=kind)
+
+        with self._lock:
+            self._dirty.add(student_id)
+            self._pending_events += 1
+            should_flush = self._pending_events >= self.flush_max_events
+        if should_flush:
+            self.flush()
+
+    def record_attendance(self, student_id, subject, date, present):
+        self._record('attendance', student_id, '''
+            INSERT INTO attendance (student_id, subject, date, present)
+            VALUES (?, ?, ?, ?)
+        ''', (student_id, subject, date, bool(present)))
+
+    def record_test_score(self, student_id, subject, test_type, score, max_score=100,
+                          test_date=None, attempt_number=1):
+        test_date = test_date or datetime.now().strftime('%Y-%m-%d')
+        self._record('test_score', student_id, '''
+            INSERT INTO test_scores
+            (student_id, subject, test_type, score, max_score, test_date, attempt_number)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (student_id, subject, test_type, score, max_score, test_date, attempt_number))
+
+    def record_fee_payment(self, student_id, amount_due, amount_paid, due_date,
+                           payment_date=None, status=None):
+        status = status or ("Paid" if amount_paid >= amount_due else "Pending")
+        self._record('fee_payment', student_id, '''
+            INSERT INTO fee_payments
+            (student_id, amount_due, amount_paid, due_date, payment_date, status)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (student_id, amount_due, amount_paid, due_date, payment_date, status))
+
+    def pending(self):
+        """Number of students waiting for the next flush"""
+        with self._lock:
+            return len(self._dirty)
+
+    def _get_predictor(self):
+        if self.predictor is None:
+            from ml_model import DropoutPredictor
+            self.predictor = DropoutPredictor(self.db_name)
+        return self.predictor
+
+    def flush(self):
+        """Rescore the dirty students and upsert them into the current run; returns rows written"""
+        with self._flush_lock:
+            if not self._dirty:
+                return 0
+            if not self._has_current_run():
+                # Nothing to upsert into yet; the students stay dirty for a later flush
+                print("No published prediction run yet; run a full prediction first.")
+                return 0
+            with self._lock:
+                student_ids = sorted(self._dirty)
+                self._dirty = set()
+                self._pending_events = 0
+            if not student_ids:
+                return 0
+
+            try:
+                written = self._rescore(student_ids)
+            except Exception as e:
+                # Keep the students dirty so the next flush retries them
+                with self._lock:
+                    self._dirty.update(student_ids)
+                print(f"❌ Micro-batch rescoring failed: {e}")
+                return 0
+            return written
+
+    def _has_current_run(self):
+        conn = self._connect()
+        try:
+            return conn.execute(f"SELECT {CURRENT_RUN_SQL}").fetchone()[0] is not None
+        finally:
+            conn.close()
+
+    def _rescore(self, student_ids):
+        with span('ingestion.flush') as fields:
+            predictions = self._get_predictor().predict_risk(student_ids=student_ids)
+            fields['rows'] = len(predictions)
+            if predictions.empty:
+                return 0
+
+            today = datetime.now().strftime('%Y-%m-%d')
+            assessments = assessment_frame(predictions)
+
+            conn = self._connect()
+            try:
+                with conn:
+                    current = conn.execute(f"SELECT {CURRENT_RUN_SQL}").fetchone()[0]
+                    if current is None:
+                        raise RuntimeError("the current prediction run disappeared")
+                    previous = self._stored_rows(conn, current, student_ids)
+                    # Upsert keeps one row per student in the run; the revision
+                    # bump changes the version that readers cache against
+                    conn.executemany('''
+                        INSERT INTO risk_assessment
+                        (student_id, assessment_date, overall_risk_score, risk_level,
+                         attendance_risk, academic_risk, financial_risk, reasons, run_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (run_id, student_id) DO UPDATE SET
+                            assessment_date = excluded.assessment_date,
+                            overall_risk_score = excluded.overall_risk_score,
+                            risk_level = excluded.risk_level,
+                            attendance_risk = excluded.attendance_risk,
+                            academic_risk = excluded.academic_risk,
+                            financial_risk = excluded.financial_risk,
+                            reasons = excluded.reasons
+                    ''', [(row[0], today, *row[1:], current)
+                          for row in sql_values(assessments, list(assessments.columns))])
+                    conn.execute('''
+                        UPDATE prediction_runs
+                        SET revision = COALESCE(revision, 0) + 1,
+                            row_count = (SELECT COUNT(*) FROM risk_assessment WHERE run_id = ?)
+                        WHERE run_id = ?
+                    ''', (current, current))
+
+                    RiskHistory(self.db_name).record_batch(conn, today, assessments, partial=True)
+                    self._refresh_summary(conn, current, previous, student_ids)
+            finally:
+                conn.close()
+
+        increment('rescored_students', len(assessments))
+        print(f"🔄 Rescored {len(assessments)} students into run {current}")
+        return len(assessments)
+
+    def _stored_rows(self, conn, run_id, student_ids):
+        """The run's current rows for student_ids (NULL scores for students not in it yet)"""
+        rows = conn.execute('''
+            SELECT s.student_id, s.mentor_id, r.overall_risk_score, r.risk_level
+            FROM students s
+            LEFT JOIN risk_assessment r ON r.student_id = s.student_id AND r.run_id = ?
+            WHERE s.student_id IN (SELECT value FROM json_each(?))
+        ''', (run_id, json.dumps(student_ids))).fetchall()
+        return pd.DataFrame(rows, columns=['student_id', 'mentor_id', 'overall_risk_score', 'risk_level'])
+
+    def _refresh_summary(self, conn, run_id, previous, student_ids):
+        """Move the overview aggregates from the students' previous rows to their new ones.
+
+        Every summary_rebuild_seconds the summary is recomputed from the run's
+        stored scores instead, which also refreshes the box-plot quartiles.
+        """
+        run_date = conn.execute("SELECT assessment_date FROM prediction_runs WHERE run_id = ?", (run_id,)).fetchone()[0]
+        writer = RiskSummaryWriter(self.db_name)
+        if time.monotonic() - self._summary_built_at < self.summary_rebuild_seconds:
+            removed = previous.dropna(subset=['overall_risk_score'])
+            added = self._stored_rows(conn, run_id, student_ids).dropna(subset=['overall_risk_score'])
+            if writer.apply_delta(conn, run_date, removed, added):
+                return
+        with span('ingestion.summary_rebuild'):
+            current = pd.read_sql_query('''
+                SELECT r.student_id, r.overall_risk_score, r.risk_level, r.attendance_risk,
+                       r.academic_risk, r.financial_risk, s.mentor_id
+                FROM risk_assessment r LEFT JOIN students s ON s.student_id = r.student_id
+                WHERE r.run_id = ?
+            ''', conn, params=[run_id])
+            writer.write(conn, run_date, current)
+        self._summary_built_at = time.monotonic()
+
+    def start(self):
+        """Flush on a background thread every flush_interval_seconds"""
+        if self._worker is not None:
+            return self._worker
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.flush_interval_seconds):
+                self.flush()
+
+        self._worker = threading.Thread(target=loop, name="event-ingestion-flush", daemon=True)
+        self._worker.start()
+        return self._worker
+
+    def stop(self):
+        """Stop the background thread and flush whatever is still pending"""
+        if self._worker is not None:
+            self._stop.set()
+            self._worker.join()
+            self._worker = None
+        return self.flush()
@@ -0,0 +1,171 @@
+import sqlite3
+from date_utils import day_number_sql, today_day
+
+# An instalment stays open until it is paid in full
+OPEN_SQL = "COALESCE({row}amount_paid, 0) < COALESCE({row}amount_due, 0)"
+
+# One charge per fee_payments row, plus a payment entry once money came in
+LEDGER_ENTRIES_SQL = '''
+    INSERT INTO fee_ledger (payment_id, student_id, entry_type, amount, entry_date)
+    SELECT {row}id, {row}student_id, 'CHARGE', COALESCE({row}amount_due, 0), {row}due_date {source}
+    WHERE {row}student_id IS NOT NULL;
+    INSERT INTO fee_ledger (payment_id, student_id, entry_type, amount, entry_date)
+    SELECT {row}id, {row}student_id, 'PAYMENT', {row}amount_paid, COALESCE({row}payment_date, {row}due_date) {source}
+    WHERE {row}student_id IS NOT NULL AND COALESCE({row}amount_paid, 0) > 0;
+'''
+
+# Full per-student balance from the fee rows, used for backfill and after updates/deletes
+BALANCE_SQL = f'''
+    INSERT INTO fee_balances (student_id, total_charged, total_paid, open_instalments, oldest_open_due_date)
+    SELECT student_id, TOTAL(amount_due), TOTAL(amount_paid),
+           SUM({OPEN_SQL.format(row='')}),
+           MIN(CASE WHEN {OPEN_SQL.format(row='')} THEN due_date END)
+    FROM fee_payments WHERE student_id IS NOT NULL{{student_filter}}
+    GROUP BY student_id;
+'''
+
+LEDGER_TRIGGERS = {
+    # Inserts are the common path (new instalments and ingested payments): an O(1) delta
+    'fee_ledger_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS fee_ledger_insert AFTER INSERT ON fee_payments
+        BEGIN
+            {LEDGER_ENTRIES_SQL.format(row='NEW.', source='')}
+            INSERT INTO fee_balances (student_id, total_charged, total_paid, open_instalments, oldest_open_due_date)
+            SELECT NEW.student_id, COALESCE(NEW.amount_due, 0), COALESCE(NEW.amount_paid, 0),
+                   {OPEN_SQL.format(row='NEW.')},
+                   CASE WHEN {OPEN_SQL.format(row='NEW.')} THEN NEW.due_date END
+            WHERE NEW.student_id IS NOT NULL
+            ON CONFLICT (student_id) DO UPDATE SET
+                total_charged = total_charged + excluded.total_charged,
+                total_paid = total_paid + excluded.total_paid,
+                open_instalments = open_instalments + excluded.open_instalments,
+                oldest_open_due_date = CASE
+                    WHEN oldest_open_due_date IS NULL THEN excluded.oldest_open_due_date
+                    WHEN excluded.oldest_open_due_date IS NULL THEN oldest_open_due_date
+                    ELSE MIN(oldest_open_due_date, excluded.oldest_open_due_date)
+                END;
+        END
+    ''',
+    # A paid or corrected instalment can close the oldest open one, so the
+    # affected students' balances are recomputed from their own rows
+    'fee_ledger_update': f'''
+        CREATE TRIGGER IF NOT EXISTS fee_ledger_update AFTER UPDATE ON fee_payments
+        BEGIN
+            DELETE FROM fee_ledger WHERE payment_id = OLD.id;
+            {LEDGER_ENTRIES_SQL.format(row='NEW.', source='')}
+            DELETE FROM fee_balances WHERE student_id IN (OLD.student_id, NEW.student_id);
+            {BALANCE_SQL.format(student_filter=' AND student_id IN (OLD.student_id, NEW.student_id)')}
+        END
+    ''',
+    'fee_ledger_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS fee_ledger_delete AFTER DELETE ON fee_payments
+        BEGIN
+            DELETE FROM fee_ledger WHERE payment_id = OLD.id;
+            DELETE FROM fee_balances WHERE student_id = OLD.student_id;
+            {BALANCE_SQL.format(student_filter=' AND student_id = OLD.student_id')}
+        END
+    ''',
+}
+
+_fee_ledger_checked = set()
+
+def add_fee_ledger(cursor):
+    """Create the ledger, balance table and triggers; backfill them the first time"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'fee_balances'")
+    created = cursor.fetchone() is None
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS fee_ledger (
+            entry_id INTEGER PRIMARY KEY,
+            payment_id INTEGER NOT NULL,
+            student_id TEXT NOT NULL,
+            entry_type TEXT NOT NULL,
+            amount REAL NOT NULL,
+            entry_date DATE
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fee_ledger_payment ON fee_ledger (payment_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fee_ledger_student_date ON fee_ledger (student_id, entry_date)")
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS fee_balances (
+            student_id TEXT PRIMARY KEY,
+            total_charged REAL NOT NULL,
+            total_paid REAL NOT NULL,
+            open_instalments INTEGER NOT NULL,
+            oldest_open_due_date DATE,
+            balance REAL GENERATED ALWAYS AS (total_charged - total_paid) VIRTUAL,
+            oldest_open_due_day INTEGER GENERATED ALWAYS AS ({day_number_sql('oldest_open_due_date')}) VIRTUAL
+        ) WITHOUT ROWID
+    ''')
+    # Balance recomputes after updates and deletes read one student's fee rows
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_fee_payments_student_due ON fee_payments (student_id, due_date)")
+    for trigger in LEDGER_TRIGGERS.values():
+        cursor.execute(trigger)
+    if created:
+        rebuild_fee_ledger(cursor)
+
+def rebuild_fee_ledger(cursor):
+    """Recompute every ledger entry and balance from fee_payments"""
+    cursor.execute("DELETE FROM fee_ledger")
+    cursor.execute("DELETE FROM fee_balances")
+    for statement in LEDGER_ENTRIES_SQL.format(row='', source='FROM fee_payments').split(';'):
+        if statement.strip():
+            cursor.execute(statement)
+    cursor.execute(BALANCE_SQL.format(student_filter=''))
+
+def ensure_fee_ledger(db_name):
+    """Add the fee ledger to an existing database, once per process"""
+    if db_name in _fee_ledger_checked:
+        return
+    conn = sqlite3.connect(db_name)
+    try:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if 'fee_payments' not in tables:
+            return  # not a student database (yet); StudentDatabase adds the ledger on creation
+        add_fee_ledger(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+    _fee_ledger_checked.add(db_name)
+
+class FeeLedger:
+    """Read side of the fee ledger: running balances and statements per student.
+
+    fee_payments stays the system of record (one row per instalment); the
+    triggers above keep fee_ledger and fee_balances in step with it inside
+    the writer's own transaction, so readers look a student up by primary
+    key instead of aggregating instalment rows.
+    """
+
+    def __init__(self, db_name="student_database.db"):
+        self.db_name = db_name
+        ensure_fee_ledger(db_name)
+
+    def balance(self, student_id):
+        """One student's balance row as a dict, or None without fee records"""
+        conn = sqlite3.connect(self.db_name)
+        conn.row_factory = sqlite3.Row
+        row = conn.execute('''
+            SELECT student_id, total_charged, total_paid, balance, open_instalments,
+                   oldest_open_due_date, oldest_open_due_day < ? AS is_overdue
+            FROM fee_balances WHERE student_id = ?
+        ''', (today_day(), student_id)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def statement(self, student_id):
+        """Ledger entries for one student, newest first"""
+        import pandas as pd  # database.py imports this module, and init-db must not pay for pandas
+        conn = sqlite3.connect(self.db_name)
+        df = pd.read_sql_query('''
+            SELECT entry_date, entry_type, amount FROM fee_ledger
+            WHERE student_id = ? ORDER BY entry_date DESC, entry_id DESC
+        ''', conn, params=[student_id])
+        conn.close()
+        return df
+
+    def rebuild(self):
+        """Recompute the ledger from scratch, e.g. after bulk edits with triggers off"""
+        conn = sqlite3.connect(self.db_name)
+        with conn:
+            rebuild_fee_ledger(conn.cursor())
+        conn.close()
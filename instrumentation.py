@@ -0,0 +1,228 @@
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from config import OBSERVABILITY_CONFIG
+
+class MetricsRegistry:
+    """In-process span timings and counters.
+
+    Spans are aggregated per (name, labels) into count, total and max seconds;
+    each finished span is also written as one JSON line to `log_path`,
+    which rolls over to log_path.1 .. log_path.<log_backups> once it reaches
+    `log_max_bytes`. Counters are plain running totals. Both render as Prometheus text.
+    """
+
+    def __init__(self, log_path=None, log_max_bytes=None, log_backups=0):
+        self.log_path = log_path
+        self.log_max_bytes = log_max_bytes
+        self.log_backups = log_backups
+        self.profile_dir = None
+        self._spans = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._log_file = None
+        self._local = threading.local()
+
+    def _key(self, name, labels):
+        return (name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def increment(self, name, value=1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, labels):
+        key = self._key(name, labels)
+        with self._lock:
+            stat = self._spans.setdefault(key, [0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += seconds
+            stat[2] = max(stat[2], seconds)
+
+    def log(self, event):
+        if not self.log_path:
+            return
+        line = json.dumps(event, default=str)
+        with self._lock:
+            if self._log_file is None:
+                directory = os.path.dirname(self.log_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._log_file = open(self.log_path, 'a', buffering=1)
+            self._log_file.write(line + '\n')
+            if self.log_max_bytes and self._log_file.tell() >= self.log_max_bytes:
+                self._rotate_log()
+
+    def _rotate_log(self):
+        """Shift the backups up by one and start a fresh log; called with the lock held"""
+        self._log_file.close()
+        self._log_file = None
+        for index in range(self.log_backups - 1, 0, -1):
+            source = f"{self.log_path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.log_path}.{index + 1}")
+        if self.log_backups:
+            os.replace(self.log_path, f"{self.log_path}.1")
+        else:
+            os.remove(self.log_path)
+
+    @contextmanager
+    def span(self, name, **labels):
+        """Time a block; the yielded dict takes extra fields such as `rows`"""
+        fields = {}
+        status = 'ok'
+        start = time.perf_counter()
+        try:
+            yield fields
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(name, seconds, labels)
+            if status == 'error':
+                self.increment('span_errors', span=name)
+            if 'rows' in fields:
+                self.increment('rows_processed', fields['rows'], span=name)
+            self.log({
+                'ts': datetime.now().isoformat(timespec='milliseconds'),
+                'span': name,
+                'duration_ms': round(seconds * 1000, 3),
+                'status': status,
+                'thread': threading.current_thread().name,
+                **labels,
+                **fields
+            })
+
+    @contextmanager
+    def stage(self, name, profile=True):
+        """Span for a whole pipeline stage, dumped to a cProfile file when profiling is on.
+
+        Pass profile=False for a stage that only groups other stages, so each
+        of those gets its own dump.
+        """
+        profiler = None
+        # A nested stage is already covered by the enclosing stage's profile
+        if profile and self.profile_dir and not getattr(self._local, 'profiling', False):
+            profiler = cProfile.Profile()
+            profiler.enable()
+            self._local.profiling = True
+        try:
+            with self.span('stage', stage=name) as fields:
+                yield fields
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                self._local.profiling = False
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path = os.path.join(self.profile_dir, f"{name}-{datetime.now():%Y%m%d-%H%M%S}.prof")
+                profiler.dump_stats(path)
+                print(f"🔬 Profile for {name} written to {path}")
+
+    def render_prometheus(self):
+        """Current metrics in the Prometheus text exposition format"""
+        def label_text(labels):
+            if not labels:
+                return ''
+            escape = lambda v: v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            return '{' + ','.join(f'{k}="{escape(v)}"' for k, v in labels) + '}'
+
+        with self._lock:
+            spans = sorted(self._spans.items())
+            counters = sorted(self._counters.items())
+
+        lines = []
+        if spans:
+            lines.append('# HELP pipeline_span_seconds Time spent in instrumented spans')
+            lines.append('# TYPE pipeline_span_seconds summary')
+            for (name, labels), (count, total, _) in spans:
+                text = label_text((('span', name),) + labels)
+                lines.append(f'pipeline_span_seconds_count{text} {count}')
+                lines.append(f'pipeline_span_seconds_sum{text} {total:.6f}')
+            lines.append('# HELP pipeline_span_seconds_max Slowest single span')
+            lines.append('# TYPE pipeline_span_seconds_max gauge')
+            for (name, labels), (_, _, longest) in spans:
+                lines.append(f'pipeline_span_seconds_max{label_text((("span", name),) + labels)} {longest:.6f}')
+
+        seen = set()
+        for (name, labels), value in counters:
+            metric = f'pipeline_{name}_total'
+            if metric not in seen:
+                seen.add(metric)
+                lines.append(f'# TYPE {metric} counter')
+            lines.append(f'{metric}{label_text(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def write_metrics_file(self, path=None):
+        """Write the Prometheus text to path (for node_exporter's textfile collector)"""
+        path = path or OBSERVABILITY_CONFIG['metrics_path']
+        if not path:
+            return None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Write then rename so a scraper never reads a half-written file
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w') as f:
+            f.write(self.render_prometheus())
+        os.replace(temp_path, path)
+        return path
+
+    def serve_metrics(self, port=None, host='127.0.0.1'):
+        """Serve /metrics on a daemon thread and return the server"""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port or OBSERVABILITY_CONFIG['metrics_port']), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        print(f"📡 Metrics served at http://{host}:{server.server_address[1]}/metrics")
+        return server
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+# Process-wide registry used by every module
+metrics = MetricsRegistry(OBSERVABILITY_CONFIG['log_path'], OBSERVABILITY_CONFIG['log_max_bytes'],
+                          OBSERVABILITY_CONFIG['log_backups'])
+
+span = metrics.span
+stage = metrics.stage
+increment = metrics.increment
+
+def traced(name=None, **labels):
+    """Decorator form of span; the span name defaults to module.function"""
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.span(span_name, **labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def enable_profiling(directory=None):
+    """Dump a cProfile file for every stage() block from now on"""
+    metrics.profile_dir = directory or OBSERVABILITY_CONFIG['profile_dir']
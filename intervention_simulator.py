@@ -0,0 +1,123 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+from config import ML_MODEL_CONFIG, SIMULATION_CONFIG
+from data_ingestion import DataProcessor
+from ml_model import DropoutPredictor
+from instrumentation import span
+
+SCENARIO_COLUMNS = ['target_attendance', 'target_score', 'clear_fee']
+
+class InterventionSimulator:
+    """What-if risk scores for counterfactual attendance, score and fee changes.
+
+    Every student's features are expanded into a grid of scenarios (each
+    attendance target x each score target x fee cleared or not, plus "no
+    change"), the derived risk features are recomputed the same way
+    DataProcessor builds them, and the whole grid is scored in one batched
+    model call. Nothing is written to the database.
+    """
+
+    def __init__(self, db_name="student_database.db", predictor=None, config=None):
+        self.db_name = db_name
+        self.predictor = predictor or DropoutPredictor(db_name)
+        self.config = config or SIMULATION_CONFIG
+        self.threshold = ML_MODEL_CONFIG['risk_threshold_medium']
+
+    def mentor_students(self, mentor_id):
+        conn = sqlite3.connect(self.db_name)
+        rows = conn.execute("SELECT student_id FROM students WHERE mentor_id = ?", (mentor_id,)).fetchall()
+        conn.close()
+        return [row[0] for row in rows]
+
+    def build_grid(self, features):
+        """One row per (student, scenario) with the recomputed feature columns"""
+        # 0 stands for "leave as is": targets are clamped to the current value below
+        attendance_options = np.array([0] + list(self.config['attendance_targets']), dtype=np.float64)
+        score_options = np.array([0] + list(self.config['score_targets']), dtype=np.float64)
+        attendance, score, clear = np.meshgrid(attendance_options, score_options, [False, True], indexing='ij')
+        attendance, score, clear = attendance.ravel(), score.ravel(), clear.ravel()
+        scenarios = len(attendance)
+
+        grid = features.iloc[np.repeat(np.arange(len(features)), scenarios)].reset_index(drop=True)
+        return self._apply_scenario(grid, np.tile(attendance, len(features)), np.tile(score, len(features)),
+                                    np.tile(clear, len(features)))
+
+    def _apply_scenario(self, frame, attendance, score, clear):
+        """Overwrite frame's features with the scenario columns and recompute the derived risks.
+
+        Targets below a student's current value leave that value unchanged;
+        clearing the fee only applies to students who have a fee issue.
+        """
+        current_attendance = frame['attendance_percentage'].to_numpy(dtype=np.float64)
+        current_score = frame['avg_score'].to_numpy(dtype=np.float64)
+        max_attempts = frame['max_attempts'].fillna(0).to_numpy(dtype=np.float64)
+        financial_risk = frame['financial_risk'].to_numpy(dtype=np.float64)
+
+        target_attendance = np.maximum(attendance, current_attendance)
+        target_score = np.maximum(score, current_score)
+        clear_fee = clear & (financial_risk > 0)
+
+        # Same formulas as DataProcessor._prepare_features
+        frame['attendance_percentage'] = target_attendance
+        frame['attendance_risk'] = (100 - target_attendance) / 100
+        frame['avg_score'] = target_score
+        frame['academic_risk'] = ((100 - target_score) / 100) * 0.7 + (max_attempts / 3) * 0.3
+        frame['financial_risk'] = np.where(clear_fee, 0, financial_risk)
+        frame['target_attendance'] = target_attendance
+        frame['target_score'] = target_score
+        frame['clear_fee'] = clear_fee
+        frame['cost'] = (target_attendance - current_attendance) + (target_score - current_score) + \
+                        clear_fee * self.config['fee_clear_cost']
+        return frame
+
+    def score_grid(self, grid):
+        _, probabilities = self.predictor.score(grid)
+        grid['projected_score'] = probabilities * 100
+        return grid
+
+    def simulate(self, student_ids=None, features=None):
+        """Smallest intervention per student that brings the risk below risk_threshold_medium.
+
+        Returns one row per student with the current score, the cheapest
+        qualifying scenario (ties go to the lower projected score) and
+        `reachable`; students no scenario brings below the threshold get the
+        lowest-scoring scenario instead, and students already below it get
+        "no change".
+        """
+        if features is None:
+            features = DataProcessor(self.db_name).prepare_features(student_ids)
+        if features.empty:
+            return pd.DataFrame()
+
+        with span('simulation.grid') as fields:
+            grid = self.score_grid(self.build_grid(features))
+            fields['rows'] = len(grid)
+
+        grid['reachable'] = grid['projected_score'] < self.threshold
+        # The first scenario of every student is "no change"
+        identity = ['student_id'] + (['name'] if 'name' in grid.columns else [])
+        current = grid.drop_duplicates('student_id')[identity + ['projected_score']]
+        current = current.rename(columns={'projected_score': 'current_score'})
+
+        # Qualifying scenarios first, then cheapest, then lowest projected score
+        grid['rank_cost'] = np.where(grid['reachable'], grid['cost'], np.inf)
+        best = grid.sort_values(['rank_cost', 'projected_score'], kind='stable').drop_duplicates('student_id')
+        columns = ['student_id'] + SCENARIO_COLUMNS + ['cost', 'projected_score', 'reachable']
+        result = current.merge(best[columns], on='student_id')
+        return result.sort_values('current_score', ascending=False).reset_index(drop=True)
+
+    def simulate_mentor(self, mentor_id):
+        """simulate() for every student of one mentor"""
+        student_ids = self.mentor_students(mentor_id)
+        if not student_ids:
+            return pd.DataFrame()
+        return self.simulate(student_ids)
+
+    def what_if(self, features, attendance=0, avg_score=0, clear_fee=False):
+        """(current, projected) risk score of one student's feature row under a custom scenario"""
+        scenario = features.iloc[[0, 0]].reset_index(drop=True)
+        self._apply_scenario(scenario, np.array([0, attendance], dtype=np.float64),
+                             np.array([0, avg_score], dtype=np.float64), np.array([False, clear_fee]))
+        _, probabilities = self.predictor.score(scenario)
+        return probabilities[0] * 100, probabilities[1] * 100
@@ -1,172 +1,427 @@
 import argparse
+import importlib
 import sys
 import os
-import subprocess
-import webbrowser
-import time
 
 # Add current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-def import_modules(require_notifications=False):
-    """Import all required modules with error handling"""
-    try:
-        from database import StudentDatabase
-        print("✅ Successfully imported StudentDatabase")
-    except ImportError as e:
-        print(f"❌ Error importing StudentDatabase: {e}")
-        return False
-    
+# Heavy modules (pandas, sklearn, streamlit) are imported inside the command
+# that needs them, so `python main.py init-db` never pays for the ML stack.
+
+EXPORT_FORMATS = ['csv', 'csv.gz', 'parquet']
+
+def load(module_name, attribute):
+    """Import attribute from module_name on first use, reporting import errors"""
     try:
-        from ml_model import DropoutPredictor
-        print("✅ Successfully imported DropoutPredictor")
+        return getattr(importlib.import_module(module_name), attribute)
     except ImportError as e:
-        print(f"❌ Error importing DropoutPredictor: {e}")
-        return False
-    
-    if require_notifications:
-        try:
-            from notification_system import NotificationSystem
-            print("✅ Successfully imported NotificationSystem")
-        except ImportError as e:
-            print(f"❌ Error importing NotificationSystem: {e}")
-            return False
-    
-    return True
+        print(f"❌ Error importing {attribute}: {e}")
+        return None
 
 def launch_dashboard():
     """Launch Streamlit dashboard in a separate process"""
+    import subprocess
+    import time
+    import webbrowser
+
     print("📈 Launching dashboard...")
     print("🌐 Dashboard will open in your browser at: http://localhost:8501")
     print("⏳ Please wait a few seconds for the dashboard to load...")
-    
+
     try:
         # Run streamlit as a separate process
         dashboard_process = subprocess.Popen([
-            sys.executable, "-m", "streamlit", "run", 
-            "dashboard.py", 
+            sys.executable, "-m", "streamlit", "run",
+            "dashboard.py",
             "--server.port=8501",
             "--server.headless=true"
         ])
-        
+
         # Wait a bit for the server to start
         time.sleep(5)
-        
+
         # Open the browser
         webbrowser.open("http://localhost:8501")
-        
+
         print("✅ Dashboard launched successfully!")
         print("💡 Press Ctrl+C in this terminal to stop the dashboard")
-        
+
         return dashboard_process
-        
+
     except Exception as e:
         print(f"❌ Error launching dashboard: {e}")
         print("💡 You can manually run: streamlit run dashboard.py")
         return None
 
-def main():
+def cmd_init_db(args):
+    StudentDatabase = load('database', 'StudentDatabase')
+    if StudentDatabase is None:
+        return False
+    print("\n🗃️ Initializing database...")
+    db = StudentDatabase()
+    db.generate_sample_data(args.students)
+    print("✅ Database initialized successfully!")
+    return True
+
+def cmd_train(args):
+    DropoutPredictor = load('ml_model', 'DropoutPredictor')
+    if DropoutPredictor is None:
+        return False
+    if getattr(args, 'cohorts', False):
+        from cohort_models import CohortModels
+        print("\n🤖 Training global and per-cohort models...")
+        results = CohortModels().train()
+        for cohort_id, students, accuracy, global_accuracy in results:
+            print(f"   {cohort_id}: {students} students, accuracy {accuracy:.3f} (global model {global_accuracy:.3f})")
+        print(f"✅ Trained {len(results)} cohort models")
+        return True
+    print("\n🤖 Training ML model...")
+    predictor = DropoutPredictor()
+    accuracy = predictor.train_model()
+    print(f"✅ Model training completed with accuracy: {accuracy:.2f}")
+    return True
+
+def cmd_predict(args):
+    DropoutPredictor = load('ml_model', 'DropoutPredictor')
+    if DropoutPredictor is None:
+        return False
+    print("\n📊 Running risk predictions...")
+    predictor = DropoutPredictor(use_cohorts=getattr(args, 'cohorts', None) or None)
+    predictions = predictor.predict_risk()
+    predictor.save_predictions_to_db(predictions)
+    print(f"✅ Risk assessment completed for {len(predictions)} students")
+    return True
+
+def cmd_notify(args):
+    NotificationSystem = load('notification_system', 'NotificationSystem')
+    if NotificationSystem is None:
+        return False
+    print("\n📧 Sending notifications...")
+    notifier = NotificationSystem()
+    count = notifier.send_notifications()
+    print(f"✅ Notifications generated: {count}")
+    return True
+
+def cmd_dispatch(args):
+    NotificationDispatcher = load('notification_outbox', 'NotificationDispatcher')
+    if NotificationDispatcher is None:
+        return False
+    print("\n📤 Dispatching queued notifications...")
+    dispatcher = NotificationDispatcher()
+    totals = dispatcher.dispatch()
+    print(f"✅ Notifications sent: {totals['SENT']}")
+    return True
+
+def cmd_export(args):
+    DataExporter = load('data_export', 'DataExporter')
+    if DataExporter is None:
+        return False
+    from data_export import EXPORT_FORMATS as FORMAT_INFO
+    print(f"\n📤 Exporting {args.dataset} as {args.format}...")
+    output = args.output or f"{args.dataset}{FORMAT_INFO[args.format][1]}"
+    written = DataExporter().export_to_file(args.dataset, output, args.format)
+    print(f"✅ Exported {written:,} bytes to {output}")
+    return True
+
+def cmd_schedule(args):
+    PipelineScheduler = load('pipeline_scheduler', 'PipelineScheduler')
+    if PipelineScheduler is None:
+        return False
+    print("\n🕒 Running pipeline scheduler...")
+    from config import OBSERVABILITY_CONFIG
+    if OBSERVABILITY_CONFIG['metrics_port'] and not args.once:
+        from instrumentation import metrics
+        metrics.serve_metrics()
+    scheduler = PipelineScheduler()
+    if args.once:
+        results = scheduler.run_once()
+        for stage, status in results.items():
+            print(f"   {stage}: {status}")
+    else:
+        scheduler.run_forever()
+    return True
+
+def cmd_shards(args):
+    ShardCatalog = load('shards', 'ShardCatalog')
+    if ShardCatalog is None:
+        return False
+    from shards import ShardRunner
+    catalog = ShardCatalog()
+    runner = ShardRunner(catalog, max_workers=args.workers)
+    institutions = args.institutions or None
+
+    if args.action == 'add':
+        for institution_id in args.institutions:
+            db_path = catalog.register(institution_id, db_path=args.db)
+            print(f"✅ Registered {institution_id} at {db_path}")
+    elif args.action == 'list':
+        for institution_id, db_path, model_path in catalog.list_shards():
+            print(f"   {institution_id}: {db_path} (model {model_path})")
+    elif args.action == 'train':
+        print("\n🤖 Training shard models...")
+        if args.global_model:
+            runner.train_global_model(institutions)
+        else:
+            runner.train_all(institutions)
+    elif args.action == 'predict':
+        print("\n📊 Scoring shards...")
+        results = runner.predict_all(institutions, use_global_model=args.global_model)
+        scored = sum(r['result'] for r in results.values() if r['status'] == 'SUCCESS')
+        print(f"✅ Risk assessment completed for {scored} students across {len(results)} shards")
+    elif args.action == 'notify':
+        print("\n📧 Generating notifications per shard...")
+        runner.notify_all(institutions)
+    return True
+
+def cmd_api(args):
+    run_api = load('risk_api', 'run_api')
+    if run_api is None:
+        return False
+    run_api(host=args.host, port=args.port)
+    return True
+
+def cmd_ingest(args):
+    EventIngestor = load('event_ingestion', 'EventIngestor')
+    if EventIngestor is None:
+        return False
+    import json
+    ingestor = EventIngestor()
+    recorders = {
+        'attendance': ingestor.record_attendance,
+        'test_score': ingestor.record_test_score,
+        'fee_payment': ingestor.record_fee_payment,
+    }
+    print("\n📥 Ingesting events...")
+    source = sys.stdin if args.events == '-' else open(args.events)
+    count = 0
+    ingestor.start()
+    try:
+        # One JSON object per line: {"event": "attendance", "student_id": ..., ...}
+        for line in source:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            recorders[event.pop('event')](**event)
+            count += 1
+    finally:
+        ingestor.stop()
+        if source is not sys.stdin:
+            source.close()
+    print(f"✅ Ingested {count} events")
+    return True
+
+def cmd_retention(args):
+    RetentionManager = load('retention', 'RetentionManager')
+    if RetentionManager is None:
+        return False
+    manager = RetentionManager()
+    if args.dry_run:
+        print("\n🗄️ Rows past their retention window:")
+        for table, rows in manager.count_expired().items():
+            print(f"   {table}: {rows:,} (older than {manager.cutoff(table)})")
+        return True
+    if args.convert:
+        manager.convert_to_incremental()
+    print("\n🗄️ Applying retention policies...")
+    manager.run()
+    return True
+
+def cmd_dashboard(args):
+    launch_dashboard()
+    return True
+
+def cmd_setup(args):
+    """Run the complete backend pipeline once"""
+    print("Running complete setup...")
+    try:
+        print("\n1️⃣ Step 1: Initializing database...")
+        if not run_command('init-db', cmd_init_db, args):
+            return False
+
+        print("\n2️⃣ Step 2: Training ML model...")
+        if not run_command('train', cmd_train, args):
+            return False
+
+        print("\n3️⃣ Step 3: Running predictions...")
+        if not run_command('predict', cmd_predict, args):
+            return False
+
+        print("\n4️⃣ Step 4: Generating notifications...")
+        try:
+            run_command('notify', cmd_notify, args)
+        except Exception as e:
+            print(f"⚠️  Skipping notifications: {e}")
+
+        print("\n5️⃣ Step 5: Launching dashboard...")
+        print("🎉 All backend processes completed successfully!")
+        print("💡 Now run the dashboard separately with: streamlit run dashboard.py")
+        return True
+
+    except Exception as e:
+        print(f"\n❌ Error during setup: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+
+def run_command(name, handler, args, profile=True):
+    """Run a command handler inside an instrumentation stage"""
+    from instrumentation import stage
+    with stage(name, profile=profile):
+        return handler(args)
+
+def finish(args):
+    """Flush metrics collected during the command"""
+    from instrumentation import metrics
+    path = metrics.write_metrics_file()
+    if path:
+        print(f"📈 Metrics written to {path}")
+
+def add_profile_argument(parser, default=False):
+    parser.add_argument('--profile', action='store_true', default=default, help='Write a cProfile dump per stage')
+    parser.add_argument('--profile-dir', default=None if default is False else default,
+                        help='Directory for profile dumps (defaults to config.py)')
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Student Dropout Prediction System')
+    add_profile_argument(parser)
+
+    # Also accepted after the command; SUPPRESS keeps the top-level value when omitted
+    common = argparse.ArgumentParser(add_help=False)
+    add_profile_argument(common, default=argparse.SUPPRESS)
+
+    subparsers = parser.add_subparsers(dest='command', metavar='COMMAND')
+    add_command = lambda name, **kwargs: subparsers.add_parser(name, parents=[common], **kwargs)
+
+    init_db = add_command('init-db', help='Initialize database with sample data')
+    init_db.add_argument('--students', type=int, default=20, help='Number of sample students')
+    init_db.set_defaults(handler=cmd_init_db)
+
+    train = add_command('train', help='Train the ML model')
+    train.add_argument('--cohorts', action='store_true', help='Also train one model per mentor cohort in parallel')
+    train.set_defaults(handler=cmd_train)
+    predict = add_command('predict', help='Run predictions')
+    predict.add_argument('--cohorts', action='store_true', help='Score with cohort models (default from config.py)')
+    predict.set_defaults(handler=cmd_predict)
+    add_command('notify', help='Generate notifications').set_defaults(handler=cmd_notify)
+    add_command('dispatch', help='Send queued notifications from the outbox').set_defaults(handler=cmd_dispatch)
+
+    export = add_command('export', help='Export a dataset to a file')
+    export.add_argument('dataset', help='risk_assessments, features or notifications')
+    export.add_argument('--format', default='csv', choices=EXPORT_FORMATS, help='Export file format')
+    export.add_argument('--output', help='Export file path (defaults to DATASET plus the format extension)')
+    export.set_defaults(handler=cmd_export)
+
+    schedule = add_command('schedule', help='Run the pipeline scheduler until interrupted')
+    schedule.add_argument('--once', action='store_true', help='Run one scheduler pass over due stages')
+    schedule.set_defaults(handler=cmd_schedule)
+
+    shards = add_command('shards', help='Manage campus shards and run the pipeline across them')
+    shards.add_argument('action', choices=['add', 'list', 'train', 'predict', 'notify'])
+    shards.add_argument('institutions', nargs='*', help='Institution ids (default: every registered shard)')
+    shards.add_argument('--db', help='Database path for `add` (defaults to the shard directory)')
+    shards.add_argument('--global-model', action='store_true',
+                        help='Train on merged shard samples, or score every shard with that model')
+    shards.add_argument('--workers', type=int, help='Worker processes (defaults to config.py)')
+    shards.set_defaults(handler=cmd_shards)
+
+    api = add_command('api', help='Serve the risk HTTP API')
+    api.add_argument('--host', help='Bind address (defaults to config.py)')
+    api.add_argument('--port', type=int, help='Port (defaults to config.py)')
+    api.set_defaults(handler=cmd_api)
+
+    ingest = add_command('ingest', help='Record events from a JSON-lines file and rescore affected students')
+    ingest.add_argument('events', help="JSON-lines file of events, or '-' for stdin")
+    ingest.set_defaults(handler=cmd_ingest)
+
+    retention = add_command('retention', help='Fold expired rows into monthly summaries and reclaim space')
+    retention.add_argument('--dry-run', action='store_true', help='Only count the rows that would expire')
+    retention.add_argument('--convert', action='store_true',
+                           help='Switch an existing database to incremental auto-vacuum first (full VACUUM)')
+    retention.set_defaults(handler=cmd_retention)
+
+    add_command('dashboard', help='Launch dashboard').set_defaults(handler=cmd_dashboard)
+
+    setup = add_command('setup', help='Initialize, train, predict and notify in one go')
+    setup.add_argument('--students', type=int, default=30, help='Number of sample students')
+    setup.set_defaults(handler=cmd_setup)
+    return parser
+
+def build_legacy_parser():
+    """The pre-subcommand flags, kept so existing cron jobs keep working"""
     parser = argparse.ArgumentParser(description='Student Dropout Prediction System')
     parser.add_argument('--init-db', action='store_true', help='Initialize database with sample data')
     parser.add_argument('--train-model', action='store_true', help='Train the ML model')
     parser.add_argument('--predict', action='store_true', help='Run predictions')
     parser.add_argument('--notify', action='store_true', help='Send notifications')
+    parser.add_argument('--dispatch', action='store_true', help='Send queued notifications from the outbox')
     parser.add_argument('--dashboard', action='store_true', help='Launch dashboard')
-    
-    args = parser.parse_args()
-    
-    require_notifications = args.notify
-    
-    if not import_modules(require_notifications):
-        print("\n❌ Please fix the import errors first.")
-        return
-    
-    from database import StudentDatabase
-    from ml_model import DropoutPredictor
-    
-    if args.init_db:
-        print("\n🗃️ Initializing database...")
-        db = StudentDatabase()
-        db.generate_sample_data(20)
-        print("✅ Database initialized successfully!")
-    
-    if args.train_model:
-        print("\n🤖 Training ML model...")
-        predictor = DropoutPredictor()
-        accuracy = predictor.train_model()
-        print(f"✅ Model training completed with accuracy: {accuracy:.2f}")
-    
-    if args.predict:
-        print("\n📊 Running risk predictions...")
-        predictor = DropoutPredictor()
-        predictions = predictor.predict_risk()
-        predictor.save_predictions_to_db(predictions)
-        print(f"✅ Risk assessment completed for {len(predictions)} students")
-    
-    if args.notify:
-        print("\n📧 Sending notifications...")
-        from notification_system import NotificationSystem
-        notifier = NotificationSystem()
-        count = notifier.send_notifications()
-        print(f"✅ Notifications generated: {count}")
-    
-    if args.dashboard:
-        launch_dashboard()
+    parser.add_argument('--export', metavar='DATASET', help='Export risk_assessments, features or notifications')
+    parser.add_argument('--format', default='csv', choices=EXPORT_FORMATS, help='Export file format')
+    parser.add_argument('--output', help='Export file path (defaults to DATASET plus the format extension)')
+    parser.add_argument('--schedule', action='store_true', help='Run the pipeline scheduler until interrupted')
+    parser.add_argument('--schedule-once', action='store_true', help='Run one scheduler pass over due stages')
+    add_profile_argument(parser)
+    return parser
+
+def run_legacy(argv):
+    args = build_legacy_parser().parse_args(argv)
+    enable_requested_profiling(args)
+    args.students = 20
+    args.dataset = args.export
+    args.once = args.schedule_once
+
+    # Same order the flags always ran in
+    steps = [
+        (args.init_db, 'init-db', cmd_init_db),
+        (args.train_model, 'train', cmd_train),
+        (args.predict, 'predict', cmd_predict),
+        (args.notify, 'notify', cmd_notify),
+        (args.dispatch, 'dispatch', cmd_dispatch),
+        (bool(args.export), 'export', cmd_export),
+        (args.schedule or args.schedule_once, 'schedule', cmd_schedule),
+        (args.dashboard, 'dashboard', cmd_dashboard),
+    ]
+    try:
+        for selected, name, handler in steps:
+            if selected and not run_command(name, handler, args):
+                print("\n❌ Please fix the import errors first.")
+                return False
+        return True
+    finally:
+        finish(args)
+
+def enable_requested_profiling(args):
+    if args.profile:
+        from instrumentation import enable_profiling
+        enable_profiling(args.profile_dir)
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    if argv and argv[0].startswith('--') and argv[0] not in ('--help', '--profile'):
+        return run_legacy(argv)
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        args = parser.parse_args(argv + ['setup'])
+    enable_requested_profiling(args)
+    try:
+        # setup profiles each of its steps separately
+        succeeded = run_command(args.command, args.handler, args, profile=args.command != 'setup')
+    finally:
+        finish(args)
+    if not succeeded:
+        print("\n💡 Try running individual components:")
+        print("   python main.py init-db")
+        print("   python main.py train")
+        print("   python main.py predict")
+        print("   streamlit run dashboard.py")
+        return False
+    return True
 
 if __name__ == "__main__":
     print("🎓 Student Dropout Prediction System")
     print("=" * 50)
-    
-    if len(sys.argv) == 1:
-        print("Running complete setup...")
-        
-        if not import_modules(require_notifications=True):
-            print("\n❌ Please fix import errors before running the complete system.")
-            print("\n💡 Try running individual components:")
-            print("   python main.py --init-db")
-            print("   python main.py --train-model") 
-            print("   python main.py --predict")
-            print("   streamlit run dashboard.py")
-            sys.exit(1)
-        
-        try:
-            from database import StudentDatabase
-            from ml_model import DropoutPredictor
-            
-            print("\n1️⃣ Step 1: Initializing database...")
-            db = StudentDatabase()
-            db.generate_sample_data(30)
-            
-            print("\n2️⃣ Step 2: Training ML model...")
-            predictor = DropoutPredictor()
-            accuracy = predictor.train_model()
-            
-            print("\n3️⃣ Step 3: Running predictions...")
-            predictions = predictor.predict_risk()
-            predictor.save_predictions_to_db(predictions)
-            print(f"✅ Predictions saved for {len(predictions)} students")
-            
-            print("\n4️⃣ Step 4: Generating notifications...")
-            try:
-                from notification_system import NotificationSystem
-                notifier = NotificationSystem()
-                count = notifier.send_notifications()
-                print(f"✅ Notifications generated: {count}")
-            except Exception as e:
-                print(f"⚠️  Skipping notifications: {e}")
-            
-            print("\n5️⃣ Step 5: Launching dashboard...")
-            print("🎉 All backend processes completed successfully!")
-            print("💡 Now run the dashboard separately with: streamlit run dashboard.py")
-            
-        except Exception as e:
-            print(f"\n❌ Error during setup: {e}")
-            import traceback
-            traceback.print_exc()
-            print("\n💡 Try running individual components:")
-            print("   python main.py --init-db")
-            print("   python main.py --train-model")
-            print("   python main.py --predict")
-            print("   streamlit run dashboard.py")
-    else:
-        main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
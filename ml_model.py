@@ -1,11 +1,15 @@
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, accuracy_score
 import joblib
 import sqlite3
 from datetime import datetime
+from risk_summary import RiskSummaryWriter
+from risk_history import RiskHistory
+from prediction_runs import PredictionRunPublisher
+from instrumentation import span
+from config import ML_MODEL_CONFIG
+from schema_types import RISK_SCHEMA, apply_schema, assessment_frame, model_matrix, sql_values
 
 # Import DataProcessor
 try:
@@ -16,7 +20,7 @@ except ImportError:
         def __init__(self, db_name="student_database.db"):
             self.db_name = db_name
         
-        def prepare_features(self):
+        def prepare_features(self, student_ids=None):
             """Simple feature preparation for testing"""
             import sqlite3
             try:
@@ -24,6 +28,8 @@ except ImportError:
                 students_query = "SELECT student_id FROM students"
                 students_df = pd.read_sql_query(students_query, conn)
                 conn.close()
+                if student_ids is not None:
+                    students_df = students_df[students_df['student_id'].isin(student_ids)]
                 
                 if students_df.empty:
                     return self._create_sample_features()
@@ -57,12 +63,23 @@ except ImportError:
             return features
 
 class DropoutPredictor:
-    def __init__(self, db_name="student_database.db"):
+    def __init__(self, db_name="student_database.db", model_path=None, use_cohorts=None, train_if_missing=True):
         self.db_name = db_name
+        # Each shard keeps its own model file next to its database
+        self.model_path = model_path or ML_MODEL_CONFIG['model_path']
+        # Shared models (the global shard model, the API's) must never be trained implicitly
+        self.train_if_missing = train_if_missing
         self.model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.is_trained = False
+        if use_cohorts is None:
+            use_cohorts = ML_MODEL_CONFIG['cohort_models']
+        self.cohorts = None
+        if use_cohorts:
+            from cohort_models import CohortModels
+            self.cohorts = CohortModels(db_name)
     
-    def generate_training_labels(self, features):
+    @staticmethod
+    def generate_training_labels(features):
         """Generate synthetic labels for training based on risk factors"""
         labels = []
         for _, row in features.iterrows():
@@ -83,11 +100,15 @@ class DropoutPredictor:
         
         return np.array(labels)
     
-    def train_model(self):
-        """Train the dropout prediction model"""
+    def train_model(self, features=None):
+        """Train the dropout prediction model, from this database unless features are given"""
+        # Evaluation helpers are only needed here, not on the scoring path
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import classification_report, accuracy_score
         try:
-            processor = DataProcessor(self.db_name)
-            features = processor.prepare_features()
+            if features is None:
+                processor = DataProcessor(self.db_name)
+                features = processor.prepare_features()
             
             if features.empty:
                 print("No features available for training. Using sample data.")
@@ -101,12 +122,14 @@ class DropoutPredictor:
                 print(f"Missing columns: {missing_columns}. Creating sample data.")
                 features = self._create_sample_features()
             
-            X = features[feature_columns].fillna(0)
+            X = model_matrix(features, feature_columns)
             y = self.generate_training_labels(features)
             
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
             
-            self.model.fit(X_train, y_train)
+            with span('model.fit') as fields:
+                self.model.fit(X_train, y_train)
+                fields['rows'] = len(X_train)
             
             y_pred = self.model.predict(X_test)
             accuracy = accuracy_score(y_test, y_pred)
@@ -115,7 +138,7 @@ class DropoutPredictor:
             print(classification_report(y_test, y_pred))
             
             self.is_trained = True
-            joblib.dump(self.model, 'dropout_model.pkl')
+            joblib.dump(self.model, self.model_path)
             
             return accuracy
             
@@ -147,42 +170,58 @@ class DropoutPredictor:
         y = self.generate_training_labels(features)
         self.model.fit(X, y)
         self.is_trained = True
-        joblib.dump(self.model, 'dropout_model.pkl')
+        joblib.dump(self.model, self.model_path)
         print("Model trained with sample data successfully!")
         return 0.85
     
-    def predict_risk(self):  # THIS IS THE MISSING METHOD!
-        """Predict dropout risk for all students"""
+    def predict_risk(self, student_ids=None):  # THIS IS THE MISSING METHOD!
+        """Predict dropout risk for all students, or only for student_ids"""
+        processor = DataProcessor(self.db_name)
+        features = processor.prepare_features(student_ids)
+        if features.empty:
+            return features
+        
+        risk_predictions, risk_probabilities = self.score(features)
+        
+        features['dropout_risk'] = risk_probabilities
+        features['at_risk_prediction'] = risk_predictions
+        features['overall_risk_score'] = features['dropout_risk'] * 100
+        
+        scores = features['overall_risk_score']
+        features['risk_level'] = np.select([scores > 70, scores > 40], ['High', 'Medium'], 'Low')
+        
+        features['risk_reasons'] = features.apply(self._generate_risk_reasons, axis=1)
+        
+        return apply_schema(features, RISK_SCHEMA)
+    
+    def score(self, features):
+        """(predictions, dropout probabilities) for feature rows in one batched model call"""
         if not self.is_trained:
             try:
-                self.model = joblib.load('dropout_model.pkl')
+                self.model = joblib.load(self.model_path)
                 self.is_trained = True
             except:
+                if not self.train_if_missing:
+                    raise FileNotFoundError(f"No trained model at {self.model_path}")
                 print("Training model first...")
                 self.train_model()
         
-        processor = DataProcessor(self.db_name)
-        features = processor.prepare_features()
-        
         feature_columns = ['attendance_risk', 'academic_risk', 'financial_risk', 
                           'attendance_percentage', 'avg_score', 'max_attempts']
         
-        X = features[feature_columns].fillna(0)
-        
-        risk_predictions = self.model.predict(X)
-        risk_probabilities = self.model.predict_proba(X)[:, 1]
-        
-        features['dropout_risk'] = risk_probabilities
-        features['at_risk_prediction'] = risk_predictions
-        features['overall_risk_score'] = features['dropout_risk'] * 100
-        
-        features['risk_level'] = features['overall_risk_score'].apply(
-            lambda x: 'High' if x > 70 else 'Medium' if x > 40 else 'Low'
-        )
+        X = model_matrix(features, feature_columns)
         
-        features['risk_reasons'] = features.apply(self._generate_risk_reasons, axis=1)
-        
-        return features
+        with span('model.predict') as fields:
+            if self.cohorts is not None:
+                # Each cohort's students are scored in one batch by that cohort's model
+                risk_predictions, risk_probabilities = self.cohorts.score(features, X, self.model)
+            else:
+                risk_predictions = self.model.predict(X)
+                classes = list(self.model.classes_)
+                # A model trained on single-class labels never predicts dropout
+                risk_probabilities = self.model.predict_proba(X)[:, classes.index(1)] if 1 in classes else np.zeros(len(X))
+            fields['rows'] = len(X)
+        return risk_predictions, risk_probabilities
     
     def _generate_risk_reasons(self, row):
         """Generate human-readable risk reasons"""
@@ -198,25 +237,28 @@ class DropoutPredictor:
         return ", ".join(reasons) if reasons else "No significant risk factors"
     
     def save_predictions_to_db(self, predictions_df):
-        """Save risk predictions to database"""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        
+        """Save risk predictions as a new run and publish it atomically"""
         today = datetime.now().strftime('%Y-%m-%d')
-        cursor.execute("DELETE FROM risk_assessment WHERE assessment_date = ?", (today,))
         
-        for _, row in predictions_df.iterrows():
-            cursor.execute('''
-                INSERT INTO risk_assessment 
-                (student_id, assessment_date, overall_risk_score, risk_level, 
-                 attendance_risk, academic_risk, financial_risk, reasons)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                row['student_id'], today, row['overall_risk_score'], row['risk_level'],
-                row['attendance_risk'] * 100, row['academic_risk'] * 100, 
-                row['financial_risk'] * 100, row['risk_reasons']
-            ))
+        assessments = assessment_frame(predictions_df)
+        if 'mentor_id' in predictions_df.columns:
+            assessments['mentor_id'] = predictions_df['mentor_id']
+        
+        publisher = PredictionRunPublisher(self.db_name)
+        with span('predictions.stage') as fields:
+            run_id = publisher.stage(today, sql_values(assessments, [
+                'student_id', 'overall_risk_score', 'risk_level', 'attendance_risk',
+                'academic_risk', 'financial_risk', 'reasons'
+            ]))
+            fields['rows'] = len(assessments)
+        
+        # Overview aggregates and the compact history become visible together with the run
+        def write_derived_tables(conn):
+            RiskSummaryWriter(self.db_name).write(conn, today, assessments)
+            RiskHistory(self.db_name).record_batch(conn, today, assessments)
         
-        conn.commit()
-        conn.close()
-        print("Risk assessments saved to database")
\ No newline at end of file
+        with span('predictions.publish') as fields:
+            fields['run_id'] = run_id
+            publisher.publish(run_id, on_publish=write_derived_tables)
+        publisher.collect_garbage_async()
+        print(f"Risk assessments saved to database (run {run_id})")
@@ -0,0 +1,115 @@
+import hashlib
+import sqlite3
+from datetime import datetime, timedelta
+from config import NOTIFICATION_CONFIG
+
+RISK_LEVEL_RANK = {'Low': 0, 'Medium': 1, 'High': 2}
+
+# Reason labels written by DropoutPredictor._generate_risk_reasons. The text
+# after each label carries today's figures ("Low attendance (45.6%)"), so
+# only which labels are present goes into the hash.
+REASON_CODES = {
+    'Low attendance': 1,
+    'Poor academic performance': 2,
+    'Multiple test attempts': 4,
+    'Fee payment issues': 8,
+}
+
+def reason_codes(reasons):
+    """Bitmask of the reason labels present in a reasons string"""
+    reasons = reasons or ''
+    return sum(code for label, code in REASON_CODES.items() if label in reasons)
+
+def content_hash(risk_level, reasons):
+    """Stable hash of the risk level and reason codes, ignoring the daily-changing numbers"""
+    return hashlib.sha1(f"{risk_level}|{reason_codes(reasons)}".encode('utf-8')).hexdigest()[:16]
+
+class NotificationDeduplicator:
+    """Suppress alerts that were already sent within the cooldown window.
+
+    History is kept per (student_id, notification_type, content_hash). Within
+    the cooldown an alert is only sent again when the risk level escalated
+    above every level alerted in that window.
+    """
+
+    def __init__(self, db_name="student_database.db", cooldown_days=None):
+        self.db_name = db_name
+        if cooldown_days is None:
+            cooldown_days = NOTIFICATION_CONFIG['cooldown_days'][NOTIFICATION_CONFIG['alert_schedule']]
+        self.cooldown_days = cooldown_days
+        self.init_table()
+
+    def init_table(self):
+        """Create the history table and its lookup index"""
+        conn = sqlite3.connect(self.db_name)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS notification_history (
+                student_id TEXT NOT NULL,
+                notification_type TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                risk_level TEXT,
+                last_sent_date DATE
+            )
+        ''')
+        conn.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_notification_history_key
+            ON notification_history (student_id, notification_type, content_hash)
+        ''')
+        conn.commit()
+        conn.close()
+
+    def filter_new(self, candidates, notification_type):
+        """Return the candidate rows that should generate an alert.
+
+        `candidates` needs student_id, risk_level and reasons columns; the
+        returned frame gains a content_hash column for record_sent().
+        """
+        if candidates.empty:
+            return candidates.assign(content_hash=[])
+
+        candidates = candidates.assign(content_hash=[
+            content_hash(level, reasons)
+            for level, reasons in zip(candidates['risk_level'], candidates['reasons'])
+        ])
+        cutoff = (datetime.now() - timedelta(days=self.cooldown_days)).strftime('%Y-%m-%d')
+
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS dedup_candidates (student_id TEXT PRIMARY KEY)")
+        conn.execute("DELETE FROM dedup_candidates")
+        conn.executemany("INSERT OR IGNORE INTO dedup_candidates VALUES (?)",
+                         ((sid,) for sid in candidates['student_id'].unique()))
+        recent = conn.execute('''
+            SELECT h.student_id, h.content_hash, h.risk_level
+            FROM dedup_candidates c
+            JOIN notification_history h
+              ON h.student_id = c.student_id AND h.notification_type = ?
+            WHERE h.last_sent_date > ?
+        ''', (notification_type, cutoff)).fetchall()
+        conn.close()
+
+        recent_rank = {}
+        for student_id, digest, level in recent:
+            recent_rank[student_id] = max(recent_rank.get(student_id, -1), RISK_LEVEL_RANK.get(level, 0))
+
+        keep = [
+            student_id not in recent_rank or RISK_LEVEL_RANK.get(level, 0) > recent_rank[student_id]
+            for student_id, level in zip(candidates['student_id'], candidates['risk_level'])
+        ]
+
+        filtered = candidates[keep]
+        suppressed = len(candidates) - len(filtered)
+        if suppressed:
+            print(f"Suppressed {suppressed} {notification_type} alerts within the {self.cooldown_days}-day cooldown")
+        return filtered
+
+    def record_sent(self, conn, history_rows, notification_type):
+        """Upsert (student_id, content_hash, risk_level) rows inside the caller's transaction"""
+        today = datetime.now().strftime('%Y-%m-%d')
+        conn.executemany('''
+            INSERT INTO notification_history
+            (student_id, notification_type, content_hash, risk_level, last_sent_date)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (student_id, notification_type, content_hash)
+            DO UPDATE SET risk_level = excluded.risk_level, last_sent_date = excluded.last_sent_date
+        ''', [(student_id, notification_type, digest, level, today)
+              for student_id, digest, level in history_rows])
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# Templates are bound once at import time and reused for every row
+MENTOR_HEADER = "Alert: {count} students under your mentorship require attention:\n\n".format
+MENTOR_LINE = "• {name} ({student_id}) - {level} Risk ({score}/100)\n  Reasons: {reasons}\n\n".format
+MENTOR_FOOTER = "Please schedule counseling sessions and contact guardians if necessary."
+
+GUARDIAN_INTRO = " has been identified as high risk for academic challenges. Current risk score: "
+GUARDIAN_CLOSING = "\n\nPlease contact the student's mentor to discuss support strategies."
+
+def format_scores(scores):
+    """Format risk scores with one decimal place in a single vectorized pass"""
+    return np.char.mod('%.1f', np.asarray(scores, dtype=float))
+
+class DigestBuilder:
+    """Render mentor digests and guardian messages from an at-risk frame"""
+
+    def build_mentor_digests(self, at_risk_students):
+        """Group students by mentor once and render one digest per mentor"""
+        if at_risk_students.empty:
+            return []
+
+        # A stable sort keeps each mentor's students in their original order
+        ordered = at_risk_students.sort_values('mentor_id', kind='stable')
+        mentor_ids = ordered['mentor_id'].to_numpy()
+        lines = [
+            MENTOR_LINE(name=name, student_id=student_id, level=level, score=score, reasons=reasons)
+            for name, student_id, level, score, reasons in zip(
+                ordered['student_name'].to_numpy(),
+                ordered['student_id'].to_numpy(),
+                ordered['risk_level'].to_numpy(),
+                format_scores(ordered['overall_risk_score']),
+                ordered['reasons'].to_numpy()
+            )
+        ]
+
+        # Group boundaries are the positions where the mentor id changes
+        boundaries = np.flatnonzero(mentor_ids[1:] != mentor_ids[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(mentor_ids)]))
+
+        notifications = []
+        for start, end in zip(starts, ends):
+            count = int(end - start)
+            notifications.append({
+                'mentor_id': mentor_ids[start],
+                'message': "".join([MENTOR_HEADER(count=count), *lines[start:end], MENTOR_FOOTER]),
+                'student_count': count
+            })
+        return notifications
+
+    def build_guardian_messages(self, high_risk_students):
+        """Render every guardian message with column-wise string operations"""
+        if high_risk_students.empty:
+            return pd.Series([], dtype=object)
+
+        names = high_risk_students['student_name'].astype(str)
+        scores = pd.Series(format_scores(high_risk_students['overall_risk_score']),
+                           index=high_risk_students.index)
+        return (
+            "Dear " + high_risk_students['guardian_name'].astype(str) + ",\n\n"
+            + "We would like to inform you that " + names + GUARDIAN_INTRO
+            + scores + "/100.\n\n"
+            + "Primary concerns: " + high_risk_students['reasons'].astype(str)
+            + GUARDIAN_CLOSING
+        )
@@ -0,0 +1,204 @@
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timedelta
+from config import NOTIFICATION_CONFIG
+from instrumentation import increment
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+SUBJECTS = {
+    'MENTOR_ALERT': 'Student risk alert',
+    'GUARDIAN_ALERT': 'Important update about your ward'
+}
+
+class NotificationDispatcher:
+    """Sends PENDING notifications from the outbox table.
+
+    Rows move PENDING -> CLAIMED -> SENDING -> SENT. A failed send goes back
+    to PENDING with an exponential backoff until max_send_attempts, then FAILED.
+    Each state change is committed before the next step, so after a crash
+    CLAIMED rows are safely re-queued while SENDING rows (which may already
+    have reached the mail server) are marked FAILED instead of being resent.
+    Every change after the claim is conditional on the batch's claim_token,
+    so a worker whose claim was recovered and re-claimed elsewhere stops
+    instead of sending a duplicate.
+    """
+
+    def __init__(self, db_name="student_database.db", sender=None, config=None):
+        self.db_name = db_name
+        self.config = dict(NOTIFICATION_CONFIG, **(config or {}))
+        if sender is None:
+            from email_sender import send_email
+            sender = send_email
+        self.sender = sender
+        self.worker_id = uuid.uuid4().hex
+
+    def _now(self):
+        return datetime.now()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def recover_stale_claims(self):
+        """Release claims left behind by a dispatcher that died mid-batch"""
+        cutoff = (self._now() - timedelta(seconds=self.config['claim_timeout_seconds'])).strftime(TIMESTAMP_FORMAT)
+        conn = self._connect()
+        with conn:
+            requeued = conn.execute('''
+                UPDATE notifications
+                SET status = 'PENDING', claim_token = NULL, claimed_at = NULL
+                WHERE status = 'CLAIMED' AND claimed_at < ?
+            ''', (cutoff,)).rowcount
+            abandoned = conn.execute('''
+                UPDATE notifications
+                SET status = 'FAILED', claim_token = NULL,
+                    last_error = 'Interrupted during send; not retried to avoid a duplicate'
+                WHERE status = 'SENDING' AND claimed_at < ?
+            ''', (cutoff,)).rowcount
+        conn.close()
+        if requeued or abandoned:
+            print(f"Recovered stale claims: {requeued} re-queued, {abandoned} marked FAILED")
+        return requeued, abandoned
+
+    def claim_batch(self, batch_size=None):
+        """Atomically claim a batch of due PENDING rows for this worker"""
+        batch_size = batch_size or self.config['dispatch_batch_size']
+        now = self._now().strftime(TIMESTAMP_FORMAT)
+        token = f"{self.worker_id}:{uuid.uuid4().hex[:8]}"
+
+        conn = self._connect()
+        with conn:
+            conn.execute('''
+                UPDATE notifications
+                SET status = 'CLAIMED', claim_token = ?, claimed_at = ?
+                WHERE id IN (
+                    SELECT id FROM notifications
+                    WHERE status = 'PENDING'
+                    AND (next_attempt_at IS NULL OR next_attempt_at <= ?)
+                    ORDER BY status, next_attempt_at, id
+                    LIMIT ?
+                )
+            ''', (token, now, now, batch_size))
+            rows = conn.execute('''
+                SELECT id, notification_type, recipient, message, attempts, claim_token
+                FROM notifications
+                WHERE claim_token = ? AND status = 'CLAIMED'
+                ORDER BY id
+            ''', (token,)).fetchall()
+        conn.close()
+        return [dict(row) for row in rows]
+
+    def _mark_sending(self, conn, notification_id, claim_token):
+        """Move a row we still hold from CLAIMED to SENDING; False if the claim was lost"""
+        with conn:
+            return conn.execute('''
+                UPDATE notifications SET status = 'SENDING', claimed_at = ?
+                WHERE id = ? AND claim_token = ? AND status = 'CLAIMED'
+            ''', (self._now().strftime(TIMESTAMP_FORMAT), notification_id, claim_token)).rowcount == 1
+
+    def _mark_sent(self, conn, notification_id, claim_token, attempts):
+        with conn:
+            return conn.execute('''
+                UPDATE notifications
+                SET status = 'SENT', sent_at = ?, attempts = ?, claim_token = NULL, last_error = NULL
+                WHERE id = ? AND claim_token = ? AND status = 'SENDING'
+            ''', (self._now().strftime(TIMESTAMP_FORMAT), attempts, notification_id, claim_token)).rowcount == 1
+
+    def _mark_failed_attempt(self, conn, notification_id, claim_token, attempts, error, retryable=True):
+        """Re-queue with backoff or mark FAILED; returns the new status, or None if the claim was lost"""
+        if retryable and attempts < self.config['max_send_attempts']:
+            delay = self.config['retry_base_seconds'] * (2 ** (attempts - 1))
+            next_attempt = (self._now() + timedelta(seconds=delay)).strftime(TIMESTAMP_FORMAT)
+            status = 'PENDING'
+        else:
+            next_attempt = None
+            status = 'FAILED'
+        with conn:
+            updated = conn.execute('''
+                UPDATE notifications
+                SET status = ?, attempts = ?, next_attempt_at = COALESCE(?, next_attempt_at),
+                    claim_token = NULL, claimed_at = NULL, last_error = ?
+                WHERE id = ? AND claim_token = ? AND status IN ('CLAIMED', 'SENDING')
+            ''', (status, attempts, next_attempt, error, notification_id, claim_token)).rowcount
+        return status if updated else None
+
+    def send_batch(self, batch):
+        """Send a claimed batch, pacing sends to send_rate_per_minute"""
+        counts = {'SENT': 0, 'PENDING': 0, 'FAILED': 0}
+        interval = 60.0 / self.config['send_rate_per_minute'] if self.config['send_rate_per_minute'] else 0
+        next_send = time.monotonic()
+
+        conn = self._connect()
+        try:
+            for notification in batch:
+                attempts = (notification['attempts'] or 0) + 1
+                token = notification['claim_token']
+                if not notification['recipient']:
+                    if self._mark_failed_attempt(conn, notification['id'], token, attempts,
+                                                 'No recipient address', retryable=False):
+                        counts['FAILED'] += 1
+                    continue
+
+                wait = next_send - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                next_send = max(next_send, time.monotonic()) + interval
+
+                if not self._mark_sending(conn, notification['id'], token):
+                    # Our claim timed out and the row was re-queued; whoever holds it now sends it
+                    increment('outbox_claims_lost')
+                    continue
+                try:
+                    sent = self.sender(
+                        notification['recipient'],
+                        SUBJECTS.get(notification['notification_type'], 'Student notification'),
+                        notification['message']
+                    )
+                    error = None if sent else 'Email sender reported failure'
+                except Exception as e:
+                    sent, error = False, str(e)
+
+                if sent:
+                    self._mark_sent(conn, notification['id'], token, attempts)
+                    counts['SENT'] += 1
+                else:
+                    status = self._mark_failed_attempt(conn, notification['id'], token, attempts, error)
+                    if status:
+                        counts[status] += 1
+        finally:
+            conn.close()
+        for status, count in counts.items():
+            increment('outbox_messages', count, status=status)
+        return counts
+
+    def dispatch(self, max_batches=None):
+        """Drain the outbox batch by batch until nothing is due"""
+        self.recover_stale_claims()
+        totals = {'SENT': 0, 'PENDING': 0, 'FAILED': 0}
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            batch = self.claim_batch()
+            if not batch:
+                break
+            for status, count in self.send_batch(batch).items():
+                totals[status] += count
+            batches += 1
+
+        print(f"Dispatched {batches} batches: {totals['SENT']} sent, "
+              f"{totals['PENDING']} scheduled for retry, {totals['FAILED']} failed")
+        return totals
+
+    def get_status_counts(self):
+        """Return the number of outbox rows per status"""
+        conn = self._connect()
+        rows = conn.execute("SELECT status, COUNT(*) FROM notifications GROUP BY status").fetchall()
+        conn.close()
+        return {row[0]: row[1] for row in rows}
+
+# Test the class
+if __name__ == "__main__":
+    dispatcher = NotificationDispatcher()
+    print(dispatcher.get_status_counts())
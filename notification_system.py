@@ -1,51 +1,55 @@
 import sqlite3
 from datetime import datetime
-from email_sender import send_email
+from config import NOTIFICATION_CONFIG
+from notification_digest import DigestBuilder
+from notification_dedup import NotificationDeduplicator
+from prediction_runs import CURRENT_RUN_SQL
+from date_utils import today_day
+from database import ensure_day_columns
+from schema_types import RISK_SCHEMA
+from columnar_reader import read_frame
 import pandas as pd
 
 class NotificationSystem:
     def __init__(self, db_name="student_database.db"):
         self.db_name = db_name
+        ensure_day_columns(db_name)
+        self.digest_builder = DigestBuilder()
+        self.deduplicator = NotificationDeduplicator(db_name)
     
     def generate_mentor_notifications(self):
         """Generate notifications for mentors about at-risk students"""
         try:
             conn = sqlite3.connect(self.db_name)
             
-            query = '''
+            query = f'''
                 SELECT r.student_id, s.name as student_name, s.mentor_id, 
                        r.overall_risk_score, r.risk_level, r.reasons
                 FROM risk_assessment r
                 JOIN students s ON r.student_id = s.student_id
-                WHERE r.risk_level IN ('High', 'Medium')
-                AND r.assessment_date = date('now')
+                WHERE r.run_id = {CURRENT_RUN_SQL}
+                AND r.risk_level IN ('High', 'Medium')
+                AND r.assessment_day = ?
             '''
             
-            at_risk_students = pd.read_sql_query(query, conn)
+            at_risk_students = read_frame(conn, query, [today_day()], schema=RISK_SCHEMA)
             conn.close()
             
             if at_risk_students.empty:
                 print("No at-risk students found for mentor notifications.")
                 return []
             
-            notifications = []
-            for mentor_id in at_risk_students['mentor_id'].unique():
-                mentor_students = at_risk_students[at_risk_students['mentor_id'] == mentor_id]
-                
-                message = f"Alert: {len(mentor_students)} students under your mentorship require attention:\n\n"
-                
-                for _, student in mentor_students.iterrows():
-                    message += f"• {student['student_name']} ({student['student_id']}) - "
-                    message += f"{student['risk_level']} Risk ({student['overall_risk_score']:.1f}/100)\n"
-                    message += f"  Reasons: {student['reasons']}\n\n"
-                
-                message += "Please schedule counseling sessions and contact guardians if necessary."
-                
-                notifications.append({
-                    'mentor_id': mentor_id,
-                    'message': message,
-                    'student_count': len(mentor_students)
-                })
+            # Students without a mentor have nobody to alert
+            at_risk_students = at_risk_students[at_risk_students['mentor_id'].notna()]
+            at_risk_students = self.deduplicator.filter_new(at_risk_students, 'MENTOR_ALERT')
+            notifications = self.digest_builder.build_mentor_digests(at_risk_students)
+            
+            history = {
+                mentor_id: list(zip(group['student_id'], group['content_hash'], group['risk_level']))
+                for mentor_id, group in at_risk_students.groupby('mentor_id', sort=False)
+            }
+            for notification in notifications:
+                notification['history'] = history[notification['mentor_id']]
             
             return notifications
             
@@ -58,38 +62,42 @@ class NotificationSystem:
         try:
             conn = sqlite3.connect(self.db_name)
             
-            query = '''
+            query = f'''
                 SELECT s.student_id, s.name as student_name, s.guardian_name, 
-                       s.guardian_phone, r.overall_risk_score, r.risk_level, r.reasons
+                       s.guardian_phone, s.guardian_email, r.overall_risk_score, r.risk_level, r.reasons
                 FROM risk_assessment r
                 JOIN students s ON r.student_id = s.student_id
-                WHERE r.risk_level = 'High'
-                AND r.assessment_date = date('now')
+                WHERE r.run_id = {CURRENT_RUN_SQL}
+                AND r.risk_level = 'High'
+                AND r.assessment_day = ?
             '''
             
-            high_risk_students = pd.read_sql_query(query, conn)
+            high_risk_students = read_frame(conn, query, [today_day()], schema=RISK_SCHEMA)
             conn.close()
             
             if high_risk_students.empty:
                 print("No high-risk students found for guardian notifications.")
                 return []
             
-            notifications = []
-            for _, student in high_risk_students.iterrows():
-                message = f"Dear {student['guardian_name']},\n\n"
-                message += f"We would like to inform you that {student['student_name']} has been "
-                message += f"identified as high risk for academic challenges. "
-                message += f"Current risk score: {student['overall_risk_score']:.1f}/100.\n\n"
-                message += f"Primary concerns: {student['reasons']}\n\n"
-                message += "Please contact the student's mentor to discuss support strategies."
-                
-                notifications.append({
-                    'guardian_name': student['guardian_name'],
-                    'guardian_phone': student['guardian_phone'],
-                    'student_name': student['student_name'],
-                    'student_id': student['student_id'],
-                    'message': message
-                })
+            high_risk_students = self.deduplicator.filter_new(high_risk_students, 'GUARDIAN_ALERT')
+            if high_risk_students.empty:
+                return []
+            
+            messages = self.digest_builder.build_guardian_messages(high_risk_students)
+            notifications = pd.DataFrame({
+                'guardian_name': high_risk_students['guardian_name'],
+                'guardian_phone': high_risk_students['guardian_phone'],
+                'guardian_email': high_risk_students['guardian_email'],
+                'student_name': high_risk_students['student_name'],
+                'student_id': high_risk_students['student_id'],
+                'message': messages,
+                'history': [
+                    [(student_id, digest, level)]
+                    for student_id, digest, level in zip(high_risk_students['student_id'],
+                                                         high_risk_students['content_hash'],
+                                                         high_risk_students['risk_level'])
+                ]
+            }).to_dict('records')
             
             return notifications
             
@@ -98,42 +106,52 @@ class NotificationSystem:
             return []
     
     def save_notifications_to_db(self, notifications, notification_type):
-        """Save notifications to database"""
+        """Queue notifications in the outbox as PENDING rows"""
         try:
-            conn = sqlite3.connect(self.db_name)
-            cursor = conn.cursor()
+            now = datetime.now()
+            today = now.strftime('%Y-%m-%d')
+            queued_at = now.strftime('%Y-%m-%d %H:%M:%S')
             
+            rows = []
+            history_rows = []
             for notification in notifications:
+                history_rows.extend(notification.get('history', []))
                 if notification_type == 'mentor':
-                    cursor.execute('''
-                        INSERT INTO notifications 
-                        (student_id, mentor_id, notification_type, message, sent_date, status)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
+                    rows.append((
                         'ALL',
                         notification['mentor_id'],
                         'MENTOR_ALERT',
                         notification['message'],
-                        datetime.now().strftime('%Y-%m-%d'),
-                        'PENDING'
+                        today,
+                        'PENDING',
+                        NOTIFICATION_CONFIG['mentor_email_format'].format(mentor_id=notification['mentor_id']),
+                        queued_at
                     ))
                 elif notification_type == 'guardian':
-                    cursor.execute('''
-                        INSERT INTO notifications 
-                        (student_id, mentor_id, notification_type, message, sent_date, status)
-                        VALUES (?, ?, ?, ?, ?, ?)
-                    ''', (
+                    rows.append((
                         notification.get('student_id', 'UNKNOWN'),
                         'GUARDIAN',
                         'GUARDIAN_ALERT',
                         notification['message'],
-                        datetime.now().strftime('%Y-%m-%d'),
-                        'PENDING'
+                        today,
+                        'PENDING',
+                        notification.get('guardian_email'),
+                        queued_at
                     ))
             
+            conn = sqlite3.connect(self.db_name)
+            conn.executemany('''
+                INSERT INTO notifications 
+                (student_id, mentor_id, notification_type, message, sent_date, status,
+                 recipient, next_attempt_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+            self.deduplicator.record_sent(
+                conn, history_rows, 'MENTOR_ALERT' if notification_type == 'mentor' else 'GUARDIAN_ALERT'
+            )
             conn.commit()
             conn.close()
-            print(f"Successfully saved {len(notifications)} {notification_type} notifications to database.")
+            print(f"Successfully saved {len(rows)} {notification_type} notifications to database.")
             
         except Exception as e:
             print(f"Error saving notifications to database: {e}")
@@ -0,0 +1,275 @@
+import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from config import ML_MODEL_CONFIG, NOTIFICATION_CONFIG, PIPELINE_CONFIG, RETENTION_CONFIG
+from instrumentation import metrics, stage as instrumented_stage
+
+SCHEDULE_SECONDS = {'daily': 86400, 'weekly': 7 * 86400, 'monthly': 30 * 86400}
+
+# Content-sensitive checksums: row count and max rowid catch inserts and
+# deletes, the weighted sums catch in-place updates of the columns that matter.
+TABLE_CHECKSUMS = {
+    'students': "TOTAL(rowid * length(COALESCE(mentor_id, '') || student_id))",
+    'attendance': "TOTAL(rowid * (CAST(present AS INTEGER) + 1))",
+    'test_scores': "TOTAL(rowid * (score + 1))",
+    'fee_payments': "TOTAL(rowid * (COALESCE(amount_due, 0) - COALESCE(amount_paid, 0) + length(COALESCE(status, ''))))",
+    'risk_assessment': "TOTAL(rowid * (overall_risk_score + 1))",
+}
+
+class Stage:
+    """A pipeline step with its dependencies, cadence and fingerprinted inputs"""
+
+    def __init__(self, name, func, depends_on=(), interval_seconds=0, tables=(), files=(), daily=False):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+        self.interval_seconds = interval_seconds
+        self.tables = tuple(tables)
+        self.files = tuple(files)
+        # Stages whose queries use date('now') windows see new inputs every day
+        self.daily = daily
+
+    @property
+    def fingerprinted(self):
+        return bool(self.tables or self.files)
+
+class PipelineScheduler:
+    """Run pipeline stages as a DAG on their configured cadence.
+
+    A due stage is skipped when the fingerprint of its inputs matches its last
+    successful run. Stages whose dependencies are settled run concurrently, and
+    every run is recorded with its duration in pipeline_stage_runs.
+    """
+
+    def __init__(self, db_name="student_database.db", max_workers=None):
+        self.db_name = db_name
+        self.max_workers = max_workers or PIPELINE_CONFIG['max_workers']
+        self.stages = {}
+        self.init_table()
+        self.register_default_stages()
+
+    def init_table(self):
+        """Create the run log used for cadence and fingerprint checks"""
+        conn = sqlite3.connect(self.db_name)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS pipeline_stage_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                stage TEXT NOT NULL,
+                fingerprint TEXT,
+                started_at TEXT,
+                duration_seconds REAL,
+                status TEXT,
+                error TEXT
+            )
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_pipeline_stage_runs_stage
+            ON pipeline_stage_runs (stage, status, started_at)
+        ''')
+        conn.commit()
+        conn.close()
+
+    def add_stage(self, stage):
+        self.stages[stage.name] = stage
+        return stage
+
+    def register_default_stages(self):
+        """Train -> predict -> notify -> dispatch, plus retention, with intervals from config.py"""
+        raw_tables = ('students', 'attendance', 'test_scores', 'fee_payments')
+        self.add_stage(Stage(
+            'train', self._train,
+            interval_seconds=ML_MODEL_CONFIG['retrain_interval_days'] * 86400,
+            tables=raw_tables
+        ))
+        self.add_stage(Stage(
+            'predict', self._predict, depends_on=['train'],
+            interval_seconds=PIPELINE_CONFIG['predict_interval_hours'] * 3600,
+            tables=raw_tables, files=[ML_MODEL_CONFIG['model_path']], daily=True
+        ))
+        self.add_stage(Stage(
+            'notify', self._notify, depends_on=['predict'],
+            interval_seconds=SCHEDULE_SECONDS[NOTIFICATION_CONFIG['alert_schedule']],
+            tables=['students', 'risk_assessment'], daily=True
+        ))
+        # Dispatch has no fingerprint: it runs every interval to drain retries
+        self.add_stage(Stage(
+            'dispatch', self._dispatch, depends_on=['notify'],
+            interval_seconds=PIPELINE_CONFIG['dispatch_interval_minutes'] * 60
+        ))
+        self.add_stage(Stage(
+            'retention', self._retention,
+            interval_seconds=RETENTION_CONFIG['interval_days'] * 86400
+        ))
+
+    def _train(self):
+        from ml_model import DropoutPredictor
+        return DropoutPredictor(self.db_name).train_model()
+
+    def _predict(self):
+        from ml_model import DropoutPredictor
+        predictor = DropoutPredictor(self.db_name)
+        predictions = predictor.predict_risk()
+        predictor.save_predictions_to_db(predictions)
+        return len(predictions)
+
+    def _notify(self):
+        from notification_system import NotificationSystem
+        return NotificationSystem(self.db_name).send_notifications()
+
+    def _dispatch(self):
+        from notification_outbox import NotificationDispatcher
+        return NotificationDispatcher(self.db_name).dispatch()
+
+    def _retention(self):
+        from retention import RetentionManager
+        return RetentionManager(self.db_name).run()
+
+    def fingerprint(self, stage):
+        """Hash the current content of a stage's input tables and files"""
+        digest = hashlib.sha1()
+        conn = sqlite3.connect(self.db_name)
+        try:
+            for table in stage.tables:
+                row = conn.execute(
+                    f"SELECT COUNT(*), MAX(rowid), {TABLE_CHECKSUMS[table]} FROM {table}"
+                ).fetchone()
+                digest.update(f"{table}:{row}".encode())
+        finally:
+            conn.close()
+        for path in stage.files:
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(block)
+            else:
+                digest.update(f"{path}:missing".encode())
+        if stage.daily:
+            digest.update(datetime.now().strftime('%Y-%m-%d').encode())
+        return digest.hexdigest()
+
+    def last_run(self, stage_name):
+        """Return (started_at, fingerprint) of the last successful or skipped run"""
+        conn = sqlite3.connect(self.db_name)
+        row = conn.execute('''
+            SELECT started_at, fingerprint FROM pipeline_stage_runs
+            WHERE stage = ? AND status IN ('SUCCESS', 'SKIPPED')
+            ORDER BY started_at DESC LIMIT 1
+        ''', (stage_name,)).fetchone()
+        conn.close()
+        return row
+
+    def is_due(self, stage, now=None):
+        last = self.last_run(stage.name)
+        if last is None:
+            return True
+        now = now or datetime.now()
+        elapsed = (now - datetime.strptime(last[0], '%Y-%m-%d %H:%M:%S')).total_seconds()
+        return elapsed >= stage.interval_seconds
+
+    def _record(self, stage_name, fingerprint, started_at, duration, status, error=None):
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        conn.execute('''
+            INSERT INTO pipeline_stage_runs
+            (stage, fingerprint, started_at, duration_seconds, status, error)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (stage_name, fingerprint, started_at, duration, status, error))
+        conn.commit()
+        conn.close()
+
+    def _execute(self, stage, force=False):
+        """Run one stage unless its inputs are unchanged; returns its status"""
+        started_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        start = time.perf_counter()
+        fingerprint = self.fingerprint(stage) if stage.fingerprinted else None
+
+        last = self.last_run(stage.name)
+        if not force and fingerprint is not None and last is not None and last[1] == fingerprint:
+            self._record(stage.name, fingerprint, started_at, time.perf_counter() - start, 'SKIPPED')
+            print(f"⏭️  {stage.name}: inputs unchanged, skipped")
+            return 'SKIPPED'
+
+        try:
+            with instrumented_stage(stage.name):
+                stage.func()
+        except Exception as e:
+            duration = time.perf_counter() - start
+            self._record(stage.name, fingerprint, started_at, duration, 'FAILED', str(e))
+            print(f"❌ {stage.name} failed after {duration:.2f}s: {e}")
+            return 'FAILED'
+
+        # Re-fingerprint so a stage's own writes do not trigger its next run
+        if stage.fingerprinted:
+            fingerprint = self.fingerprint(stage)
+        duration = time.perf_counter() - start
+        self._record(stage.name, fingerprint, started_at, duration, 'SUCCESS')
+        print(f"✅ {stage.name} completed in {duration:.2f}s")
+        return 'SUCCESS'
+
+    def run_once(self, force=False, only=None):
+        """Run one scheduling pass over the DAG and return each stage's status"""
+        selected = set(only or self.stages)
+        results = {}
+        pending = {}
+        now = datetime.now()
+        for name, stage in self.stages.items():
+            if name in selected and (force or self.is_due(stage, now)):
+                pending[name] = stage
+            else:
+                results[name] = 'NOT_DUE'
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            running = {}
+            while pending or running:
+                for name, stage in list(pending.items()):
+                    upstream = [results.get(dep) for dep in stage.depends_on if dep in self.stages]
+                    if any(status is None for status in upstream):
+                        continue
+                    del pending[name]
+                    if 'FAILED' in upstream or 'BLOCKED' in upstream:
+                        results[name] = 'BLOCKED'
+                        print(f"⛔ {name}: blocked by a failed dependency")
+                        continue
+                    running[executor.submit(self._execute, stage, force)] = name
+
+                if not running:
+                    # Every remaining stage waits on a stage that will never run
+                    for name in pending:
+                        results[name] = 'BLOCKED'
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        return results
+
+    def run_forever(self, poll_seconds=None):
+        """Poll for due stages until interrupted"""
+        poll_seconds = poll_seconds or PIPELINE_CONFIG['poll_interval_seconds']
+        print(f"🕒 Scheduler started (polling every {poll_seconds}s, Ctrl+C to stop)")
+        try:
+            while True:
+                self.run_once()
+                metrics.write_metrics_file()
+                time.sleep(poll_seconds)
+        except KeyboardInterrupt:
+            print("\n🛑 Scheduler stopped")
+
+    def get_stage_durations(self, limit=20):
+        """Return the most recent stage runs for reporting"""
+        conn = sqlite3.connect(self.db_name)
+        rows = conn.execute('''
+            SELECT stage, status, started_at, duration_seconds FROM pipeline_stage_runs
+            ORDER BY id DESC LIMIT ?
+        ''', (limit,)).fetchall()
+        conn.close()
+        return rows
+
+# Test the class
+if __name__ == "__main__":
+    scheduler = PipelineScheduler()
+    print(scheduler.run_once())
+    for row in scheduler.get_stage_durations():
+        print(row)
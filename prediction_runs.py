@@ -0,0 +1,152 @@
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from config import ML_MODEL_CONFIG
+
+# Loaders filter risk_assessment with this to see only the published batch
+CURRENT_RUN_SQL = "(SELECT run_id FROM current_run WHERE id = 1)"
+
+# Changes on every publish and every micro-batch rescore; caches key on it
+CURRENT_VERSION_SQL = '''
+    SELECT c.run_id || ':' || COALESCE(p.revision, 0)
+    FROM current_run c LEFT JOIN prediction_runs p ON p.run_id = c.run_id
+    WHERE c.id = 1
+'''
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+class PredictionRunPublisher:
+    """Write prediction batches as staged runs and publish them atomically.
+
+    Rows are inserted under a fresh run_id in short chunked transactions that
+    readers ignore, because every loader filters on current_run. Publishing
+    flips the current_run pointer, together with the run's summary and history
+    rows, in one small transaction. Superseded same-day runs and abandoned
+    staged runs are deleted afterwards in small batches on a background thread.
+    """
+
+    def __init__(self, db_name="student_database.db", chunk_size=None):
+        self.db_name = db_name
+        self.chunk_size = chunk_size or ML_MODEL_CONFIG['prediction_write_chunk_size']
+
+    def _connect(self):
+        return sqlite3.connect(self.db_name, timeout=30)
+
+    def stage(self, assessment_date, rows):
+        """Insert assessment rows under a new STAGED run and return its run_id.
+
+        `rows` are (student_id, overall_risk_score, risk_level, attendance_risk,
+        academic_risk, financial_risk, reasons) tuples.
+        """
+        run_id = f"{assessment_date}-{uuid.uuid4().hex[:12]}"
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('''
+                    INSERT INTO prediction_runs (run_id, assessment_date, created_at, status, row_count)
+                    VALUES (?, ?, ?, 'STAGED', 0)
+                ''', (run_id, assessment_date, now))
+
+            count = 0
+            for start in range(0, len(rows), self.chunk_size):
+                chunk = rows[start:start + self.chunk_size]
+                with conn:
+                    conn.executemany('''
+                        INSERT INTO risk_assessment
+                        (student_id, assessment_date, overall_risk_score, risk_level,
+                         attendance_risk, academic_risk, financial_risk, reasons, run_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', [(row[0], assessment_date, *row[1:], run_id) for row in chunk])
+                count += len(chunk)
+
+            with conn:
+                conn.execute("UPDATE prediction_runs SET row_count = ? WHERE run_id = ?", (count, run_id))
+        finally:
+            conn.close()
+        return run_id
+
+    def publish(self, run_id, on_publish=None):
+        """Atomically make run_id the current batch.
+
+        `on_publish(conn)` runs inside the same transaction, so derived tables
+        written there become visible together with the new pointer.
+        """
+        now = datetime.now().strftime(TIMESTAMP_FORMAT)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('''
+                    UPDATE prediction_runs SET status = 'SUPERSEDED'
+                    WHERE run_id = (SELECT run_id FROM current_run WHERE id = 1)
+                ''')
+                conn.execute('''
+                    UPDATE prediction_runs SET status = 'CURRENT', published_at = ?
+                    WHERE run_id = ? AND status = 'STAGED'
+                ''', (now, run_id))
+                conn.execute('''
+                    INSERT INTO current_run (id, run_id) VALUES (1, ?)
+                    ON CONFLICT (id) DO UPDATE SET run_id = excluded.run_id
+                ''', (run_id,))
+                if on_publish is not None:
+                    on_publish(conn)
+        finally:
+            conn.close()
+
+    def collect_garbage_async(self):
+        """Run collect_garbage on a background thread and return the thread"""
+        worker = threading.Thread(target=self.collect_garbage, name="prediction-run-gc")
+        worker.start()
+        return worker
+
+    def collect_garbage(self, batch_size=5000, stale_after_hours=6):
+        """Delete rows of superseded same-day runs and abandoned staged runs.
+
+        The newest published run per assessment date is kept for history.
+        """
+        stale_before = (datetime.now() - timedelta(hours=stale_after_hours)).strftime(TIMESTAMP_FORMAT)
+        conn = self._connect()
+        try:
+            doomed = [row[0] for row in conn.execute('''
+                SELECT p.run_id FROM prediction_runs p
+                WHERE (p.status = 'SUPERSEDED' AND EXISTS (
+                        SELECT 1 FROM prediction_runs newer
+                        WHERE newer.assessment_date = p.assessment_date
+                        AND newer.status IN ('CURRENT', 'SUPERSEDED')
+                        AND newer.published_at > p.published_at))
+                   OR (p.status = 'STAGED' AND p.created_at < ?)
+                   OR p.status = 'DELETING'
+            ''', (stale_before,))]
+
+            deleted = 0
+            for run_id in doomed:
+                with conn:
+                    conn.execute("UPDATE prediction_runs SET status = 'DELETING' WHERE run_id = ?", (run_id,))
+                while True:
+                    with conn:
+                        removed = conn.execute('''
+                            DELETE FROM risk_assessment WHERE rowid IN (
+                                SELECT rowid FROM risk_assessment WHERE run_id = ? LIMIT ?
+                            )
+                        ''', (run_id, batch_size)).rowcount
+                    deleted += removed
+                    if removed < batch_size:
+                        break
+                with conn:
+                    conn.execute("DELETE FROM prediction_runs WHERE run_id = ?", (run_id,))
+        finally:
+            conn.close()
+        if doomed:
+            print(f"Garbage-collected {len(doomed)} prediction runs ({deleted} rows)")
+        return deleted
+
+    def get_current_run(self):
+        conn = self._connect()
+        row = conn.execute('''
+            SELECT p.run_id, p.assessment_date, p.published_at, p.row_count
+            FROM current_run c JOIN prediction_runs p ON p.run_id = c.run_id
+            WHERE c.id = 1
+        ''').fetchone()
+        conn.close()
+        return row
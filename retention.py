@@ -0,0 +1,315 @@
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from config import RETENTION_CONFIG
+from instrumentation import span, increment
+from date_utils import to_day_number
+from database import ensure_day_columns
+
+# Shortest history each table must keep for the feature and alert queries
+MIN_KEEP_DAYS = {
+    'attendance': 30,
+    'test_scores': 60,
+    'risk_assessment': 7,
+    'notifications': 7,
+}
+
+# Per-table policies: which column ages a row (integer day columns where the
+# table has one, so batches are range scans on their index), which rows may
+# never expire, and how a batch of expiring rowids (bound as a JSON array) is
+# folded into its monthly summary before the rows are deleted. risk_assessment
+# needs no fold: every published run is already kept compactly in risk_history.
+RETENTION_POLICIES = {
+    'attendance': {
+        'date_column': 'day',
+        'protect': '',
+        'fold': '''
+            INSERT INTO attendance_monthly (student_id, subject, month, total_classes, attended_classes)
+            SELECT student_id, subject, substr(date, 1, 7), COUNT(*), SUM(CAST(present AS INTEGER))
+            FROM attendance WHERE rowid IN (SELECT value FROM json_each(?))
+            GROUP BY student_id, subject, substr(date, 1, 7)
+            ON CONFLICT (student_id, subject, month) DO UPDATE SET
+                total_classes = total_classes + excluded.total_classes,
+                attended_classes = attended_classes + excluded.attended_classes
+        ''',
+    },
+    'test_scores': {
+        'date_column': 'test_day',
+        'protect': '',
+        'fold': '''
+            INSERT INTO test_scores_monthly
+            (student_id, subject, month, tests, score_sum, score_min, score_max, max_attempts)
+            SELECT student_id, subject, substr(test_date, 1, 7), COUNT(*), SUM(score),
+                   MIN(score), MAX(score), MAX(attempt_number)
+            FROM test_scores WHERE rowid IN (SELECT value FROM json_each(?))
+            GROUP BY student_id, subject, substr(test_date, 1, 7)
+            ON CONFLICT (student_id, subject, month) DO UPDATE SET
+                tests = tests + excluded.tests,
+                score_sum = score_sum + excluded.score_sum,
+                score_min = MIN(score_min, excluded.score_min),
+                score_max = MAX(score_max, excluded.score_max),
+                max_attempts = MAX(max_attempts, excluded.max_attempts)
+        ''',
+    },
+    'risk_assessment': {
+        'date_column': 'assessment_day',
+        'protect': "AND run_id IS NOT (SELECT run_id FROM current_run WHERE id = 1)",
+        'fold': None,
+    },
+    'notifications': {
+        'date_column': 'sent_date',
+        # Queued and in-flight messages stay until the outbox settles them
+        'protect': "AND status IN ('SENT', 'FAILED')",
+        'fold': '''
+            INSERT INTO notifications_monthly (month, notification_type, status, messages)
+            SELECT substr(sent_date, 1, 7), notification_type, status, COUNT(*)
+            FROM notifications WHERE rowid IN (SELECT value FROM json_each(?))
+            GROUP BY substr(sent_date, 1, 7), notification_type, status
+            ON CONFLICT (month, notification_type, status) DO UPDATE SET
+                messages = messages + excluded.messages
+        ''',
+    },
+}
+
+# Representative reads timed before and after a retention pass
+PROBE_QUERIES = {
+    'attendance_30d': '''
+        SELECT student_id, COUNT(*), SUM(CAST(present AS INTEGER)) FROM attendance
+        WHERE day >= (SELECT CAST(julianday('now') - 2440587.5 AS INTEGER)) - 30 GROUP BY student_id
+    ''',
+    'test_scores_60d': '''
+        SELECT student_id, AVG(score), MAX(attempt_number) FROM test_scores
+        WHERE test_day >= (SELECT CAST(julianday('now') - 2440587.5 AS INTEGER)) - 60 GROUP BY student_id
+    ''',
+    'risk_trend': '''
+        SELECT assessment_date, AVG(overall_risk_score) FROM risk_assessment
+        GROUP BY assessment_date
+    ''',
+    'notification_log': '''
+        SELECT notification_type, status, COUNT(*) FROM notifications GROUP BY notification_type, status
+    ''',
+}
+
+class RetentionManager:
+    """Expire old raw rows into monthly summaries and return the space to the OS.
+
+    Each table is processed in batches of `batch_size` rows; a batch is folded
+    into its summary table and deleted in one short transaction, so readers
+    and the prediction writer are never blocked for long. Freed pages are
+    released with `PRAGMA incremental_vacuum` steps (auto_vacuum=INCREMENTAL).
+    """
+
+    def __init__(self, db_name="student_database.db", config=None):
+        self.db_name = db_name
+        self.config = config or RETENTION_CONFIG
+        self.init_tables()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name, timeout=30)
+        conn.execute("PRAGMA busy_timeout = 30000")
+        return conn
+
+    def init_tables(self):
+        """Create the monthly summary tables"""
+        ensure_day_columns(self.db_name)
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS attendance_monthly (
+                student_id TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                month TEXT NOT NULL,
+                total_classes INTEGER NOT NULL,
+                attended_classes INTEGER NOT NULL,
+                PRIMARY KEY (student_id, subject, month)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS test_scores_monthly (
+                student_id TEXT NOT NULL,
+                subject TEXT NOT NULL,
+                month TEXT NOT NULL,
+                tests INTEGER NOT NULL,
+                score_sum REAL,
+                score_min REAL,
+                score_max REAL,
+                max_attempts INTEGER,
+                PRIMARY KEY (student_id, subject, month)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS notifications_monthly (
+                month TEXT NOT NULL,
+                notification_type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                messages INTEGER NOT NULL,
+                PRIMARY KEY (month, notification_type, status)
+            ) WITHOUT ROWID
+        ''')
+        conn.commit()
+        conn.close()
+
+    def cutoff(self, table):
+        """First date that is still kept for table"""
+        keep_days = max(self.config['keep_days'][table], MIN_KEEP_DAYS[table])
+        return (datetime.now() - timedelta(days=keep_days)).strftime('%Y-%m-%d')
+
+    def _expired_filter(self, table):
+        """WHERE clause and its bound cutoff for the expired rows of table"""
+        policy = RETENTION_POLICIES[table]
+        column = policy['date_column']
+        cutoff = self.cutoff(table)
+        if column.endswith('day'):
+            cutoff = to_day_number(cutoff)
+        return f"{column} < ? {policy['protect']}", cutoff
+
+    def count_expired(self):
+        """{table: rows a retention pass would remove}"""
+        conn = self._connect()
+        try:
+            return {
+                table: conn.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}", (cutoff,)).fetchone()[0]
+                for table in self.config['keep_days']
+                for where, cutoff in [self._expired_filter(table)]
+            }
+        finally:
+            conn.close()
+
+    def expire_table(self, table):
+        """Fold and delete expired rows of one table in batches; returns rows removed"""
+        policy = RETENTION_POLICIES[table]
+        where, cutoff = self._expired_filter(table)
+        batch_size = self.config['batch_size']
+        removed = 0
+        conn = self._connect()
+        try:
+            with span('retention.expire', table=table) as fields:
+                while True:
+                    with conn:
+                        rowids = [row[0] for row in conn.execute(
+                            f"SELECT rowid FROM {table} WHERE {where} LIMIT ?",
+                            (cutoff, batch_size)
+                        )]
+                        if not rowids:
+                            break
+                        batch = json.dumps(rowids)
+                        if policy['fold']:
+                            conn.execute(policy['fold'], (batch,))
+                        conn.execute(f"DELETE FROM {table} WHERE rowid IN (SELECT value FROM json_each(?))", (batch,))
+                    removed += len(rowids)
+                    if len(rowids) < batch_size:
+                        break
+                if table == 'risk_assessment':
+                    # Runs whose rows are all gone no longer need a catalog entry
+                    with conn:
+                        conn.execute('''
+                            DELETE FROM prediction_runs
+                            WHERE assessment_date < ? AND status != 'CURRENT'
+                            AND NOT EXISTS (SELECT 1 FROM risk_assessment r WHERE r.run_id = prediction_runs.run_id)
+                        ''', (self.cutoff(table),))
+                fields['rows'] = removed
+        finally:
+            conn.close()
+        increment('retention_rows_deleted', removed, table=table)
+        return removed
+
+    def database_size(self):
+        """(bytes used by the main file, free pages, WAL bytes)"""
+        conn = self._connect()
+        try:
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        finally:
+            conn.close()
+        wal_path = f"{self.db_name}-wal"
+        wal_bytes = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        return page_size * page_count, free_pages, wal_bytes
+
+    def incremental_vacuum(self, pages_per_step=None):
+        """Release free pages in small steps; returns pages released"""
+        pages_per_step = pages_per_step or self.config['vacuum_pages_per_step']
+        conn = self._connect()
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                print("⚠️ auto_vacuum is not INCREMENTAL; run `python main.py retention --convert` once to enable it")
+                return 0
+            released = 0
+            with span('retention.vacuum') as fields:
+                while True:
+                    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if before == 0:
+                        break
+                    conn.execute(f"PRAGMA incremental_vacuum({int(pages_per_step)})").fetchall()
+                    step = before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if step <= 0:
+                        break
+                    released += step
+                # Truncation only reaches the file once the WAL is checkpointed
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+                fields['pages'] = released
+            return released
+        finally:
+            conn.close()
+
+    def convert_to_incremental(self):
+        """Switch an existing database to auto_vacuum=INCREMENTAL (one full VACUUM)"""
+        conn = self._connect()
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                return False
+            print("🧹 Rebuilding database with auto_vacuum=INCREMENTAL (one-off full VACUUM)...")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+        finally:
+            conn.close()
+
+    def time_probes(self, repeats=3):
+        """Best-of-N seconds for each probe query"""
+        conn = self._connect()
+        try:
+            timings = {}
+            for name, query in PROBE_QUERIES.items():
+                best = None
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    conn.execute(query).fetchall()
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings[name] = best
+            return timings
+        finally:
+            conn.close()
+
+    def run(self):
+        """Expire every configured table, vacuum, and print a before/after report"""
+        size_before, _, _ = self.database_size()
+        probes_before = self.time_probes()
+
+        removed = {table: self.expire_table(table) for table in self.config['keep_days']}
+        conn = self._connect()
+        conn.execute("PRAGMA optimize")
+        conn.close()
+        released = self.incremental_vacuum()
+
+        size_after, free_pages, _ = self.database_size()
+        probes_after = self.time_probes()
+
+        print("🗄️ Retention pass complete")
+        for table, rows in removed.items():
+            print(f"   {table}: {rows:,} rows expired (kept since {self.cutoff(table)})")
+        print(f"   file size: {size_before / 1e6:.1f} MB -> {size_after / 1e6:.1f} MB "
+              f"({released:,} pages released, {free_pages:,} still free)")
+        for name in PROBE_QUERIES:
+            before, after = probes_before[name] * 1000, probes_after[name] * 1000
+            print(f"   {name}: {before:.2f} ms -> {after:.2f} ms")
+        return {
+            'rows_removed': removed,
+            'bytes_before': size_before,
+            'bytes_after': size_after,
+            'pages_released': released,
+            'probes_before': probes_before,
+            'probes_after': probes_after,
+        }
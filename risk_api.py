@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+from config import API_CONFIG, ML_MODEL_CONFIG
+from date_utils import to_day_number
+from db_pool import ConnectionPool
+from instrumentation import span, increment
+from prediction_runs import CURRENT_RUN_SQL, CURRENT_VERSION_SQL
+
+STATUS_TEXT = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+               405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+RISK_COLUMNS = ['student_id', 'assessment_date', 'overall_risk_score', 'risk_level',
+                'attendance_risk', 'academic_risk', 'financial_risk', 'reasons', 'run_id']
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class RiskApi:
+    """Read and rescoring endpoints over the risk tables.
+
+    Every blocking call (SQLite, pandas, sklearn) runs in a bounded thread
+    pool on pooled read-only connections, keeping the event loop free.
+    GET responses are cached per URL and keyed on the current run's version,
+    so publishing or rescoring invalidates them; clients revalidate with ETags.
+    """
+
+    def __init__(self, db_name="student_database.db", config=None):
+        self.db_name = db_name
+        self.config = config or API_CONFIG
+        self.pool = ConnectionPool(db_name, size=self.config['pool_size'], read_only=True)
+        self.executor = ThreadPoolExecutor(max_workers=self.config['worker_threads'], thread_name_prefix='risk-api')
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._run_probe = (0.0, None)
+        self._predictor = None
+        self._predictor_mtime = None
+        self._predictor_lock = threading.Lock()
+        self.routes = [
+            ('GET', re.compile(r'^/health$'), 'health', self.health),
+            ('GET', re.compile(r'^/students/([^/]+)/risk$'), 'student_risk', self.student_risk),
+            ('GET', re.compile(r'^/students/([^/]+)/history$'), 'student_history', self.student_history),
+            ('GET', re.compile(r'^/mentors/([^/]+)/students$'), 'mentor_students', self.mentor_students),
+            ('POST', re.compile(r'^/students/([^/]+)/rescore$'), 'rescore', self.rescore),
+        ]
+
+    # -- blocking handlers, run in the thread pool --
+
+    def current_version(self):
+        """Current run version (run id and rescore revision), re-read at most every run_probe_seconds"""
+        checked_at, version = self._run_probe
+        if time.monotonic() - checked_at < self.config['run_probe_seconds']:
+            return version
+        with self.pool.connection() as conn:
+            row = conn.execute(CURRENT_VERSION_SQL).fetchone()
+        version = row[0] if row else None
+        self._run_probe = (time.monotonic(), version)
+        return version
+
+    def health(self, query):
+        return {'status': 'ok', 'version': self.current_version()}
+
+    def student_risk(self, query, student_id):
+        with self.pool.connection() as conn:
+            row = conn.execute(f'''
+                SELECT {", ".join(RISK_COLUMNS)} FROM risk_assessment
+                WHERE student_id = ? AND run_id = {CURRENT_RUN_SQL}
+            ''', (student_id,)).fetchone()
+        if row is None:
+            raise ApiError(404, f"No current risk assessment for {student_id}")
+        return dict(zip(RISK_COLUMNS, row))
+
+    def student_history(self, query, student_id):
+        from risk_history import RiskHistory
+        granularity = query.get('granularity', 'D')
+        if granularity not in ('D', 'W', 'M'):
+            raise ApiError(400, "granularity must be D, W or M")
+        since = query.get('since')
+        if since:
+            try:
+                to_day_number(since)
+            except ValueError:
+                raise ApiError(400, "since must be a YYYY-MM-DD date")
+        trend = RiskHistory(self.db_name).student_trend(student_id, granularity, since=since)
+        if 'date' in trend.columns:
+            trend['date'] = trend['date'].astype(str)
+        if 'period_start' in trend.columns:
+            trend['period_start'] = trend['period_start'].astype(str)
+        return {'student_id': student_id, 'granularity': granularity, 'points': trend.to_dict('records')}
+
+    def mentor_students(self, query, mentor_id):
+        try:
+            limit = min(int(query.get('limit', 50)), self.config['max_list_limit'])
+        except ValueError:
+            raise ApiError(400, "limit must be an integer")
+        if limit < 1:
+            # SQLite reads a negative LIMIT as "no limit"
+            raise ApiError(400, "limit must be a positive integer")
+        level = query.get('level')
+        level_filter = "AND r.risk_level = ?" if level else ""
+        params = [mentor_id] + ([level] if level else []) + [limit]
+        with self.pool.connection() as conn:
+            rows = conn.execute(f'''
+                SELECT r.student_id, s.name, r.overall_risk_score, r.risk_level, r.reasons
+                FROM risk_assessment r
+                JOIN students s ON r.student_id = s.student_id
+                WHERE s.mentor_id = ? AND r.run_id = {CURRENT_RUN_SQL} {level_filter}
+                ORDER BY r.overall_risk_score DESC
+                LIMIT ?
+            ''', params).fetchall()
+        columns = ['student_id', 'name', 'overall_risk_score', 'risk_level', 'reasons']
+        return {'mentor_id': mentor_id, 'students': [dict(zip(columns, row)) for row in rows]}
+
+    def _get_predictor(self):
+        """Shared predictor, reloaded when the model file on disk changes.
+
+        Training is left to the pipeline: without a model file the API
+        answers 503 rather than training inside a request thread.
+        """
+        from ml_model import DropoutPredictor
+        model_path = ML_MODEL_CONFIG['model_path']
+        if not os.path.exists(model_path):
+            raise ApiError(503, "No trained model yet; run the pipeline first")
+        mtime = os.path.getmtime(model_path)
+        with self._predictor_lock:
+            if self._predictor is None or mtime != self._predictor_mtime:
+                import joblib
+                predictor = DropoutPredictor(self.db_name, model_path, train_if_missing=False)
+                predictor.model = joblib.load(model_path)
+                predictor.is_trained = True
+                self._predictor, self._predictor_mtime = predictor, mtime
+            return self._predictor
+
+    def rescore(self, query, student_id):
+        """Score one student from their current raw data without publishing a run"""
+        from schema_types import assessment_frame
+        with self.pool.connection() as conn:
+            exists = conn.execute("SELECT 1 FROM students WHERE student_id = ?", (student_id,)).fetchone()
+        if exists is None:
+            raise ApiError(404, f"Unknown student {student_id}")
+        try:
+            scored = self._get_predictor().predict_risk(student_ids=[student_id])
+        except FileNotFoundError as e:
+            raise ApiError(503, str(e))
+        if scored.empty:
+            raise ApiError(404, f"No feature data for {student_id}")
+        return assessment_frame(scored).to_dict('records')[0]
+
+    def cached_get(self, cache_key, handler, query, args):
+        """Serve a GET from the response cache while the current run is unchanged"""
+        version = self.current_version()
+        with self._cache_lock:
+            entry = self._cache.get(cache_key)
+            if entry and entry[0] == version:
+                self._cache.move_to_end(cache_key)
+                increment('cache_lookups', cache='api', result='hit')
+                return entry[1], entry[2]
+        increment('cache_lookups', cache='api', result='miss')
+
+        body = json.dumps(handler(query, *args), default=str).encode('utf-8')
+        etag = '"' + hashlib.sha1(body).hexdigest()[:20] + '"'
+        with self._cache_lock:
+            self._cache[cache_key] = (version, body, etag)
+            while len(self._cache) > self.config['response_cache_entries']:
+                self._cache.popitem(last=False)
+        return body, etag
+
+    # -- asyncio side --
+
+    async def dispatch(self, method, target, headers):
+        """Route one request; returns (status, body bytes, extra headers, route name)"""
+        parts = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        loop = asyncio.get_running_loop()
+
+        for route_method, pattern, name, handler in self.routes:
+            match = pattern.match(parts.path)
+            if not match:
+                continue
+            if method != route_method and not (method == 'HEAD' and route_method == 'GET'):
+                return 405, self._error_body("Method not allowed"), {}, name
+
+            with span('api.request', route=name):
+                if route_method == 'GET':
+                    cache_key = (parts.path, tuple(sorted(query.items())))
+                    body, etag = await loop.run_in_executor(
+                        self.executor, self.cached_get, cache_key, handler, query, match.groups())
+                    extra = {'ETag': etag, 'Cache-Control': 'no-cache'}
+                    if headers.get('if-none-match') == etag:
+                        return 304, b'', extra, name
+                    return 200, body, extra, name
+                result = await loop.run_in_executor(self.executor, handler, query, *match.groups())
+                return 200, json.dumps(result, default=str).encode('utf-8'), {}, name
+        return 404, self._error_body("Not found"), {}, 'unmatched'
+
+    def _error_body(self, message):
+        return json.dumps({'error': message}).encode('utf-8')
+
+    async def handle_connection(self, reader, writer):
+        """Serve HTTP/1.1 requests on one connection, honouring keep-alive"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode('latin-1').split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+
+                try:
+                    try:
+                        content_length = int(headers.get('content-length') or 0)
+                    except ValueError:
+                        content_length = -1
+                    if content_length < 0:
+                        # The body's extent is unknown, so the connection cannot be reused
+                        headers['connection'] = 'close'
+                        raise ApiError(400, "Content-Length must be a non-negative integer")
+                    if content_length:
+                        await reader.readexactly(content_length)
+                    status, body, extra, route = await self.dispatch(method.upper(), target, headers)
+                except ApiError as e:
+                    status, body, extra, route = e.status, self._error_body(str(e)), {}, 'error'
+                except Exception as e:
+                    print(f"❌ API error on {method} {target}: {e}")
+                    status, body, extra, route = 500, self._error_body("Internal server error"), {}, 'error'
+                increment('api_requests', route=route, status=status)
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                        "Content-Type: application/json",
+                        f"Content-Length: {len(body)}",
+                        f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1'))
+                if method.upper() != 'HEAD':
+                    writer.write(body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=None, port=None):
+        host = host or self.config['host']
+        port = port or self.config['port']
+        server = await asyncio.start_server(self.handle_connection, host, port, backlog=1024)
+        print(f"🌐 Risk API listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=False)
+        self.pool.close()
+
+def run_api(db_name="student_database.db", host=None, port=None):
+    """Run the API until interrupted"""
+    api = RiskApi(db_name)
+    try:
+        asyncio.run(api.serve(host, port))
+    except KeyboardInterrupt:
+        print("\n🛑 Risk API stopped")
+    finally:
+        api.close()
+
+if __name__ == "__main__":
+    run_api()
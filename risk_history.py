@@ -0,0 +1,184 @@
+import json
+import sqlite3
+import pandas as pd
+from date_utils import to_day_number, from_day_number, week_bounds, month_bounds
+# One reason bit mask for stored history and alert dedup hashes
+from notification_dedup import REASON_CODES, reason_codes
+
+LEVEL_CODES = {'Low': 0, 'Medium': 1, 'High': 2}
+LEVEL_NAMES = {code: name for name, code in LEVEL_CODES.items()}
+
+SCORE_SCALE = 10  # scores are stored as integer tenths of a point
+
+PERIOD_BOUNDS = {'W': week_bounds, 'M': month_bounds}
+
+def decode_reasons(mask):
+    labels = [label for label, code in REASON_CODES.items() if mask & code]
+    return ", ".join(labels) if labels else "No significant risk factors"
+
+class RiskHistory:
+    """Compact per-day risk history with weekly and monthly rollups.
+
+    risk_history holds one (student_id, day) row with an integer day number,
+    a score quantized to tenths, a level code and a reason bit mask. Rollups
+    per student and per mentor are rebuilt for the week and month touched by
+    each write, so trend queries never scan raw daily rows.
+    """
+
+    def __init__(self, db_name="student_database.db"):
+        self.db_name = db_name
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_name)
+        self.init_tables(conn)
+        conn.commit()
+        return conn
+
+    def init_tables(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS risk_history (
+                student_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                score INTEGER NOT NULL,
+                level INTEGER NOT NULL,
+                reason_mask INTEGER NOT NULL,
+                PRIMARY KEY (student_id, day)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_risk_history_day ON risk_history (day)")
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS risk_history_rollup (
+                period TEXT NOT NULL,
+                scope TEXT NOT NULL,
+                scope_id TEXT NOT NULL,
+                period_start INTEGER NOT NULL,
+                samples INTEGER NOT NULL,
+                score_sum INTEGER NOT NULL,
+                score_max INTEGER NOT NULL,
+                high_count INTEGER NOT NULL,
+                PRIMARY KEY (period, scope, scope_id, period_start)
+            ) WITHOUT ROWID
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_students_mentor_id ON students (mentor_id, student_id)")
+
+    def record_batch(self, conn, assessment_date, assessments, partial=False):
+        """Store one day's assessments and refresh the rollups covering that day.
+
+        Runs inside the caller's transaction; `assessments` needs student_id,
+        overall_risk_score, risk_level and reasons columns. With partial=True
+        only the rollups of these students and their mentors are rebuilt.
+        """
+        self.init_tables(conn)
+        day = to_day_number(assessment_date)
+        conn.executemany('''
+            INSERT OR REPLACE INTO risk_history (student_id, day, score, level, reason_mask)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [
+            (student_id, day, int(round(score * SCORE_SCALE)), LEVEL_CODES.get(level, 0), reason_codes(reasons))
+            for student_id, score, level, reasons in zip(
+                assessments['student_id'], assessments['overall_risk_score'],
+                assessments['risk_level'], assessments['reasons'])
+        ])
+        self.refresh_rollups(conn, day, list(assessments['student_id']) if partial else None)
+
+    def refresh_rollups(self, conn, day, student_ids=None):
+        """Rebuild the weekly and monthly rollups for the periods containing day.
+
+        When student_ids is given, only those students' rollups and their
+        mentors' rollups are rebuilt.
+        """
+        student_filter, mentor_filter, scope_params = '', '', []
+        if student_ids is not None:
+            ids = json.dumps(list(student_ids))
+            student_filter = " AND student_id IN (SELECT value FROM json_each(?))"
+            mentor_filter = '''
+                AND s.mentor_id IN (
+                    SELECT mentor_id FROM students WHERE student_id IN (SELECT value FROM json_each(?))
+                )'''
+            scope_params = [ids]
+        for period, bounds in PERIOD_BOUNDS.items():
+            start, end = bounds(day)
+            conn.execute(f'''
+                INSERT OR REPLACE INTO risk_history_rollup
+                (period, scope, scope_id, period_start, samples, score_sum, score_max, high_count)
+                SELECT ?, 'student', student_id, ?, COUNT(*), SUM(score), MAX(score), SUM(level = 2)
+                FROM risk_history WHERE day BETWEEN ? AND ?{student_filter}
+                GROUP BY student_id
+            ''', [period, start, start, end] + scope_params)
+            conn.execute(f'''
+                INSERT OR REPLACE INTO risk_history_rollup
+                (period, scope, scope_id, period_start, samples, score_sum, score_max, high_count)
+                SELECT ?, 'mentor', s.mentor_id, ?, COUNT(*), SUM(h.score), MAX(h.score), SUM(h.level = 2)
+                FROM risk_history h JOIN students s ON s.student_id = h.student_id
+                WHERE h.day BETWEEN ? AND ? AND s.mentor_id IS NOT NULL{mentor_filter}
+                GROUP BY s.mentor_id
+            ''', [period, start, start, end] + scope_params)
+
+    def backfill_from_assessments(self):
+        """Load every existing risk_assessment row into the history tables"""
+        conn = self._connect()
+        dates = [row[0] for row in conn.execute("SELECT DISTINCT assessment_date FROM risk_assessment ORDER BY 1")]
+        for assessment_date in dates:
+            assessments = pd.read_sql_query('''
+                SELECT student_id, overall_risk_score, risk_level, reasons
+                FROM risk_assessment WHERE assessment_date = ?
+            ''', conn, params=[assessment_date])
+            self.record_batch(conn, assessment_date, assessments)
+            conn.commit()
+        conn.close()
+        print(f"Backfilled risk history for {len(dates)} assessment dates")
+        return len(dates)
+
+    def _frame(self, rows, date_column):
+        df = pd.DataFrame(rows, columns=[date_column, 'avg_score', 'max_score', 'high_count', 'samples'])
+        df['date'] = df[date_column].map(from_day_number)
+        return df.drop(columns=[date_column])
+
+    def student_trend(self, student_id, granularity='D', since=None):
+        """Per-student trend; granularity is 'D' (daily), 'W' or 'M'"""
+        since_day = to_day_number(since) if since else 0
+        conn = self._connect()
+        if granularity == 'D':
+            rows = conn.execute('''
+                SELECT day, score, level, reason_mask FROM risk_history
+                WHERE student_id = ? AND day >= ? ORDER BY day
+            ''', (student_id, since_day)).fetchall()
+            conn.close()
+            return pd.DataFrame({
+                'date': [from_day_number(r[0]) for r in rows],
+                'score': [r[1] / SCORE_SCALE for r in rows],
+                'risk_level': [LEVEL_NAMES[r[2]] for r in rows],
+                'reasons': [decode_reasons(r[3]) for r in rows]
+            })
+        rows = self._rollup_rows(conn, granularity, 'student', student_id, since_day)
+        conn.close()
+        return self._frame(rows, 'period_start')
+
+    def mentor_trend(self, mentor_id, granularity='W', since=None):
+        """Cohort trend for a mentor's students; granularity is 'D', 'W' or 'M'"""
+        since_day = to_day_number(since) if since else 0
+        conn = self._connect()
+        if granularity == 'D':
+            rows = conn.execute('''
+                SELECT h.day, 1.0 * SUM(h.score) / COUNT(*) / ?, MAX(h.score) * 1.0 / ?, SUM(h.level = 2), COUNT(*)
+                FROM students s JOIN risk_history h ON h.student_id = s.student_id
+                WHERE s.mentor_id = ? AND h.day >= ?
+                GROUP BY h.day ORDER BY h.day
+            ''', (SCORE_SCALE, SCORE_SCALE, mentor_id, since_day)).fetchall()
+        else:
+            rows = self._rollup_rows(conn, granularity, 'mentor', mentor_id, since_day)
+        conn.close()
+        return self._frame(rows, 'day')
+
+    def _rollup_rows(self, conn, period, scope, scope_id, since_day):
+        return conn.execute('''
+            SELECT period_start, 1.0 * score_sum / samples / ?, score_max * 1.0 / ?, high_count, samples
+            FROM risk_history_rollup
+            WHERE period = ? AND scope = ? AND scope_id = ? AND period_start >= ?
+            ORDER BY period_start
+        ''', (SCORE_SCALE, SCORE_SCALE, period, scope, scope_id, since_day)).fetchall()
+
+# Test the class
+if __name__ == "__main__":
+    history = RiskHistory()
+    history.backfill_from_assessments()
@@ -0,0 +1,166 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+from prediction_runs import CURRENT_RUN_SQL
+
+RISK_LEVELS = ['High', 'Medium', 'Low']
+RISK_FACTORS = ['attendance_risk', 'academic_risk', 'financial_risk']
+HISTOGRAM_BINS = np.linspace(0, 100, 21)
+GLOBAL_SCOPE = 'ALL'
+
+def box_stats(values):
+    """Quartiles and Tukey whiskers, matching what Plotly computes client-side"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {}
+    q1, median, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    inside = values[(values >= q1 - 1.5 * iqr) & (values <= q3 + 1.5 * iqr)]
+    return {
+        'q1': q1, 'median': median, 'q3': q3,
+        'lowerfence': inside.min(), 'upperfence': inside.max(),
+        'min': values.min(), 'max': values.max(), 'mean': values.mean()
+    }
+
+class RiskSummaryWriter:
+    """Precompute the overview dashboard's aggregates at prediction time.
+
+    Rows in risk_summary are (assessment_date, mentor_id, metric, bucket, value);
+    mentor_id 'ALL' holds the institution-wide figures.
+    """
+
+    def __init__(self, db_name="student_database.db"):
+        self.db_name = db_name
+
+    def init_table(self, conn):
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS risk_summary (
+                assessment_date DATE NOT NULL,
+                mentor_id TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                value REAL,
+                PRIMARY KEY (assessment_date, mentor_id, metric, bucket)
+            ) WITHOUT ROWID
+        ''')
+
+    def compute(self, assessments):
+        """Build summary rows from a frame shaped like risk_assessment (factors on a 0-100 scale)"""
+        rows = []
+
+        def add_scope(scope, frame):
+            rows.append((scope, 'total', 'students', float(len(frame))))
+            counts = frame['risk_level'].value_counts()
+            for level in RISK_LEVELS:
+                rows.append((scope, 'level_count', level, float(counts.get(level, 0))))
+            rows.append((scope, 'mean_score', 'overall', float(frame['overall_risk_score'].mean())))
+
+        add_scope(GLOBAL_SCOPE, assessments)
+
+        hist, _ = np.histogram(assessments['overall_risk_score'].clip(0, 100), bins=HISTOGRAM_BINS)
+        for index, count in enumerate(hist):
+            rows.append((GLOBAL_SCOPE, 'score_hist', f"{index:02d}", float(count)))
+
+        for factor in RISK_FACTORS:
+            for stat, value in box_stats(assessments[factor]).items():
+                rows.append((GLOBAL_SCOPE, f"box_{factor}", stat, float(value)))
+
+        if 'mentor_id' in assessments.columns:
+            for mentor_id, frame in assessments.groupby('mentor_id', sort=False, observed=True):
+                add_scope(str(mentor_id), frame)
+
+        return rows
+
+    def write(self, conn, assessment_date, assessments):
+        """Replace the summary for assessment_date inside the caller's transaction"""
+        self.init_table(conn)
+        conn.execute("DELETE FROM risk_summary WHERE assessment_date = ?", (assessment_date,))
+        conn.executemany('''
+            INSERT INTO risk_summary (assessment_date, mentor_id, metric, bucket, value)
+            VALUES (?, ?, ?, ?, ?)
+        ''', [(assessment_date, *row) for row in self.compute(assessments)])
+
+    def apply_delta(self, conn, assessment_date, removed, added):
+        """Adjust an existing summary for rescored students instead of rebuilding it.
+
+        `removed` and `added` hold the students' old and new rows
+        (overall_risk_score, risk_level, mentor_id). Totals, level counts,
+        means and the histogram are updated exactly; box-plot quartiles cannot
+        be, and keep their values until the next write(). Returns False,
+        writing nothing, when assessment_date has no summary yet.
+        """
+        self.init_table(conn)
+        if conn.execute('''
+            SELECT 1 FROM risk_summary
+            WHERE assessment_date = ? AND mentor_id = ? AND metric = 'total'
+        ''', (assessment_date, GLOBAL_SCOPE)).fetchone() is None:
+            return False
+
+        deltas = {}
+        score_sums = {}
+
+        def add_rows(frame, sign):
+            scopes = [(GLOBAL_SCOPE, frame)]
+            if 'mentor_id' in frame.columns:
+                scopes += [(str(mentor_id), part) for mentor_id, part
+                           in frame.groupby('mentor_id', sort=False, observed=True)]
+            for scope, part in scopes:
+                key = (scope, 'total', 'students')
+                deltas[key] = deltas.get(key, 0.0) + sign * len(part)
+                for level, count in part['risk_level'].value_counts().items():
+                    key = (scope, 'level_count', str(level))
+                    deltas[key] = deltas.get(key, 0.0) + sign * float(count)
+                score_sums[scope] = score_sums.get(scope, 0.0) + sign * float(part['overall_risk_score'].sum())
+            hist, _ = np.histogram(frame['overall_risk_score'].clip(0, 100), bins=HISTOGRAM_BINS)
+            for index, count in enumerate(hist):
+                if count:
+                    key = (GLOBAL_SCOPE, 'score_hist', f"{index:02d}")
+                    deltas[key] = deltas.get(key, 0.0) + sign * float(count)
+
+        add_rows(removed, -1)
+        add_rows(added, 1)
+
+        # New means from the stored mean and count, read before the counts move
+        means = []
+        for scope, score_sum in score_sums.items():
+            stored = dict(conn.execute('''
+                SELECT metric, value FROM risk_summary
+                WHERE assessment_date = ? AND mentor_id = ? AND metric IN ('total', 'mean_score')
+            ''', (assessment_date, scope)).fetchall())
+            total = stored.get('total') or 0.0
+            new_total = total + deltas.get((scope, 'total', 'students'), 0.0)
+            old_sum = (stored.get('mean_score') or 0.0) * total
+            means.append((scope, 'mean_score', 'overall', (old_sum + score_sum) / new_total if new_total else None))
+
+        conn.executemany('''
+            INSERT INTO risk_summary (assessment_date, mentor_id, metric, bucket, value)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (assessment_date, mentor_id, metric, bucket) DO UPDATE SET value = value + excluded.value
+        ''', [(assessment_date, *key, value) for key, value in deltas.items() if value])
+        conn.executemany('''
+            INSERT INTO risk_summary (assessment_date, mentor_id, metric, bucket, value)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (assessment_date, mentor_id, metric, bucket) DO UPDATE SET value = excluded.value
+        ''', [(assessment_date, *row) for row in means])
+        return True
+
+    def load(self):
+        """Return the summary of the current run's date, or an empty frame if none exists"""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            self.init_table(conn)
+            latest = conn.execute(f"SELECT assessment_date FROM prediction_runs WHERE run_id = {CURRENT_RUN_SQL}").fetchone()
+            latest = latest[0] if latest else None
+            if latest is None:
+                return pd.DataFrame(columns=['mentor_id', 'metric', 'bucket', 'value'])
+            return pd.read_sql_query('''
+                SELECT mentor_id, metric, bucket, value FROM risk_summary
+                WHERE assessment_date = ?
+            ''', conn, params=[latest])
+        finally:
+            conn.close()
+
+def summary_from_rows(rows):
+    """Turn summary rows into a frame with the same columns RiskSummaryWriter.load returns"""
+    return pd.DataFrame(rows, columns=['mentor_id', 'metric', 'bucket', 'value'])
@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+from config import PIPELINE_CONFIG
+
+RISK_LEVELS = ['Low', 'Medium', 'High']
+
+# Ordered, so comparisons such as level >= 'Medium' work; stored as int8 codes
+RISK_LEVEL_DTYPE = pd.CategoricalDtype(RISK_LEVELS, ordered=True)
+
+# Target dtypes for the pipeline's frames. 'category' columns are dictionary
+# encoded; student_id uses the roster dtype so every frame shares one
+# dictionary and merges on it stay categorical.
+FEATURE_SCHEMA = {
+    'student_id': 'roster',
+    'subject': 'category',
+    'mentor_id': 'category',
+    'status': 'category',
+    'attendance_percentage': 'float32',
+    'attendance_risk': 'float32',
+    'academic_risk': 'float32',
+    'financial_risk': 'float32',
+    'avg_score': 'float32',
+    'min_score': 'float32',
+    'max_score': 'float32',
+    'pending_amount': 'float32',
+    'amount_due': 'float32',
+    'amount_paid': 'float32',
+    'total_classes': 'int32',
+    'attended_classes': 'int32',
+    'total_tests': 'int16',
+    'max_attempts': 'int8',
+    'is_overdue': 'int8',
+    'open_instalments': 'int16',
+}
+
+RISK_SCHEMA = {
+    **FEATURE_SCHEMA,
+    'risk_level': RISK_LEVEL_DTYPE,
+    'reasons': 'category',
+    'risk_reasons': 'category',
+    'overall_risk_score': 'float32',
+    'dropout_risk': 'float32',
+    'at_risk_prediction': 'int8',
+}
+
+# Columns that stay plain Python strings: names and contact details are
+# nearly unique and only ever displayed
+TEXT_COLUMNS = {'name', 'email', 'phone', 'guardian_name', 'guardian_phone', 'guardian_email'}
+
+def roster_dtype(student_ids):
+    """Categorical dtype whose categories are the given student ids"""
+    return pd.CategoricalDtype(pd.Index(pd.unique(pd.Series(student_ids, dtype=object).dropna())))
+
+def apply_schema(df, schema=FEATURE_SCHEMA, student_dtype=None):
+    """Cast the columns of df named in schema, in place, and return df.
+
+    Integer targets that still hold NaN (e.g. after a left merge) fall back
+    to float32 rather than inventing zeros, and 'category' columns whose
+    values are mostly unique are left as strings.
+    """
+    if not PIPELINE_CONFIG['compact_dtypes']:
+        return df
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        if dtype == 'roster':
+            if student_dtype is None:
+                continue
+            dtype = student_dtype
+        series = df[column]
+        # Dictionary encoding only pays off when values repeat
+        if dtype == 'category' and series.dtype != 'category' and series.nunique() > len(series) // 2:
+            continue
+        if isinstance(dtype, str) and dtype.startswith('int'):
+            if series.isna().any():
+                dtype = 'float32'
+            elif not pd.api.types.is_numeric_dtype(series):
+                series = pd.to_numeric(series)
+        if series.dtype != dtype:
+            df[column] = series.astype(dtype)
+    return df
+
+def sql_values(df, columns):
+    """Rows of df as tuples of plain Python values for sqlite3 parameters.
+
+    sqlite3 rejects numpy float32/int8 scalars; Series.tolist() converts them
+    (and categorical values) to Python objects.
+    """
+    return list(zip(*[df[column].tolist() for column in columns]))
+
+# Decimal places kept for persisted risk scores and percentages
+SCORE_DECIMALS = 4
+
+def assessment_frame(predictions):
+    """risk_assessment columns from predict_risk output, risks scaled to percentages.
+
+    The float32 model columns are widened and rounded to SCORE_DECIMALS
+    first, so stored and served values read 10.0 rather than 10.0000001490116.
+    """
+    def percent(column, scale=1):
+        return (predictions[column].astype(np.float64) * scale).round(SCORE_DECIMALS)
+
+    return pd.DataFrame({
+        'student_id': predictions['student_id'],
+        'overall_risk_score': percent('overall_risk_score'),
+        'risk_level': predictions['risk_level'],
+        'attendance_risk': percent('attendance_risk', 100),
+        'academic_risk': percent('academic_risk', 100),
+        'financial_risk': percent('financial_risk', 100),
+        'reasons': predictions['risk_reasons']
+    })
+
+def frame_memory_mb(df):
+    """Deep memory usage of a frame in MB"""
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+def model_matrix(features, columns):
+    """float32 model input; tree models work in float32, so sklearn skips its own copy"""
+    matrix = features[columns].fillna(0)
+    if not PIPELINE_CONFIG['compact_dtypes']:
+        return matrix
+    return matrix.astype(np.float32)
@@ -0,0 +1,230 @@
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime
+import pandas as pd
+from config import SHARD_CONFIG
+from prediction_runs import CURRENT_RUN_SQL
+
+# Shard workers run in child processes, so they are module-level functions
+# that take only paths and import the heavy modules themselves.
+
+def _train_shard(db_path, model_path):
+    from ml_model import DropoutPredictor
+    return DropoutPredictor(db_path, model_path).train_model()
+
+def _predict_shard(db_path, model_path, train_if_missing=True):
+    from ml_model import DropoutPredictor
+    predictor = DropoutPredictor(db_path, model_path, train_if_missing=train_if_missing)
+    predictions = predictor.predict_risk()
+    predictor.save_predictions_to_db(predictions)
+    return len(predictions)
+
+def _notify_shard(db_path):
+    from notification_system import NotificationSystem
+    return NotificationSystem(db_path).send_notifications()
+
+def _sample_shard_features(db_path, sample_size, seed):
+    from data_ingestion import DataProcessor
+    features = DataProcessor(db_path).prepare_features()
+    if len(features) > sample_size:
+        features = features.sample(n=sample_size, random_state=seed)
+    return features
+
+class ShardCatalog:
+    """Map institutions to their own SQLite database and model file.
+
+    The catalog is a small SQLite database of its own; every shard is a
+    complete student database, so each campus has its own write lock.
+    """
+
+    def __init__(self, catalog_db=None):
+        self.catalog_db = catalog_db or SHARD_CONFIG['catalog_db']
+        self.init_table()
+
+    def init_table(self):
+        conn = sqlite3.connect(self.catalog_db)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS shards (
+                institution_id TEXT PRIMARY KEY,
+                db_path TEXT NOT NULL UNIQUE,
+                model_path TEXT NOT NULL,
+                created_at TEXT
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def register(self, institution_id, db_path=None, model_path=None):
+        """Add or update an institution and create its database tables"""
+        from database import StudentDatabase
+        shard_dir = SHARD_CONFIG['shard_dir']
+        db_path = db_path or os.path.join(shard_dir, f"{institution_id}.db")
+        model_path = model_path or os.path.join(shard_dir, f"{institution_id}_model.pkl")
+        for path in (db_path, model_path):
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        StudentDatabase(db_path)
+
+        conn = sqlite3.connect(self.catalog_db)
+        conn.execute('''
+            INSERT INTO shards (institution_id, db_path, model_path, created_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (institution_id) DO UPDATE SET
+                db_path = excluded.db_path, model_path = excluded.model_path
+        ''', (institution_id, db_path, model_path, datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
+        conn.commit()
+        conn.close()
+        return db_path
+
+    def remove(self, institution_id):
+        """Drop an institution from the catalog; its database file is left in place"""
+        conn = sqlite3.connect(self.catalog_db)
+        conn.execute("DELETE FROM shards WHERE institution_id = ?", (institution_id,))
+        conn.commit()
+        conn.close()
+
+    def list_shards(self, institutions=None):
+        """Return [(institution_id, db_path, model_path)], optionally restricted"""
+        conn = sqlite3.connect(self.catalog_db)
+        rows = conn.execute('''
+            SELECT institution_id, db_path, model_path FROM shards ORDER BY institution_id
+        ''').fetchall()
+        conn.close()
+        if institutions is not None:
+            wanted = set(institutions)
+            rows = [row for row in rows if row[0] in wanted]
+        return rows
+
+class ShardRunner:
+    """Fan pipeline work out to one worker process per shard"""
+
+    def __init__(self, catalog=None, max_workers=None):
+        self.catalog = catalog or ShardCatalog()
+        self.max_workers = max_workers or SHARD_CONFIG['max_workers']
+
+    def _fan_out(self, label, make_call, institutions=None):
+        """Run make_call(shard) -> (func, args) for each shard in parallel.
+
+        Returns {institution_id: {'status', 'result', 'seconds'}}; one shard
+        failing does not stop the others.
+        """
+        shards = self.catalog.list_shards(institutions)
+        if not shards:
+            print("No shards registered.")
+            return {}
+
+        results = {}
+        with ProcessPoolExecutor(max_workers=min(self.max_workers, len(shards))) as pool:
+            futures = {}
+            for shard in shards:
+                func, args = make_call(shard)
+                futures[pool.submit(func, *args)] = (shard[0], time.perf_counter())
+            for future in as_completed(futures):
+                institution_id, start = futures[future]
+                seconds = time.perf_counter() - start
+                try:
+                    results[institution_id] = {'status': 'SUCCESS', 'result': future.result(), 'seconds': seconds}
+                    print(f"✅ {label} {institution_id}: done in {seconds:.2f}s")
+                except Exception as e:
+                    results[institution_id] = {'status': 'FAILED', 'result': str(e), 'seconds': seconds}
+                    print(f"❌ {label} {institution_id} failed: {e}")
+        return results
+
+    def train_all(self, institutions=None):
+        """Train one model per shard"""
+        return self._fan_out('train', lambda shard: (_train_shard, (shard[1], shard[2])), institutions)
+
+    def predict_all(self, institutions=None, use_global_model=False):
+        """Score every shard, with its own model or the merged global model"""
+        if not use_global_model:
+            return self._fan_out('predict', lambda shard: (_predict_shard, (shard[1], shard[2])), institutions)
+        
+        global_path = SHARD_CONFIG['global_model_path']
+        if not os.path.exists(global_path):
+            # Otherwise every shard process would train its own model and race to write it here
+            print(f"❌ Global model not found at {global_path}; train it with: python main.py shards train --global-model")
+            return {}
+        return self._fan_out('predict', lambda shard: (_predict_shard, (shard[1], global_path, False)), institutions)
+
+    def notify_all(self, institutions=None):
+        return self._fan_out('notify', lambda shard: (_notify_shard, (shard[1],)), institutions)
+
+    def train_global_model(self, institutions=None, sample_per_shard=None, seed=42):
+        """Train one model on a uniform sample of students from every shard"""
+        sample_per_shard = sample_per_shard or SHARD_CONFIG['global_sample_per_shard']
+        samples = self._fan_out(
+            'sample',
+            lambda shard: (_sample_shard_features, (shard[1], sample_per_shard, seed)),
+            institutions
+        )
+        frames = [r['result'] for r in samples.values() if r['status'] == 'SUCCESS' and not r['result'].empty]
+        if not frames:
+            print("No shard features available for a global model.")
+            return None
+
+        from ml_model import DropoutPredictor
+        merged = pd.concat(frames, ignore_index=True)
+        print(f"Training global model on {len(merged)} students from {len(frames)} shards")
+        return DropoutPredictor(model_path=SHARD_CONFIG['global_model_path']).train_model(features=merged)
+
+class ShardQuery:
+    """Run read-only queries against every shard concurrently and merge the results.
+
+    SQLite releases the GIL while executing, so a thread per shard is enough.
+    """
+
+    def __init__(self, catalog=None, max_workers=None):
+        self.catalog = catalog or ShardCatalog()
+        self.max_workers = max_workers or SHARD_CONFIG['max_workers']
+
+    def _read(self, db_path, query, params):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        try:
+            return pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+
+    def query_all(self, query, params=(), institutions=None):
+        """Concatenate query results from every shard with an institution_id column"""
+        shards = self.catalog.list_shards(institutions)
+        if not shards:
+            return pd.DataFrame()
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(shards))) as pool:
+            futures = {pool.submit(self._read, shard[1], query, list(params)): shard[0] for shard in shards}
+            frames = []
+            for future in as_completed(futures):
+                try:
+                    frame = future.result()
+                except Exception as e:
+                    print(f"❌ Query on shard {futures[future]} failed: {e}")
+                    continue
+                frame.insert(0, 'institution_id', futures[future])
+                frames.append(frame)
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def risk_level_counts(self):
+        """Students per risk level per institution in each shard's current run"""
+        return self.query_all(f'''
+            SELECT risk_level, COUNT(*) AS students, AVG(overall_risk_score) AS mean_score
+            FROM risk_assessment
+            WHERE run_id = {CURRENT_RUN_SQL}
+            GROUP BY risk_level
+        ''')
+
+    def top_high_risk(self, limit=20):
+        """Highest-risk students across all shards; each shard returns only its own top `limit`"""
+        merged = self.query_all(f'''
+            SELECT r.student_id, s.name, s.mentor_id, r.overall_risk_score, r.reasons
+            FROM risk_assessment r
+            JOIN students s ON r.student_id = s.student_id
+            WHERE r.run_id = {CURRENT_RUN_SQL} AND r.risk_level = 'High'
+            ORDER BY r.overall_risk_score DESC
+            LIMIT ?
+        ''', (limit,))
+        if merged.empty:
+            return merged
+        return merged.sort_values('overall_risk_score', ascending=False).head(limit).reset_index(drop=True)
@@ -0,0 +1,126 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+import pandas as pd
+from config import DASHBOARD_CONFIG
+from db_pool import ConnectionPool
+from prediction_runs import CURRENT_RUN_SQL
+from instrumentation import increment
+from date_utils import days_ago
+from database import ensure_day_columns
+from fee_ledger import ensure_fee_ledger
+
+# Each query is bounded by an index on (student_id, <day or date column>) or (run_id, student_id)
+DETAIL_QUERIES = {
+    'student_info': ("SELECT * FROM students WHERE student_id = ?", ()),
+    'risk_info': (f'''
+        SELECT * FROM risk_assessment WHERE student_id = ? AND run_id = {CURRENT_RUN_SQL}
+    ''', ()),
+    'attendance_data': ('''
+        SELECT date, subject, present FROM attendance
+        WHERE student_id = ? AND day >= ?
+    ''', ('attendance_days',)),
+    'test_data': ('''
+        SELECT test_date, subject, score FROM test_scores
+        WHERE student_id = ? AND test_day >= ?
+        ORDER BY test_date DESC
+    ''', ('test_days',)),
+    'fee_data': ('''
+        SELECT status, amount_due, amount_paid, due_date FROM fee_payments
+        WHERE student_id = ? ORDER BY due_date DESC
+    ''', ()),
+    # Running balance kept by the fee ledger triggers: one primary-key row
+    'fee_balance': ('''
+        SELECT total_charged, total_paid, balance, open_instalments, oldest_open_due_date, oldest_open_due_day
+        FROM fee_balances WHERE student_id = ?
+    ''', ()),
+}
+
+# Append-only tables change their max id; students, fee rows and the current
+# risk row (rescored in place by event ingestion) are updated in place, so
+# their content is folded into the version too (the sum of due-date day
+# numbers moves when any single due date is corrected).
+VERSION_QUERY = f'''
+    SELECT
+        (SELECT name || COALESCE(mentor_id, '') || COALESCE(guardian_email, '') FROM students WHERE student_id = :sid),
+        (SELECT run_id || ':' || overall_risk_score || ':' || assessment_date FROM risk_assessment
+         WHERE student_id = :sid AND run_id = {CURRENT_RUN_SQL}),
+        (SELECT MAX(id) FROM attendance WHERE student_id = :sid),
+        (SELECT MAX(id) FROM test_scores WHERE student_id = :sid),
+        (SELECT COUNT(*) || ':' || TOTAL(amount_due) || ':' || TOTAL(amount_paid) || ':' ||
+                TOTAL(julianday(due_date)) || ':' || group_concat(status) FROM fee_payments WHERE student_id = :sid)
+'''
+
+class StudentDetailLoader:
+    """Load a student's detail page over one pooled connection with a per-student LRU.
+
+    All six result sets are read in a single read transaction. A cached entry
+    is reused until the student's own rows change, checked with one cheap
+    indexed version query per view.
+    """
+
+    def __init__(self, db_name="student_database.db", max_entries=None, pool=None):
+        self.db_name = db_name
+        self.max_entries = max_entries or DASHBOARD_CONFIG['detail_cache_size']
+        self.pool = pool or ConnectionPool(db_name)
+        self.windows = {
+            'attendance_days': DASHBOARD_CONFIG['detail_attendance_days'],
+            'test_days': DASHBOARD_CONFIG['detail_test_days'],
+        }
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.init_indexes()
+
+    def init_indexes(self):
+        ensure_day_columns(self.db_name)
+        ensure_fee_ledger(self.db_name)
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_fee_payments_student_due ON fee_payments (student_id, due_date)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_risk_assessment_student_date ON risk_assessment (student_id, assessment_date)")
+        conn.commit()
+        conn.close()
+
+    def load(self, student_id):
+        """Return (details, metrics) for a student; metrics hold latency and bytes fetched"""
+        start = time.perf_counter()
+        with self.pool.connection() as conn:
+            version = conn.execute(VERSION_QUERY, {'sid': student_id}).fetchone()
+
+            with self._lock:
+                entry = self._cache.get(student_id)
+                if entry and entry[0] == version:
+                    self._cache.move_to_end(student_id)
+                    return entry[1], self._metrics(True, start, 0)
+
+            conn.execute("BEGIN")
+            try:
+                details = {
+                    name: pd.read_sql_query(sql, conn, params=[student_id, *(days_ago(self.windows[w]) for w in windows)])
+                    for name, (sql, windows) in DETAIL_QUERIES.items()
+                }
+            finally:
+                conn.rollback()
+
+        bytes_fetched = int(sum(df.memory_usage(deep=True).sum() for df in details.values()))
+        with self._lock:
+            self._cache[student_id] = (version, details)
+            self._cache.move_to_end(student_id)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return details, self._metrics(False, start, bytes_fetched)
+
+    def _metrics(self, cache_hit, start, bytes_fetched):
+        increment('cache_lookups', cache='student_detail', result='hit' if cache_hit else 'miss')
+        return {
+            'cache_hit': cache_hit,
+            'latency_ms': (time.perf_counter() - start) * 1000,
+            'bytes_fetched': bytes_fetched
+        }
+
+    def invalidate(self, student_id=None):
+        with self._lock:
+            if student_id is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(student_id, None)
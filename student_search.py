@@ -0,0 +1,138 @@
+import sqlite3
+from config import DASHBOARD_CONFIG
+
+# Upper bound for prefix range scans: every string starting with p sorts below p + MAX_CHAR
+MAX_CHAR = '\U0010ffff'
+
+class StudentSearch:
+    """Paginated prefix search over students.student_id and students.name.
+
+    ID and name prefixes are answered with index range scans (keyset pagination,
+    so page N costs the same as page 1). With use_fts enabled, queries of three
+    or more characters match anywhere in the ID or name via an FTS5 trigram index.
+    """
+
+    def __init__(self, db_name="student_database.db", use_fts=None, page_size=None):
+        self.db_name = db_name
+        self.page_size = page_size or DASHBOARD_CONFIG['search_page_size']
+        use_fts = DASHBOARD_CONFIG['search_use_fts'] if use_fts is None else use_fts
+        self.init_indexes()
+        self.use_fts = use_fts and self.init_fts()
+
+    def init_indexes(self):
+        conn = sqlite3.connect(self.db_name)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_students_mentor_id ON students (mentor_id, student_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_students_name ON students (name COLLATE NOCASE, student_id)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_students_mentor_name ON students (mentor_id, name COLLATE NOCASE, student_id)")
+        conn.commit()
+        conn.close()
+
+    def init_fts(self):
+        """Create and sync the trigram index; returns False if FTS5 is unavailable"""
+        conn = sqlite3.connect(self.db_name)
+        try:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'students_fts'"
+            ).fetchone()
+            if not exists:
+                conn.execute('''
+                    CREATE VIRTUAL TABLE students_fts USING fts5(
+                        student_id, name, content='students', content_rowid='rowid', tokenize='trigram'
+                    )
+                ''')
+                conn.execute("INSERT INTO students_fts (students_fts) VALUES ('rebuild')")
+            conn.executescript('''
+                CREATE TRIGGER IF NOT EXISTS students_fts_insert AFTER INSERT ON students BEGIN
+                    INSERT INTO students_fts (rowid, student_id, name) VALUES (new.rowid, new.student_id, new.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS students_fts_delete AFTER DELETE ON students BEGIN
+                    INSERT INTO students_fts (students_fts, rowid, student_id, name)
+                    VALUES ('delete', old.rowid, old.student_id, old.name);
+                END;
+                CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE ON students BEGIN
+                    INSERT INTO students_fts (students_fts, rowid, student_id, name)
+                    VALUES ('delete', old.rowid, old.student_id, old.name);
+                    INSERT INTO students_fts (rowid, student_id, name) VALUES (new.rowid, new.student_id, new.name);
+                END;
+            ''')
+            conn.commit()
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 trigram search unavailable, using prefix search: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def search(self, query, mentor_id=None, cursor=None):
+        """Return (rows, next_cursor); rows are (student_id, name, mentor_id) tuples.
+
+        Pass the returned cursor back to fetch the next page; it is None on the last page.
+        """
+        query = (query or '').strip()
+        mode = cursor[0] if cursor else None
+
+        if self.use_fts and len(query) >= 3 and mode in (None, 'fts'):
+            return self._search_fts(query, mentor_id, cursor)
+        if mode in (None, 'id'):
+            rows, next_cursor = self._search_id(query.upper(), mentor_id, cursor)
+            if rows or mode == 'id' or not query:
+                return rows, next_cursor
+        return self._search_name(query, mentor_id, cursor)
+
+    def _page(self, rows, make_cursor):
+        if len(rows) > self.page_size:
+            rows = rows[:self.page_size]
+            return rows, make_cursor(rows[-1])
+        return rows, None
+
+    def _run(self, sql, params):
+        conn = sqlite3.connect(self.db_name)
+        rows = conn.execute(sql, params).fetchall()
+        conn.close()
+        return rows
+
+    def _search_id(self, prefix, mentor_id, cursor):
+        after = cursor[1] if cursor else ''
+        sql = '''
+            SELECT student_id, name, mentor_id FROM students
+            WHERE student_id >= ? AND student_id < ? AND student_id > ?
+        '''
+        params = [prefix, prefix + MAX_CHAR, after]
+        if mentor_id is not None:
+            sql += " AND mentor_id = ?"
+            params.append(mentor_id)
+        sql += " ORDER BY student_id LIMIT ?"
+        params.append(self.page_size + 1)
+        return self._page(self._run(sql, params), lambda last: ('id', last[0]))
+
+    def _search_name(self, prefix, mentor_id, cursor):
+        after_name, after_id = (cursor[1], cursor[2]) if cursor else ('', '')
+        sql = '''
+            SELECT student_id, name, mentor_id FROM students
+            WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE
+            AND (name > ? COLLATE NOCASE OR (name = ? COLLATE NOCASE AND student_id > ?))
+        '''
+        params = [prefix, prefix + MAX_CHAR, after_name, after_name, after_id]
+        if mentor_id is not None:
+            sql += " AND mentor_id = ?"
+            params.append(mentor_id)
+        sql += " ORDER BY name COLLATE NOCASE, student_id LIMIT ?"
+        params.append(self.page_size + 1)
+        return self._page(self._run(sql, params), lambda last: ('name', last[1], last[0]))
+
+    def _search_fts(self, query, mentor_id, cursor):
+        after = cursor[1] if cursor else 0
+        sql = '''
+            SELECT s.student_id, s.name, s.mentor_id, s.rowid FROM students_fts f
+            JOIN students s ON s.rowid = f.rowid
+            WHERE students_fts MATCH ? AND f.rowid > ?
+        '''
+        # Quote the query so user input is matched literally
+        params = ['"' + query.replace('"', '""') + '"', after]
+        if mentor_id is not None:
+            sql += " AND s.mentor_id = ?"
+            params.append(mentor_id)
+        sql += " ORDER BY f.rowid LIMIT ?"
+        params.append(self.page_size + 1)
+        rows, next_cursor = self._page(self._run(sql, params), lambda last: ('fts', last[3]))
+        return [row[:3] for row in rows], next_cursor
@@ -0,0 +1,32 @@
+import pandas as pd
+from notification_dedup import NotificationDeduplicator, content_hash
+
+def _candidates(level, reasons):
+    return pd.DataFrame({'student_id': ['STU1000'], 'risk_level': [level], 'reasons': [reasons]})
+
+def _send(dedup, db_name, frame):
+    import sqlite3
+    conn = sqlite3.connect(db_name)
+    dedup.record_sent(conn, list(zip(frame['student_id'], frame['content_hash'], frame['risk_level'])), 'MENTOR_ALERT')
+    conn.commit()
+    conn.close()
+
+def test_hash_ignores_changing_figures():
+    assert content_hash('High', 'Low attendance (45.6%), Fee payment issues') == \
+           content_hash('High', 'Low attendance (44.1%), Fee payment issues')
+    assert content_hash('High', 'Low attendance (45.6%)') != content_hash('High', 'Fee payment issues')
+
+def test_same_level_drift_is_suppressed_and_escalation_sent(tmp_path):
+    db_name = str(tmp_path / 'dedup.db')
+    dedup = NotificationDeduplicator(db_name, cooldown_days=7)
+
+    first = dedup.filter_new(_candidates('Medium', 'Low attendance (65.2%)'), 'MENTOR_ALERT')
+    assert len(first) == 1
+    _send(dedup, db_name, first)
+
+    # Attendance drifted and a new reason appeared, but the level stayed Medium
+    drifted = dedup.filter_new(_candidates('Medium', 'Low attendance (61.8%), Multiple test attempts (2)'), 'MENTOR_ALERT')
+    assert drifted.empty
+
+    escalated = dedup.filter_new(_candidates('High', 'Low attendance (52.0%)'), 'MENTOR_ALERT')
+    assert len(escalated) == 1
@@ -0,0 +1,33 @@
+import sqlite3
+from datetime import datetime, timedelta
+from database import StudentDatabase
+from notification_outbox import NotificationDispatcher
+
+def _queue(db_name, count):
+    StudentDatabase(db_name)
+    conn = sqlite3.connect(db_name)
+    with conn:
+        conn.executemany('''
+            INSERT INTO notifications (notification_type, message, status, recipient)
+            VALUES ('MENTOR_ALERT', ?, 'PENDING', 'mentor@example.com')
+        ''', [(f"alert {i}",) for i in range(count)])
+    conn.close()
+
+def test_expired_claim_is_not_sent_twice(tmp_path):
+    db_name = str(tmp_path / 'outbox.db')
+    _queue(db_name, 3)
+    sent = []
+    sender = lambda recipient, subject, message: sent.append(message) or True
+    config = {'send_rate_per_minute': 0, 'claim_timeout_seconds': 60}
+
+    slow = NotificationDispatcher(db_name, sender=sender, config=config)
+    stale_batch = slow.claim_batch()
+
+    # The slow worker's claim expires and another dispatcher takes the rows over
+    other = NotificationDispatcher(db_name, sender=sender, config=config)
+    other._now = lambda: datetime.now() + timedelta(seconds=120)
+    other.recover_stale_claims()
+    assert other.send_batch(other.claim_batch())['SENT'] == 3
+
+    assert slow.send_batch(stale_batch)['SENT'] == 0
+    assert sorted(sent) == ['alert 0', 'alert 1', 'alert 2']
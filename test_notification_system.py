@@ -0,0 +1,28 @@
+import sqlite3
+from datetime import datetime
+from database import StudentDatabase
+from notification_system import NotificationSystem
+from prediction_runs import PredictionRunPublisher
+
+def _seed(db_name, mentors):
+    StudentDatabase(db_name)
+    conn = sqlite3.connect(db_name)
+    with conn:
+        conn.executemany("INSERT INTO students (student_id, name, mentor_id) VALUES (?, ?, ?)",
+                         [(f"STU{i}", f"Student {i}", mentor) for i, mentor in enumerate(mentors)])
+    conn.close()
+    publisher = PredictionRunPublisher(db_name)
+    today = datetime.now().strftime('%Y-%m-%d')
+    publisher.publish(publisher.stage(today, [
+        (f"STU{i}", 85.0, 'High', 60.0, 40.0, 100.0, 'Low attendance (40.0%), Fee payment issues')
+        for i in range(len(mentors))
+    ]))
+
+def test_students_without_mentor_do_not_drop_other_alerts(tmp_path):
+    db_name = str(tmp_path / 'notify.db')
+    _seed(db_name, ['MENT1', 'MENT1', None, 'MENT2', None])
+
+    notifications = NotificationSystem(db_name).generate_mentor_notifications()
+
+    assert sorted(n['mentor_id'] for n in notifications) == ['MENT1', 'MENT2']
+    assert {n['mentor_id']: len(n['history']) for n in notifications} == {'MENT1': 2, 'MENT2': 1}